@@ -1,265 +1,56 @@
 import streamlit as st 
-import os
 import random
 from main import (
+    WordEntry,
     load_word_pools, 
-    create_audio_file, 
-    load_vocabulary_from_file, 
-    save_word_pools_to_file,
-    filter_words_by_category,
     validate_word_entry,
-    cleanup_audio_file,
     DEFAULT_CATEGORIES,
-    DEFAULT_VOCABULARY_FILE,
     DIFFICULTY_LEVELS,
     LEVEL_DESCRIPTIONS,
     SPEED_OPTIONS,
     SPEED_LABELS
 )
-
-# Phonetic transcriptions for vocabulary words
-PHONETICS = {
-    # General
-    "serendipity": "/ˌsɛrənˈdɪpɪti/",
-    "eloquent": "/ˈɛləkwənt/",
-    "resilient": "/rɪˈzɪliənt/",
-    "pragmatic": "/prægˈmætɪk/",
-    "ubiquitous": "/juˈbɪkwɪtəs/",
-    "meticulous": "/məˈtɪkjələs/",
-    "ephemeral": "/ɪˈfɛmərəl/",
-    "versatile": "/ˈvɜrsətaɪl/",
-    "ambiguous": "/æmˈbɪgjuəs/",
-    "innovative": "/ˈɪnəˌveɪtɪv/",
-    "tenacious": "/təˈneɪʃəs/",
-    "profound": "/prəˈfaʊnd/",
-    "subtle": "/ˈsʌtəl/",
-    "coherent": "/koʊˈhɪrənt/",
-    "diligent": "/ˈdɪlɪdʒənt/",
-    "intricate": "/ˈɪntrɪkət/",
-    "benevolent": "/bəˈnɛvələnt/",
-    "authentic": "/ɔˈθɛntɪk/",
-    "efficient": "/ɪˈfɪʃənt/",
-    "contemplative": "/kənˈtɛmplətɪv/",
-    
-    # Science
-    "hypothesis": "/haɪˈpɑθəsɪs/",
-    "catalyst": "/ˈkætəlɪst/",
-    "molecule": "/ˈmɑləˌkjul/",
-    "ecosystem": "/ˈikoʊˌsɪstəm/",
-    "photosynthesis": "/ˌfoʊtoʊˈsɪnθəsɪs/",
-    "chromosome": "/ˈkroʊməˌsoʊm/",
-    "quantum": "/ˈkwɑntəm/",
-    "biodiversity": "/ˌbaɪoʊdaɪˈvɜrsəti/",
-    "metabolism": "/məˈtæbəˌlɪzəm/",
-    "neuron": "/ˈnʊrɑn/",
-    "osmosis": "/ɑzˈmoʊsɪs/",
-    "mitosis": "/maɪˈtoʊsɪs/",
-    "genome": "/ˈdʒinoʊm/",
-    "thermodynamics": "/ˌθɜrmoʊdaɪˈnæmɪks/",
-    "evolution": "/ˌɛvəˈluʃən/",
-    "isotope": "/ˈaɪsəˌtoʊp/",
-    "enzyme": "/ˈɛnzaɪm/",
-    "gravity": "/ˈgrævəti/",
-    "radiation": "/ˌreɪdiˈeɪʃən/",
-    "symbiosis": "/ˌsɪmbaɪˈoʊsɪs/",
-    
-    # Business
-    "entrepreneur": "/ˌɑntrəprəˈnɜr/",
-    "revenue": "/ˈrɛvəˌnu/",
-    "stakeholder": "/ˈsteɪkˌhoʊldər/",
-    "portfolio": "/pɔrtˈfoʊlioʊ/",
-    "synergy": "/ˈsɪnərdʒi/",
-    "leverage": "/ˈlɛvərɪdʒ/",
-    "equity": "/ˈɛkwəti/",
-    "margin": "/ˈmɑrdʒən/",
-    "franchise": "/ˈfrænˌtʃaɪz/",
-    "diversification": "/daɪˌvɜrsəfəˈkeɪʃən/",
-    "acquisition": "/ˌækwəˈzɪʃən/",
-    "liability": "/ˌlaɪəˈbɪləti/",
-    "liquidate": "/ˈlɪkwəˌdeɪt/",
-    "compliance": "/kəmˈplaɪəns/",
-    "benchmark": "/ˈbɛnʧˌmɑrk/",
-    "scalable": "/ˈskeɪləbəl/",
-    "subsidiary": "/səbˈsɪdiˌɛri/",
-    "turnover": "/ˈtɜrnˌoʊvər/",
-    "valuation": "/ˌvæljuˈeɪʃən/",
-    
-    # Add more categories as needed...
-}
-
-# Difficulty levels for words
-DIFFICULTY_LEVELS = {
-    # General - Easy to Hard
-    "efficient": "⭐",
-    "authentic": "⭐",
-    "versatile": "⭐⭐",
-    "pragmatic": "⭐⭐",
-    "resilient": "⭐⭐",
-    "innovative": "⭐⭐",
-    "profound": "⭐⭐",
-    "coherent": "⭐⭐",
-    "diligent": "⭐⭐",
-    "benevolent": "⭐⭐⭐",
-    "eloquent": "⭐⭐⭐",
-    "meticulous": "⭐⭐⭐",
-    "ubiquitous": "⭐⭐⭐",
-    "ephemeral": "⭐⭐⭐",
-    "ambiguous": "⭐⭐⭐",
-    "tenacious": "⭐⭐⭐",
-    "subtle": "⭐⭐⭐",
-    "intricate": "⭐⭐⭐",
-    "contemplative": "⭐⭐⭐",
-    "serendipity": "⭐⭐⭐",
-    
-    # Science
-    "gravity": "⭐",
-    "molecule": "⭐",
-    "ecosystem": "⭐⭐",
-    "evolution": "⭐⭐",
-    "catalyst": "⭐⭐",
-    "enzyme": "⭐⭐",
-    "neuron": "⭐⭐",
-    "genome": "⭐⭐⭐",
-    "hypothesis": "⭐⭐⭐",
-    "photosynthesis": "⭐⭐⭐",
-    "chromosome": "⭐⭐⭐",
-    "quantum": "⭐⭐⭐",
-    "biodiversity": "⭐⭐⭐",
-    "metabolism": "⭐⭐⭐",
-    "osmosis": "⭐⭐⭐",
-    "mitosis": "⭐⭐⭐",
-    "thermodynamics": "⭐⭐⭐",
-    "isotope": "⭐⭐⭐",
-    "radiation": "⭐⭐⭐",
-    "symbiosis": "⭐⭐⭐",
-}
-
-def get_phonetic(word):
-    """Get phonetic transcription for a word"""
-    return PHONETICS.get(word.lower(), "")
-
-def get_difficulty(word):
-    """Get difficulty level for a word"""
-    return DIFFICULTY_LEVELS.get(word.lower(), "⭐⭐")
-
-def save_to_learned(word_entry, learned_file="learned.json"):
-    """Save a word entry to learned.json file"""
-    import json
-    
-    # Load existing learned words
-    learned_words = []
-    if os.path.exists(learned_file):
-        try:
-            with open(learned_file, 'r', encoding='utf-8') as f:
-                learned_words = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            learned_words = []
-    
-    # Add timestamp to the entry
-    import datetime
-    word_entry_with_timestamp = word_entry.copy()
-    word_entry_with_timestamp['learned_date'] = datetime.datetime.now().isoformat()
-    
-    # Check if word already exists in learned list
-    existing_word = next((w for w in learned_words if w['word'].lower() == word_entry['word'].lower()), None)
-    if not existing_word:
-        learned_words.append(word_entry_with_timestamp)
-        
-        # Save back to file
-        with open(learned_file, 'w', encoding='utf-8') as f:
-            json.dump(learned_words, f, ensure_ascii=False, indent=2)
-        return True
-    return False
-
-def load_learned_words(learned_file="learned.json"):
-    """Load learned words from learned.json and convert to vocabulary format"""
-    import json
-    
-    if not os.path.exists(learned_file):
-        return []
-    
-    try:
-        with open(learned_file, 'r', encoding='utf-8') as f:
-            learned_words = json.load(f)
-        
-        # Convert to the same format as regular vocabulary
-        formatted_words = []
-        for word_entry in learned_words:
-            formatted_word = {
-                'word': word_entry.get('word', ''),
-                'meaning': word_entry.get('meaning', ''),
-                'phrase': word_entry.get('phrase', ''),
-                'category': word_entry.get('category', 'general'),
-                'learned_date': word_entry.get('learned_date', '')
-            }
-            formatted_words.append(formatted_word)
-        
-        return formatted_words
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
-
-def save_learned_words_to_file(learned_words, learned_file="learned.json"):
-    """Save learned words back to JSON file"""
-    import json
-    
-    with open(learned_file, 'w', encoding='utf-8') as f:
-        json.dump(learned_words, f, ensure_ascii=False, indent=2)
-    
-    return True
+from vocabulary_store import VocabularySnapshot, vocabulary_store
+from audio_widgets import request_audio, show_requested_audio, wait_for_requested_audio
+from learner_profiles import DEFAULT_LEARNER_ID, get_profile
+from vocabulary_index import VocabularyIndex
+from word_metadata import get_difficulty
+
+def save_to_learned(word_entry):
+    """Save a word entry to the learned words"""
+    # O(1) keyed insert in either backend; learned.json is only written in batches
+    return storage.add_learned(word_entry)
+
+def load_learned_words():
+    """Load learned words and convert to vocabulary format"""
+    # Parsed once per change and shared across sessions
+    return storage.get_learned()
+
+def remove_from_learned(word):
+    """Remove a word from the learned words"""
+    return storage.remove_learned(word)
 
 def delete_word_from_file(word_to_delete, word_file):
     """Delete a word from the vocabulary file"""
-    # Read all lines
-    with open(word_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    # Filter out the word to delete
-    updated_lines = []
-    for line in lines:
-        if line.strip():
-            parts = line.strip().split(' | ')
-            if len(parts) >= 1 and parts[0].lower() != word_to_delete.lower():
-                updated_lines.append(line)
-    
-    # Write back to file
-    with open(word_file, 'w', encoding='utf-8') as f:
-        f.writelines(updated_lines)
-    
-    return True
+    return storage.delete_word(word_file, word_to_delete)
 
 def load_vocabulary_with_expressions(level):
     """Load vocabulary from JSON files with expressions included"""
-    import json
-    
     if level == "learned":
         return load_learned_words()
     
-    # Map level to filename
-    level_files = {
-        1: "level1.json",
-        2: "level2.json", 
-        3: "level3.json"
-    }
-    
-    filename = level_files.get(level)
-    if not filename or not os.path.exists(filename):
+    if level not in (1, 2, 3):
         return []
     
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Flatten all categories into a single list
-        all_words = []
-        for category, words in data.items():
-            for word_entry in words:
-                # Add category to each word entry
-                word_entry['category'] = category
-                all_words.append(word_entry)
-        
-        return all_words
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
+    # Level files are parsed once per process and shared across sessions
+    return vocabulary_store.get_level(level)
+
+def get_word_index(words):
+    """Get the category and difficulty index for a list of words"""
+    if isinstance(words, VocabularySnapshot):
+        # Built once per snapshot and shared across sessions
+        return words.get_index(difficulty_of=get_difficulty)
+    return VocabularyIndex(words, difficulty_of=get_difficulty)
 
 def generate_quiz_question(words, correct_word):
     """Generate a multiple choice quiz question"""
@@ -512,7 +303,16 @@ else:
     st.info(f"🎯 **Current Level: {current_level}** - {LEVEL_DESCRIPTIONS[current_level]}")
 
 # Configuration
-word_file = DEFAULT_VOCABULARY_FILE
+# Each learner has their own vocabulary and progress (?learner=<id> in the URL)
+learner_id = st.query_params.get("learner", DEFAULT_LEARNER_ID)
+profile = get_profile(learner_id)
+if profile is None:
+    st.error(f"❌ Invalid learner ID '{learner_id}'. Use up to 64 letters, digits, '.', '_' or '-'.")
+    st.stop()
+st.sidebar.caption(f"👤 Learner: {learner_id}")
+word_file = profile.word_file
+# Vocabulary and learned words backend (SQLite unless VOCABULARY_STORAGE=file)
+storage = profile.storage
 category_list = DEFAULT_CATEGORIES
 
 # Load sample vocabulary button
@@ -523,9 +323,7 @@ with col1:
             learned_words = load_learned_words()
             if learned_words:
                 # Convert learned words to the standard vocabulary format and save to the working file
-                with open(word_file, "w", encoding='utf-8') as f:
-                    for word_entry in learned_words:
-                        f.write(f"{word_entry['word']} | {word_entry['meaning']} | {word_entry['phrase']} | {word_entry['category']}\n")
+                storage.replace_vocabulary(word_file, learned_words)
                 st.success(f"✅ Successfully loaded {len(learned_words)} learned words!")
                 st.info("Navigate to other sections to review your learned vocabulary.")
             else:
@@ -534,9 +332,9 @@ with col1:
         if st.button(f"📚 Load Level {current_level} Vocabulary", help=f"Load 20 words for each category at Level {current_level}"):
             word_pools = load_word_pools(current_level)
             if word_pools:
-                success = save_word_pools_to_file(word_pools, word_file)
+                success = storage.save_word_pools(word_pools, word_file)
                 if success:
-                    word_length = len(load_vocabulary_from_file(word_file))
+                    word_length = len(storage.get_vocabulary(word_file))
                     st.success(f"✅ Successfully loaded Level {current_level} vocabulary across all categories!")
                     #st.info("Navigate to other sections to explore the features.")
                 else:
@@ -546,7 +344,7 @@ with col1:
 
 with col2:
     # Statistics display
-    all_words = load_vocabulary_from_file(word_file)
+    all_words = storage.get_vocabulary(word_file)
     if all_words:
         st.metric("📊 Total Words", len(all_words))
 
@@ -595,12 +393,14 @@ if select == "📖 Study Mode":
     if selected_category:
         # Load vocabulary with expressions from JSON files
         all_words = load_vocabulary_with_expressions(current_level)
-        filtered_words = filter_words_by_category(all_words, selected_category)
+        word_index = get_word_index(all_words)
         
-        # Apply difficulty filter
+        # Apply category and difficulty filters through the index
         if difficulty_filter != "All Levels":
-            target_level = difficulty_filter
-            filtered_words = [w for w in filtered_words if get_difficulty(w['word']) == target_level]
+            target_level = difficulty_filter.split()[0]  # "⭐⭐ Medium" -> "⭐⭐"
+            filtered_words = word_index.select(category=selected_category, difficulties=[target_level])
+        else:
+            filtered_words = word_index.category(selected_category)
         
         if filtered_words:
             st.info(f"📚 Showing {len(filtered_words)} words from {selected_category}")
@@ -610,7 +410,8 @@ if select == "📖 Study Mode":
                     col1, col2 = st.columns([4, 1])
                     
                     with col1:
-                        difficulty = get_difficulty(entry['word'])
+                        # Level words carry their difficulty and phonetics from the compiled snapshot
+                        difficulty = entry.get('difficulty') or get_difficulty(entry['word'])
                         
                         # Simple card with visual border using Streamlit components
                         with st.container():
@@ -619,6 +420,8 @@ if select == "📖 Study Mode":
                             
                             # Word title with emoji
                             st.markdown(f"### 📚 {entry['word']} {difficulty}")
+                            if entry.get('phonetic'):
+                                st.markdown(f"*{entry['phonetic']}*")
                             
                             # Meaning
                             st.markdown(f"**Meaning:** {entry['meaning']}")
@@ -641,26 +444,12 @@ if select == "📖 Study Mode":
                         
                         # Play buttons
                         if st.button(f"🔊 Word", key=f"word_{entry['word']}"):
-                            audio_file = create_audio_file(entry['word'], f"word_{entry['word']}", is_phrase=False, speed=selected_speed)
-                            if audio_file and os.path.exists(audio_file):
-                                with open(audio_file, 'rb') as audio:
-                                    # Detect audio format based on file extension
-                                    audio_format = 'audio/mp3' if audio_file.endswith('.mp3') else 'audio/wav'
-                                    st.audio(audio.read(), format=audio_format)
-                                cleanup_audio_file(audio_file)
-                            else:
-                                st.error("Audio generation failed")
+                            request_audio(f"word_{entry['word']}", entry['word'], is_phrase=False, speed=selected_speed)
+                        show_requested_audio(f"word_{entry['word']}")
                         
                         if entry['phrase'] and st.button(f"🔊 Phrase", key=f"phrase_{entry['word']}"):
-                            audio_file = create_audio_file(entry['phrase'], f"phrase_{entry['word']}", is_phrase=True, speed=selected_speed)
-                            if audio_file and os.path.exists(audio_file):
-                                with open(audio_file, 'rb') as audio:
-                                    # Detect audio format based on file extension
-                                    audio_format = 'audio/mp3' if audio_file.endswith('.mp3') else 'audio/wav'
-                                    st.audio(audio.read(), format=audio_format)
-                                cleanup_audio_file(audio_file)
-                            else:
-                                st.error("Audio generation failed")
+                            request_audio(f"phrase_{entry['word']}", entry['phrase'], is_phrase=True, speed=selected_speed)
+                        show_requested_audio(f"phrase_{entry['word']}")
                         
                         # Action buttons
                         st.markdown("<br>", unsafe_allow_html=True)
@@ -670,13 +459,10 @@ if select == "📖 Study Mode":
                             # Move back to vocabulary button for learned words
                             if st.button(f"↩️ Move Back", key=f"moveback_{entry['word']}", help="Move back to main vocabulary"):
                                 # Add word back to main vocabulary file
-                                with open(word_file, "a", encoding='utf-8') as f:
-                                    f.write(f"{entry['word']} | {entry['meaning']} | {entry['phrase']} | {entry['category']}\n")
+                                storage.add_word(word_file, entry)
                                 
-                                # Remove from learned.json
-                                learned_words = load_learned_words()
-                                updated_learned = [w for w in learned_words if w['word'].lower() != entry['word'].lower()]
-                                save_learned_words_to_file(updated_learned)
+                                # Remove from learned words
+                                remove_from_learned(entry['word'])
                                 
                                 st.success(f"'{entry['word']}' moved back to main vocabulary!")
                                 st.rerun()  # Refresh the page to update the list
@@ -694,10 +480,8 @@ if select == "📖 Study Mode":
                         # Delete button (available for all levels)
                         if st.button(f"🗑️ Delete", key=f"delete_{entry['word']}", help="Delete this word"):
                             if current_level == "learned":
-                                # Delete from learned.json
-                                learned_words = load_learned_words()
-                                updated_learned = [w for w in learned_words if w['word'].lower() != entry['word'].lower()]
-                                save_learned_words_to_file(updated_learned)
+                                # Delete from learned words
+                                remove_from_learned(entry['word'])
                             else:
                                 # Delete from main vocabulary file
                                 delete_word_from_file(entry['word'], word_file)
@@ -720,7 +504,7 @@ elif select == "🎯 Quiz Mode":
     
     # Load words for quiz using sidebar selections with expressions
     all_words = load_vocabulary_with_expressions(current_level)
-    quiz_words = filter_words_by_category(all_words, selected_category)
+    quiz_words = get_word_index(all_words).category(selected_category)
     
     # Display current quiz settings
     st.info(f"📚 **Category:** {selected_category} | 🎯 **Quiz Type:** {quiz_type}")
@@ -787,7 +571,7 @@ elif select == "🎯 Quiz Mode":
                     st.session_state.current_question['answered'] = True
                     
                     # Show word details with new structure
-                    difficulty = get_difficulty(correct_word['word'])
+                    difficulty = correct_word.get('difficulty') or get_difficulty(correct_word['word'])
                     
                     # Simple quiz result card
                     st.success("Word Details:")
@@ -837,15 +621,14 @@ elif select == "➕ Add Word":
         if is_valid:
             st.success(f"Word '{word}' added successfully!")
             # Note: In a full implementation, you'd also save the phonetic and difficulty data
-            with open(word_file, "a", encoding='utf-8') as f:
-                f.write(f"{word} | {meaning} | {phrase} | {category.lower()}\n")
+            storage.add_word(word_file, WordEntry(word, meaning, phrase, category))
         else:
             st.error(error_msg)
 
 elif select == "📊 Progress":
     st.subheader("📊 Learning Progress & Statistics")
     
-    all_words = load_vocabulary_from_file(word_file)
+    all_words = storage.get_vocabulary(word_file)
     
     if all_words:
         # Overall statistics
@@ -864,12 +647,11 @@ elif select == "📊 Progress":
         with col4:
             st.metric("Correct Answers", st.session_state.quiz_score)
         
+        word_index = get_word_index(all_words)
+        
         # Category breakdown
         st.markdown("### 📈 Words by Category")
-        category_stats = {}
-        for word in all_words:
-            cat = word.get('category', 'Unknown').title()
-            category_stats[cat] = category_stats.get(cat, 0) + 1
+        category_stats = {cat.title(): count for cat, count in word_index.category_counts().items()}
         
         # Display as columns
         cols = st.columns(len(category_stats))
@@ -879,11 +661,9 @@ elif select == "📊 Progress":
         
         # Difficulty distribution (if available)
         st.markdown("### ⭐ Difficulty Distribution")
-        difficulty_stats = {"⭐ Easy": 0, "⭐⭐ Medium": 0, "⭐⭐⭐ Hard": 0}
-        for word in all_words:
-            diff = get_difficulty(word['word'])
-            if diff in difficulty_stats:
-                difficulty_stats[diff] += 1
+        difficulty_stats = {}
+        for level in ["⭐ Easy", "⭐⭐ Medium", "⭐⭐⭐ Hard"]:
+            difficulty_stats[level] = len(word_index.difficulty(level.split()[0]))
         
         diff_cols = st.columns(3)
         for i, (level, count) in enumerate(difficulty_stats.items()):
@@ -898,6 +678,10 @@ elif select == "📊 Progress":
     else:
         st.info("Load vocabulary words to see progress statistics.")
 
+# Attach audio that was still being synthesized when the page rendered
+if wait_for_requested_audio():
+    st.rerun()
+
 # Footer
 st.markdown("---")
 st.markdown("**Advanced 1 Features:** Phonetic transcription, difficulty levels, interactive quizzes, progress tracking")
\ No newline at end of file
@@ -1,66 +1,33 @@
 import streamlit as st 
 import os
 import random
-import json
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta
 from main import (
     load_word_pools, 
-    create_audio_file, 
-    load_vocabulary_from_file, 
-    save_word_pools_to_file,
-    filter_words_by_category,
     validate_word_entry,
-    cleanup_audio_file,
     DEFAULT_CATEGORIES,
-    DEFAULT_VOCABULARY_FILE,
     DIFFICULTY_LEVELS,
     LEVEL_DESCRIPTIONS,
     SPEED_OPTIONS,
     SPEED_LABELS
 )
-
-# Advanced word data with comprehensive information
-ADVANCED_WORD_DATA = {
-    "serendipity": {
-        "phonetic": "/ˌsɛrənˈdɪpɪti/",
-        "difficulty": "⭐⭐⭐",
-        "part_of_speech": "noun",
-        "etymology": "From Persian fairy tale 'The Three Princes of Serendip'",
-        "synonyms": ["chance", "fortune", "luck", "accident"],
-        "antonyms": ["misfortune", "bad luck", "intention"],
-        "collocations": ["pure serendipity", "by serendipity", "serendipity strikes"],
-        "word_forms": {"noun": "serendipity", "adjective": "serendipitous", "adverb": "serendipitously"},
-        "frequency": "rare",
-        "register": "formal",
-        "common_mistakes": "Often misspelled as 'serendipety'"
-    },
-    "entrepreneur": {
-        "phonetic": "/ˌɑntrəprəˈnɜr/",
-        "difficulty": "⭐⭐",
-        "part_of_speech": "noun",
-        "etymology": "French 'entreprendre' meaning 'to undertake'",
-        "synonyms": ["business owner", "innovator", "founder", "startup founder"],
-        "antonyms": ["employee", "worker", "follower"],
-        "collocations": ["successful entrepreneur", "young entrepreneur", "serial entrepreneur"],
-        "word_forms": {"noun": "entrepreneur", "adjective": "entrepreneurial", "noun": "entrepreneurship"},
-        "frequency": "common",
-        "register": "business/formal",
-        "common_mistakes": "Pronunciation often confused with 'entrepren-your'"
-    },
-    "metabolism": {
-        "phonetic": "/məˈtæbəˌlɪzəm/",
-        "difficulty": "⭐⭐",
-        "part_of_speech": "noun",
-        "etymology": "Greek 'metabole' meaning 'change'",
-        "synonyms": ["metabolic process", "biochemical process"],
-        "antonyms": [],
-        "collocations": ["fast metabolism", "slow metabolism", "boost metabolism"],
-        "word_forms": {"noun": "metabolism", "verb": "metabolize", "adjective": "metabolic"},
-        "frequency": "common",
-        "register": "scientific/medical",
-        "common_mistakes": "Often confused with 'metablism' (missing 'o')"
-    }
-}
+from vocabulary_store import VocabularySnapshot
+from vocabulary_export import (
+    get_export_filename,
+    get_export_mime_type,
+    get_export_rows,
+    submit_export,
+    EXPORT_DATASETS,
+    EXPORT_FORMATS,
+    EXPORT_POLL_INTERVAL,
+    EXPORT_WAIT_TIMEOUT
+)
+from audio_widgets import request_audio, show_requested_audio, wait_for_requested_audio
+from learner_profiles import DEFAULT_LEARNER_ID, get_profile
+from progress_writer import LOAD_TIMEOUT
+from vocabulary_index import VocabularyIndex, SEARCH_PAGE_SIZE
+from word_metadata import get_advanced_word_data, get_advanced_difficulty, get_part_of_speech
 
 # Spaced repetition system
 def calculate_next_review_date(word, performance):
@@ -73,21 +40,75 @@ def calculate_next_review_date(word, performance):
     }
     return datetime.now() + timedelta(days=base_intervals.get(performance, 4))
 
-def get_advanced_word_data(word):
-    """Get advanced data for a word"""
-    return ADVANCED_WORD_DATA.get(word.lower(), {
-        "phonetic": "",
-        "difficulty": "⭐⭐",
-        "part_of_speech": "unknown",
-        "etymology": "Etymology not available",
-        "synonyms": [],
-        "antonyms": [],
-        "collocations": [],
-        "word_forms": {},
-        "frequency": "common",
-        "register": "general",
-        "common_mistakes": "None noted"
-    })
+def get_word_index(words):
+    """Get the category, difficulty and part-of-speech index for a list of words"""
+    if isinstance(words, VocabularySnapshot):
+        # Built once per snapshot and shared across sessions
+        return words.get_index(difficulty_of=get_advanced_difficulty, part_of_speech_of=get_part_of_speech)
+    return VocabularyIndex(words, difficulty_of=get_advanced_difficulty, part_of_speech_of=get_part_of_speech)
+
+def use_search_suggestion(word):
+    """Fill the Word Explorer search box with a suggested word"""
+    st.session_state.explorer_search = word
+
+def show_export_download():
+    """Show the download button of a finished export, or a placeholder while it is being written"""
+    job = st.session_state.get('export_job')
+    if job is None:
+        return
+    if not job['future'].done():
+        st.caption("⏳ Preparing export...")
+        job['placeholder'] = True
+        return
+    st.session_state.export_job = None
+    try:
+        export_path = job['future'].result()
+    except Exception as e:
+        print(f"Error exporting data: {e}")
+        export_path = None
+    if not export_path:
+        st.error("❌ Export failed.")
+        return
+    try:
+        # st.download_button keeps the file in memory while it is served
+        with open(export_path, "rb") as f:
+            st.download_button(job['label'], f, job['file_name'], mime=job['mime'])
+    finally:
+        os.remove(export_path)
+
+def wait_for_export():
+    """Wait briefly for an export whose placeholder was shown on this run; True if the app should rerun to check on it"""
+    job = st.session_state.get('export_job')
+    if job is None or not job['placeholder']:
+        return False
+    job['placeholder'] = False
+    try:
+        job['future'].result(timeout=EXPORT_POLL_INTERVAL)
+    except Exception:
+        pass
+    return job['future'].done() or time.monotonic() < job['deadline']
+
+def restore_saved_progress():
+    """Merge the progress loaded in the background into the session once it is ready"""
+    future = st.session_state.get('progress_future')
+    if future is None or not future.done():
+        return False
+    st.session_state.progress_future = None
+    try:
+        saved = future.result()
+    except Exception as e:
+        print(f"Warning: Could not restore saved progress: {e}")
+        return False
+    
+    # Changes made in this session before the restore finished take precedence
+    st.session_state.learning_progress = {**saved['learning_progress'], **st.session_state.learning_progress}
+    st.session_state.favorite_words |= set(saved['favorites'])
+    stats = saved['stats']
+    st.session_state.study_time += stats.get('study_time', 0)
+    if stats.get('last_study_date'):
+        st.session_state.daily_streak = stats.get('daily_streak', 0)
+        st.session_state.last_study_date = date.fromisoformat(stats['last_study_date'])
+    return True
 
 # Configure the app
 st.set_page_config(
@@ -180,7 +201,16 @@ st.info(f"🎯 **Current Level: {current_level}** - {LEVEL_DESCRIPTIONS[current_
 st.sidebar.title("🎓 Expert Navigation")
 
 # Configuration
-word_file = DEFAULT_VOCABULARY_FILE
+# Each learner has their own vocabulary and progress (?learner=<id> in the URL)
+learner_id = st.query_params.get("learner", DEFAULT_LEARNER_ID)
+profile = get_profile(learner_id)
+if profile is None:
+    st.error(f"❌ Invalid learner ID '{learner_id}'. Use up to 64 letters, digits, '.', '_' or '-'.")
+    st.stop()
+st.sidebar.caption(f"👤 Learner: {learner_id}")
+word_file = profile.word_file
+storage = profile.storage
+progress_writer = profile.progress_writer
 category_list = DEFAULT_CATEGORIES
 
 # Initialize session state for advanced features
@@ -194,6 +224,10 @@ if 'last_study_date' not in st.session_state:
     st.session_state.last_study_date = None
 if 'study_time' not in st.session_state:
     st.session_state.study_time = 0
+# Saved progress loads in the background so the first render does not wait for it
+if 'progress_future' not in st.session_state:
+    st.session_state.progress_future = progress_writer.load_async()
+restore_saved_progress()
 
 # Load sample vocabulary button
 col1, col2, col3 = st.columns(3)
@@ -201,14 +235,14 @@ with col1:
     if st.button(f"📚 Load Level {current_level} Vocabulary", help=f"Load 160 words at Level {current_level}"):
         word_pools = load_word_pools(current_level)
         if word_pools:
-            success = save_word_pools_to_file(word_pools, word_file)
+            success = storage.save_word_pools(word_pools, word_file)
             if success:
                 st.success("✅ Loaded 160 words!")
             else:
                 st.error("❌ Loading failed.")
 
 with col2:
-    all_words = load_vocabulary_from_file(word_file)
+    all_words = storage.get_vocabulary(word_file)
     if all_words:
         st.metric("📊 Total Words", len(all_words))
 
@@ -263,8 +297,8 @@ if select == "🎓 Smart Study":
         show_favorites_only = st.checkbox("❤️ Favorites Only")
     
     if selected_category:
-        all_words = load_vocabulary_from_file(word_file)
-        filtered_words = filter_words_by_category(all_words, selected_category)
+        all_words = storage.get_vocabulary(word_file)
+        filtered_words = get_word_index(all_words).select(category=selected_category, difficulties=difficulty_filter)
         
         # Apply advanced filters
         if show_favorites_only:
@@ -305,10 +339,12 @@ if select == "🎓 Smart Study":
                             if entry['word'] in st.session_state.favorite_words:
                                 if st.button("❤️", key=f"unfav_{entry['word']}", help="Remove from favorites"):
                                     st.session_state.favorite_words.discard(entry['word'])
+                                    progress_writer.set_favorite(entry['word'], False)
                                     st.rerun()
                             else:
                                 if st.button("🤍", key=f"fav_{entry['word']}", help="Add to favorites"):
                                     st.session_state.favorite_words.add(entry['word'])
+                                    progress_writer.set_favorite(entry['word'])
                                     st.rerun()
                         
                         # Expandable sections based on study focus
@@ -342,18 +378,12 @@ if select == "🎓 Smart Study":
                         
                         # Audio controls
                         if st.button("🔊 Word", key=f"word_{entry['word']}"):
-                            audio_file = create_audio_file(entry['word'], f"word_{entry['word']}", is_phrase=False, speed=selected_speed)
-                            if audio_file and os.path.exists(audio_file):
-                                with open(audio_file, 'rb') as audio:
-                                    st.audio(audio.read(), format='audio/wav')
-                                cleanup_audio_file(audio_file)
+                            request_audio(f"word_{entry['word']}", entry['word'], is_phrase=False, speed=selected_speed)
+                        show_requested_audio(f"word_{entry['word']}")
                         
                         if st.button("🔊 Example", key=f"phrase_{entry['word']}"):
-                            audio_file = create_audio_file(entry['phrase'], f"phrase_{entry['word']}", is_phrase=True, speed=selected_speed)
-                            if audio_file and os.path.exists(audio_file):
-                                with open(audio_file, 'rb') as audio:
-                                    st.audio(audio.read(), format='audio/wav')
-                                cleanup_audio_file(audio_file)
+                            request_audio(f"phrase_{entry['word']}", entry['phrase'], is_phrase=True, speed=selected_speed)
+                        show_requested_audio(f"phrase_{entry['word']}")
                         
                         # Study progress buttons
                         st.markdown("**How well do you know this word?**")
@@ -361,16 +391,20 @@ if select == "🎓 Smart Study":
                         with progress_cols[0]:
                             if st.button("😰", key=f"again_{entry['word']}", help="Study again"):
                                 st.session_state.learning_progress[entry['word']] = "again"
+                                progress_writer.record_review(entry['word'], "again")
                                 st.success("Marked for review!")
                             if st.button("😊", key=f"good_{entry['word']}", help="Good"):
                                 st.session_state.learning_progress[entry['word']] = "good"
+                                progress_writer.record_review(entry['word'], "good")
                                 st.success("Well done!")
                         with progress_cols[1]:
                             if st.button("😓", key=f"hard_{entry['word']}", help="Hard"):
                                 st.session_state.learning_progress[entry['word']] = "hard"
+                                progress_writer.record_review(entry['word'], "hard")
                                 st.info("Keep practicing!")
                             if st.button("😎", key=f"easy_{entry['word']}", help="Easy"):
                                 st.session_state.learning_progress[entry['word']] = "easy"
+                                progress_writer.record_review(entry['word'], "easy")
                                 st.success("Mastered!")
 
 elif select == "🧠 Memory Palace":
@@ -380,8 +414,8 @@ elif select == "🧠 Memory Palace":
     selected_category = st.selectbox("Choose Category for Memory Palace", category_list)
     
     if selected_category:
-        all_words = load_vocabulary_from_file(word_file)
-        filtered_words = filter_words_by_category(all_words, selected_category)
+        all_words = storage.get_vocabulary(word_file)
+        filtered_words = get_word_index(all_words).category(selected_category)
         
         if filtered_words:
             # Create memory palace with 5 words at a time
@@ -426,11 +460,8 @@ elif select == "🧠 Memory Palace":
                     
                 with col2:
                     if st.button("🔊", key=f"memory_audio_{entry['word']}"):
-                        audio_file = create_audio_file(entry['word'], f"memory_{entry['word']}", is_phrase=False)
-                        if audio_file and os.path.exists(audio_file):
-                            with open(audio_file, 'rb') as audio:
-                                st.audio(audio.read(), format='audio/wav')
-                            cleanup_audio_file(audio_file)
+                        request_audio(f"memory_{entry['word']}", entry['word'], is_phrase=False)
+                    show_requested_audio(f"memory_{entry['word']}")
             
             if st.button("🔄 Generate New Memory Palace"):
                 st.rerun()
@@ -462,8 +493,8 @@ elif select == "🎯 Adaptive Quiz":
             'started': False
         }
     
-    all_words = load_vocabulary_from_file(word_file)
-    quiz_words = filter_words_by_category(all_words, quiz_category)
+    all_words = storage.get_vocabulary(word_file)
+    quiz_words = get_word_index(all_words).category(quiz_category)
     
     if quiz_words and len(quiz_words) >= 4:
         if not st.session_state.adaptive_quiz['started']:
@@ -569,8 +600,8 @@ elif select == "📝 Writing Practice":
         "Creative Writing"
     ])
     
-    all_words = load_vocabulary_from_file(word_file)
-    category_words = filter_words_by_category(all_words, selected_category)
+    all_words = storage.get_vocabulary(word_file)
+    category_words = get_word_index(all_words).category(selected_category)
     
     if category_words:
         # Select 5 random words for practice
@@ -643,15 +674,36 @@ elif select == "🔍 Word Explorer":
     st.info("🕵️ Dive deep into word relationships, patterns, and linguistic connections.")
     
     # Search functionality
-    search_term = st.text_input("🔎 Search for a word:", placeholder="Enter any word...")
+    search_term = st.text_input("🔎 Search for a word:", placeholder="Enter any word...", key="explorer_search")
     
+    # Prefix completions across the level files, vocabulary and learned words
     if search_term:
-        all_words = load_vocabulary_from_file(word_file)
+        completions = storage.get_completer(word_file).complete(search_term, limit=5)
+        completions = [w for w in completions if w.lower() != search_term.strip().lower()]
+        if completions:
+            st.caption("💡 Suggestions:")
+            suggestion_cols = st.columns(len(completions))
+            for i, suggestion in enumerate(completions):
+                with suggestion_cols[i]:
+                    st.button(suggestion, key=f"suggest_{suggestion}", on_click=use_search_suggestion, args=(suggestion,))
+    
+    typo_tolerant = st.checkbox("🔤 Typo-tolerant search", value=True, help="Suggest close spellings when there is no exact match")
+    
+    if search_term:
+        all_words = storage.get_vocabulary(word_file)
+        
+        # Ranked matches from the snapshot's full-text index
+        results = all_words.get_search_index().search(search_term, limit=SEARCH_PAGE_SIZE)
+        exact_matches = [r.entry for r in results if r.field == 'exact']
+        partial_matches = [r.entry for r in results if r.field == 'word']
+        meaning_matches = [r.entry for r in results if r.field == 'meaning']
+        example_matches = [r.entry for r in results if r.field in ('phrase', 'expressions')]
         
-        # Find exact matches and partial matches
-        exact_matches = [w for w in all_words if w['word'].lower() == search_term.lower()]
-        partial_matches = [w for w in all_words if search_term.lower() in w['word'].lower() and w not in exact_matches]
-        meaning_matches = [w for w in all_words if search_term.lower() in w['meaning'].lower() and w not in exact_matches + partial_matches]
+        # Close spellings, e.g. "serendipety" -> "Serendipity"
+        fuzzy_matches = []
+        if typo_tolerant and not exact_matches:
+            found = {id(r.entry) for r in results}
+            fuzzy_matches = [entry for _, entry in all_words.get_fuzzy_index().search(search_term, limit=5) if id(entry) not in found]
         
         if exact_matches:
             st.markdown("### 🎯 Exact Match")
@@ -708,7 +760,7 @@ elif select == "🔍 Word Explorer":
             
             with tabs[3]:  # Related
                 # Find words with similar meanings or from same category
-                same_category = [w for w in all_words if w.get('category') == word.get('category') and w['word'] != word['word']]
+                same_category = [w for w in get_word_index(all_words).category(word.get('category', '')) if w['word'] != word['word']]
                 if same_category:
                     st.write(f"**Other {word.get('category', 'similar').title()} Words:**")
                     related_sample = random.sample(same_category, min(5, len(same_category)))
@@ -725,13 +777,23 @@ elif select == "🔍 Word Explorer":
             for word in meaning_matches[:3]:
                 st.write(f"• **{word['word']}** - {word['meaning'][:80]}...")
         
-        if not (exact_matches or partial_matches or meaning_matches):
+        if example_matches:
+            st.markdown("### 📝 Example Matches")
+            for word in example_matches[:3]:
+                st.write(f"• **{word['word']}** - {word['phrase'][:80]}...")
+        
+        if fuzzy_matches:
+            st.markdown("### 🤔 Did You Mean?")
+            for word in fuzzy_matches[:3]:
+                st.write(f"• **{word['word']}** - {word['meaning'][:80]}...")
+        
+        if not (exact_matches or partial_matches or meaning_matches or example_matches or fuzzy_matches):
             st.info("🤔 No matches found. Try a different search term or add new words to your vocabulary!")
 
 elif select == "📊 Analytics Dashboard":
     st.subheader("📊 Advanced Learning Analytics")
     
-    all_words = load_vocabulary_from_file(word_file)
+    all_words = storage.get_vocabulary(word_file)
     
     if all_words:
         # Overall metrics
@@ -774,19 +836,9 @@ elif select == "📊 Analytics Dashboard":
         # Category breakdown
         st.markdown("### 📊 Vocabulary by Category & Difficulty")
         
-        category_stats = {}
-        difficulty_stats = {"⭐": 0, "⭐⭐": 0, "⭐⭐⭐": 0}
-        
-        for word in all_words:
-            # Category stats
-            cat = word.get('category', 'Unknown').title()
-            category_stats[cat] = category_stats.get(cat, 0) + 1
-            
-            # Difficulty stats
-            word_data = get_advanced_word_data(word['word'])
-            diff = word_data['difficulty']
-            if diff in difficulty_stats:
-                difficulty_stats[diff] += 1
+        word_index = get_word_index(all_words)
+        category_stats = {cat.title(): count for cat, count in word_index.category_counts().items()}
+        difficulty_stats = {diff: len(word_index.difficulty(diff)) for diff in ["⭐", "⭐⭐", "⭐⭐⭐"]}
         
         col1, col2 = st.columns(2)
         
@@ -819,16 +871,36 @@ elif select == "📊 Analytics Dashboard":
         export_cols = st.columns(3)
         
         with export_cols[0]:
-            if st.button("📄 Export Favorites"):
-                favorite_words = [w for w in all_words if w['word'] in st.session_state.favorite_words]
-                if favorite_words:
-                    export_text = "\n".join([f"{w['word']} | {w['meaning']} | {w['phrase']}" for w in favorite_words])
-                    st.download_button("Download Favorites", export_text, "favorites.txt")
-        
+            export_dataset = st.selectbox("Data:", EXPORT_DATASETS, format_func=lambda dataset: dataset.title())
         with export_cols[1]:
-            if st.button("📊 Export Progress"):
-                progress_text = json.dumps(st.session_state.learning_progress, indent=2)
-                st.download_button("Download Progress", progress_text, "progress.json")
+            # Review history has no Anki note layout
+            format_options = [f for f in EXPORT_FORMATS if not (export_dataset == "reviews" and f == "anki")]
+            export_format = st.selectbox("Format:", format_options, format_func=lambda f: f.upper())
+        with export_cols[2]:
+            compress_export = st.checkbox("🗜️ Gzip compress")
+        
+        export_cols = st.columns(3)
+        
+        with export_cols[0]:
+            if st.button("📥 Prepare Export"):
+                if export_dataset == "reviews":
+                    # Include reviews still waiting in the write-behind queue
+                    if not progress_writer.flush():
+                        st.warning("⚠️ Some recent reviews could not be saved yet and are missing from the export.")
+                # Copies, since the export is written on another thread while this session keeps changing
+                rows = get_export_rows(
+                    storage, word_file, export_dataset,
+                    dict(st.session_state.learning_progress), set(st.session_state.favorite_words)
+                )
+                st.session_state.export_job = {
+                    'future': submit_export(rows, export_dataset, export_format, compress_export),
+                    'label': f"Download {export_dataset.title()}",
+                    'file_name': get_export_filename(export_dataset, export_format, compress_export),
+                    'mime': get_export_mime_type(export_format, compress_export),
+                    'placeholder': False,
+                    'deadline': time.monotonic() + EXPORT_WAIT_TIMEOUT
+                }
+            show_export_download()
         
         with export_cols[2]:
             if st.button("🔄 Reset All Data"):
@@ -836,6 +908,8 @@ elif select == "📊 Analytics Dashboard":
                     st.session_state.learning_progress = {}
                     st.session_state.favorite_words = set()
                     st.session_state.daily_streak = 0
+                    st.session_state.progress_future = None
+                    progress_writer.clear()
                     st.success("All data reset!")
 
 elif select == "⚙️ Learning Settings":
@@ -909,13 +983,33 @@ elif select == "⚙️ Learning Settings":
         st.success("✅ Settings saved successfully!")
         st.json(settings)
 
-# Update study streak
-if st.session_state.last_study_date != datetime.now().date():
+# Show saved progress as soon as it has loaded; the page has rendered by now,
+# so a short wait does not hold it up, and a slower load is restored on a later rerun
+if st.session_state.progress_future is not None:
+    try:
+        st.session_state.progress_future.result(timeout=LOAD_TIMEOUT)
+    except Exception:
+        pass
+    if restore_saved_progress():
+        st.rerun()
+
+# Update study streak, counting from the saved streak once it has been restored
+if st.session_state.progress_future is None and st.session_state.last_study_date != datetime.now().date():
     if st.session_state.last_study_date == datetime.now().date() - timedelta(days=1):
         st.session_state.daily_streak += 1
     else:
         st.session_state.daily_streak = 1
     st.session_state.last_study_date = datetime.now().date()
+    progress_writer.update_stats(
+        daily_streak=st.session_state.daily_streak,
+        last_study_date=st.session_state.last_study_date.isoformat(),
+        study_time=st.session_state.study_time
+    )
+
+# Attach audio and exports that were still being prepared when the page rendered,
+# rerunning every moment while they are pending so new clicks are not held up
+if wait_for_requested_audio() or wait_for_export():
+    st.rerun()
 
 # Footer
 st.markdown("---")
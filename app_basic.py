@@ -1,20 +1,17 @@
 import streamlit as st 
-import os
 from main import (
+    WordEntry,
     load_word_pools, 
-    create_audio_file, 
-    load_vocabulary_from_file, 
-    save_word_pools_to_file,
     filter_words_by_category,
     validate_word_entry,
-    cleanup_audio_file,
     DEFAULT_CATEGORIES,
-    DEFAULT_VOCABULARY_FILE,
     DIFFICULTY_LEVELS,
     LEVEL_DESCRIPTIONS,
     SPEED_OPTIONS,
     SPEED_LABELS
 ) 
+from audio_widgets import request_audio, show_requested_audio, wait_for_requested_audio
+from learner_profiles import DEFAULT_LEARNER_ID, get_profile
 
 st.title("My Vocabulary Builder")
 
@@ -48,7 +45,15 @@ st.info(f"🎯 **Current Level: {current_level}** - {LEVEL_DESCRIPTIONS[current_
 st.sidebar.title("Navigation")
 
 # Configuration
-word_file = DEFAULT_VOCABULARY_FILE
+# Each learner has their own vocabulary and progress (?learner=<id> in the URL)
+learner_id = st.query_params.get("learner", DEFAULT_LEARNER_ID)
+profile = get_profile(learner_id)
+if profile is None:
+    st.error(f"❌ Invalid learner ID '{learner_id}'. Use up to 64 letters, digits, '.', '_' or '-'.")
+    st.stop()
+st.sidebar.caption(f"👤 Learner: {learner_id}")
+word_file = profile.word_file
+storage = profile.storage
 category_list = DEFAULT_CATEGORIES
 word_list = []
 
@@ -58,7 +63,7 @@ st.write("Use the sidebar to navigate through different sections.")
 if st.button(f"📚 Load Level {current_level} Vocabulary (160 words)", help=f"Load 20 words for each category at Level {current_level}"):
     word_pools = load_word_pools(current_level)
     if word_pools:
-        success = save_word_pools_to_file(word_pools, word_file)
+        success = storage.save_word_pools(word_pools, word_file)
         if success:
             st.success(f"✅ Successfully loaded Level {current_level} vocabulary with 160 words across all categories!")
             st.info("Navigate to 'View Words' to see the loaded vocabulary.")
@@ -71,6 +76,17 @@ select = st.sidebar.radio("Select Your action", ["Add Word", "View Words"])
 if select == "Add Word":
     st.write("Add a new word to your vocabulary list.")
     word = st.text_input("Enter the word:")
+    
+    # Show existing words starting with the typed text to avoid duplicates
+    if word:
+        # Only the learner's own words count as duplicates, not the level word pools
+        if word in storage.get_completer(word_file, vocabulary_only=True):
+            st.warning(f"'{word}' is already in your vocabulary.")
+        else:
+            suggestions = storage.get_completer(word_file).complete(word, limit=5)
+            if suggestions:
+                st.caption("Existing words: " + ", ".join(suggestions))
+    
     meaning = st.text_area("Enter the meaning:")
     phrase = st.text_input("Enter an example phrase):")
     category = st.radio("Select Category", category_list, horizontal=True)
@@ -83,9 +99,8 @@ if select == "Add Word":
         if is_valid:
             st.success(f"Word '{word}' added successfully!")
             if phrase:
-                # Append to file
-                with open(word_file, "a", encoding='utf-8') as f:
-                    f.write(f"{word} | {meaning} | {phrase} | {category}\n")
+                # Add to the vocabulary storage
+                storage.add_word(word_file, WordEntry(word, meaning, phrase, category))
         else:
             st.error(error_msg)
             
@@ -105,8 +120,8 @@ elif select == "View Words":
     st.subheader(f"Here are the words in your vocabulary list for {selected_category}:")
     
     if selected_category:
-        # Load words from file using main.py function
-        all_words = load_vocabulary_from_file(word_file)
+        # Load words from the shared vocabulary store
+        all_words = storage.get_vocabulary(word_file)
         
         # Filter words by category using main.py function
         filtered_words = filter_words_by_category(all_words, selected_category)
@@ -134,24 +149,18 @@ elif select == "View Words":
                         
                         # Play button for the word
                         if st.button(f"🔊 Word", key=f"word_{entry['word']}"):
-                            audio_file = create_audio_file(entry['word'], f"word_{entry['word']}", is_phrase=False, speed=selected_speed)
-                            if audio_file and os.path.exists(audio_file):
-                                with open(audio_file, 'rb') as audio:
-                                    st.audio(audio.read(), format='audio/wav')
-                                cleanup_audio_file(audio_file)
-                            else:
-                                st.error("Audio generation failed")
+                            request_audio(f"word_{entry['word']}", entry['word'], is_phrase=False, speed=selected_speed)
+                        show_requested_audio(f"word_{entry['word']}")
                         
                         # Play button for the phrase
                         if entry['phrase'] and st.button(f"🔊 Phrase", key=f"phrase_{entry['word']}"):
-                            audio_file = create_audio_file(entry['phrase'], f"phrase_{entry['word']}", is_phrase=True, speed=selected_speed)
-                            if audio_file and os.path.exists(audio_file):
-                                with open(audio_file, 'rb') as audio:
-                                    st.audio(audio.read(), format='audio/wav')
-                                cleanup_audio_file(audio_file)
-                            else:
-                                st.error("Audio generation failed")
+                            request_audio(f"phrase_{entry['word']}", entry['phrase'], is_phrase=True, speed=selected_speed)
+                        show_requested_audio(f"phrase_{entry['word']}")
         else:
             st.info("No words added yet for this category. Go to 'Add Word' to start building your vocabulary.")
     else:
-        st.info("Please select a category to view words.")
\ No newline at end of file
+        st.info("Please select a category to view words.")
+
+# Attach audio that was still being synthesized when the page rendered
+if wait_for_requested_audio():
+    st.rerun()
@@ -0,0 +1,297 @@
+"""
+Disk cache of synthesized audio shared by every session and app process
+Files are named by a hash of everything that changes the sound (text,
+speed, word or phrase, TTS backend and voice), so the same word is only
+synthesized once. Reading a file refreshes its modification time, and when
+the cache grows past its size limit the least recently used files are
+deleted.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from shared_file import atomic_write, file_lock
+
+AUDIO_CACHE_DIR = "audio_cache"
+MAX_AUDIO_CACHE_BYTES = int(os.environ.get("AUDIO_CACHE_MAX_MB", "200")) * 1024 * 1024
+# Evict down to this fraction of the limit so eviction does not run on every new file
+EVICTION_TARGET = 0.9
+# Scratch and temporary files older than this many seconds were left behind
+# by a synthesis or write that never finished, and are removed by evict
+STALE_TEMP_FILE_AGE = 3600
+
+
+def get_audio_key(text, speed, is_phrase, backend, voice):
+    """
+    Get the cache key of a synthesized audio clip
+
+    Args:
+        text (str): Spoken text
+        speed (str): Speed setting - "normal", "0.9", or "0.8"
+        is_phrase (bool): Whether the text is a phrase
+        backend (str): TTS backend ('pyttsx3' or 'gtts')
+        voice (str): Voice ID or language of the backend
+
+    Returns:
+        str: Hex digest identifying the clip
+    """
+    data = json.dumps([text, speed, bool(is_phrase), backend, voice or ""], ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    """
+    Size-capped directory of audio files keyed by get_audio_key
+
+    Files live in <cache_dir>/<first two hex digits>/<key><extension> and
+    are added with an atomic rename, so other processes never see a partial
+    file. Eviction holds a lock on the directory so only one process scans
+    it at a time.
+    """
+
+    def __init__(self, cache_dir=AUDIO_CACHE_DIR, max_bytes=MAX_AUDIO_CACHE_BYTES):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        # Bytes in the cache as far as this process knows (None until scanned)
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, key, extension):
+        return os.path.join(self.cache_dir, key[:2], key + extension)
+
+    def contains(self, file_path):
+        """
+        Check whether a file belongs to the cache (and must not be deleted by callers)
+
+        Args:
+            file_path (str): Path to check
+
+        Returns:
+            bool: True if the file is inside the cache directory
+        """
+        return bool(file_path) and os.path.abspath(file_path).startswith(self.cache_dir + os.sep)
+
+    def create_scratch_file(self, extension):
+        """
+        Create an empty, uniquely named file for a backend that can only write files
+
+        The file is created in the cache directory, so put can rename it into
+        place. put or the caller removes it; eviction only removes it once it
+        is older than STALE_TEMP_FILE_AGE.
+
+        Args:
+            extension (str): File extension such as '.wav'
+
+        Returns:
+            str: Path to the new file (in the temporary directory if the cache is not writable)
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, path = tempfile.mkstemp(prefix=".scratch-", suffix=extension, dir=self.cache_dir)
+        except OSError:
+            fd, path = tempfile.mkstemp(prefix="tts_", suffix=extension)
+        os.close(fd)
+        return path
+
+    def get(self, key, extension):
+        """
+        Get the cached file of a key and mark it as recently used
+
+        Args:
+            key (str): Key from get_audio_key
+            extension (str): File extension such as '.wav' or '.mp3'
+
+        Returns:
+            str or None: Path to the cached file, or None if it is not cached
+        """
+        path = self._path(key, extension)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def read(self, key, extension):
+        """
+        Read the cached audio of a key and mark it as recently used
+
+        Args:
+            key (str): Key from get_audio_key
+            extension (str): File extension such as '.wav' or '.mp3'
+
+        Returns:
+            bytes or None: The audio, or None if it is not cached
+        """
+        path = self.get(key, extension)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            # Evicted by another process in the meantime
+            return None
+
+    def _added(self, size):
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+            needs_eviction = self._size is None or self._size > self.max_bytes
+        if needs_eviction:
+            self.evict()
+
+    def put(self, key, extension, source_path):
+        """
+        Move a freshly synthesized file into the cache
+
+        Args:
+            key (str): Key from get_audio_key
+            extension (str): File extension such as '.wav' or '.mp3'
+            source_path (str): File to move (copied if it is on another file system)
+
+        Returns:
+            str: Path to the cached file, or source_path if it could not be cached
+        """
+        path = self._path(key, extension)
+        try:
+            size = os.path.getsize(source_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.replace(source_path, path)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # The temporary directory is often a separate tmpfs
+                with open(source_path, 'rb') as source, atomic_write(path, 'wb') as f:
+                    shutil.copyfileobj(source, f)
+                os.remove(source_path)
+        except OSError as e:
+            print(f"Warning: Could not cache audio file {source_path}: {e}")
+            return source_path
+        self._added(size)
+        return path
+
+    def put_bytes(self, key, extension, audio):
+        """
+        Store audio synthesized in memory
+
+        Args:
+            key (str): Key from get_audio_key
+            extension (str): File extension such as '.wav' or '.mp3'
+            audio (bytes): Audio data
+
+        Returns:
+            str or None: Path to the cached file, or None if it could not be written
+        """
+        path = self._path(key, extension)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with atomic_write(path, 'wb') as f:
+                f.write(audio)
+        except OSError as e:
+            print(f"Warning: Could not cache audio for {key}: {e}")
+            return None
+        self._added(len(audio))
+        return path
+
+    def _scan(self):
+        """
+        List the cached clips, and the scratch and temporary files that are left over
+
+        Returns:
+            tuple: ([(mtime_ns, size, path)] of cached clips, [paths] of
+            scratch and atomic_write temporary files older than STALE_TEMP_FILE_AGE)
+        """
+        files = []
+        stale = []
+        stale_before = time.time_ns() - STALE_TEMP_FILE_AGE * 1_000_000_000
+        try:
+            entries = list(os.scandir(self.cache_dir))
+        except OSError:
+            return files, stale
+        shards = []
+        for entry in entries:
+            if entry.is_dir():
+                shards.append(entry.path)
+            elif entry.name.startswith(".scratch-"):
+                # pyttsx3 scratch files of jobs that timed out or crashed
+                self._check_stale(entry, stale_before, stale)
+        for shard in shards:
+            for entry in os.scandir(shard):
+                if entry.name.startswith("."):
+                    # An atomic_write in progress; never count or evict it while it is fresh
+                    self._check_stale(entry, stale_before, stale)
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return files, stale
+
+    @staticmethod
+    def _check_stale(entry, stale_before, stale):
+        try:
+            if entry.stat().st_mtime_ns < stale_before:
+                stale.append(entry.path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        Delete the least recently used files until the cache fits its limit
+
+        Leftover scratch and temporary files are removed as well.
+
+        Returns:
+            int: Bytes in the cache afterwards
+        """
+        try:
+            with file_lock(os.path.join(self.cache_dir, "cache")):
+                files, stale = self._scan()
+                for path in stale:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total = sum(size for _, size, _ in files)
+                if total > self.max_bytes:
+                    target = self.max_bytes * EVICTION_TARGET
+                    for _, size, path in sorted(files):
+                        if total <= target:
+                            break
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            continue
+                        total -= size
+        except (OSError, TimeoutError) as e:
+            print(f"Warning: Could not evict audio cache files: {e}")
+            return self._size or 0
+        with self._lock:
+            self._size = total
+        return total
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """
+    Get the process-wide audio cache
+
+    Returns:
+        AudioCache: Cache in AUDIO_CACHE_DIR limited to MAX_AUDIO_CACHE_BYTES
+    """
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+        return _audio_cache
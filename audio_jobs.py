@@ -0,0 +1,74 @@
+"""
+Background queue for speech synthesis requests
+A click on an audio button submits a job and gets a Future back right
+away, so the app can finish rendering the page while pyttsx3 or gTTS is
+working. Requests for a clip that is already being synthesized share the
+running job.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from main import synthesize_audio
+
+# Jobs synthesized at the same time (pyttsx3 requests also queue for the engine pool)
+AUDIO_JOB_WORKERS = 4
+# Seconds a run waits for pending audio before rerunning to check again
+AUDIO_POLL_INTERVAL = 0.5
+# Seconds the page keeps rerunning for pending audio before giving up
+AUDIO_WAIT_TIMEOUT = 30.0
+
+
+class AudioJobs:
+    """Thread pool that runs synthesize_audio and deduplicates identical requests"""
+
+    def __init__(self, max_workers=AUDIO_JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audio-job")
+        # (text, is_phrase, speed) -> Future of the running job
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, text, is_phrase=False, speed="normal"):
+        """
+        Queue a clip for synthesis
+
+        Args:
+            text (str): Text to convert to speech
+            is_phrase (bool): Whether the text is a phrase (affects speech rate)
+            speed (str): Speed setting - "normal", "0.9", or "0.8"
+
+        Returns:
+            Future: Resolves to (audio bytes, MIME type), or (None, None) if synthesis failed
+        """
+        key = (text, is_phrase, speed)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(synthesize_audio, text, is_phrase, speed)
+            self._pending[key] = future
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+
+_audio_jobs = None
+_audio_jobs_lock = threading.Lock()
+
+
+def get_audio_jobs():
+    """
+    Get the process-wide audio job queue shared by every session
+
+    Returns:
+        AudioJobs: Shared queue
+    """
+    global _audio_jobs
+    with _audio_jobs_lock:
+        if _audio_jobs is None:
+            _audio_jobs = AudioJobs()
+        return _audio_jobs
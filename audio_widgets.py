@@ -0,0 +1,86 @@
+"""
+Streamlit helpers for playing synthesized audio, shared by the apps
+A button calls request_audio, which queues the clip on the background
+audio jobs, and show_requested_audio right below it shows the player, or a
+placeholder while the clip is being synthesized. At the end of the script,
+wait_for_requested_audio waits briefly for a clip whose placeholder was
+shown and tells the app to rerun, either to attach the clip or to check on
+it again, so the script never holds up new clicks for long.
+
+    if st.button("🔊 Pronounce", key=key):
+        request_audio(key, word)
+    show_requested_audio(key)
+    ...
+    if wait_for_requested_audio():
+        st.rerun()
+"""
+
+import time
+
+import streamlit as st
+
+from audio_jobs import get_audio_jobs, AUDIO_POLL_INTERVAL, AUDIO_WAIT_TIMEOUT
+
+
+def request_audio(key, text, is_phrase=False, speed="normal"):
+    """
+    Start synthesizing a clip in the background
+
+    Only the latest request of a session is kept, so a new click replaces
+    the clip shown under another key.
+
+    Args:
+        key (str): Widget key the clip belongs to
+        text (str): Text to convert to speech
+        is_phrase (bool): Whether the text is a phrase (affects speech rate)
+        speed (str): Speed setting - "normal", "0.9", or "0.8"
+    """
+    future = get_audio_jobs().submit(text, is_phrase=is_phrase, speed=speed)
+    st.session_state.audio_request = {
+        'key': key, 'future': future, 'audio': None, 'format': None, 'placeholder': False,
+        'deadline': time.monotonic() + AUDIO_WAIT_TIMEOUT
+    }
+
+
+def show_requested_audio(key):
+    """
+    Show the clip requested under key, or a placeholder while it is being synthesized
+
+    Args:
+        key (str): Widget key passed to request_audio
+    """
+    request = st.session_state.get('audio_request')
+    if request is None or request['key'] != key:
+        return
+    if request['audio'] is None:
+        if not request['future'].done():
+            st.caption("⏳ Preparing audio...")
+            request['placeholder'] = True
+            return
+        audio, audio_format = request['future'].result()
+        if audio is None:
+            st.session_state.audio_request = None
+            st.error("Audio generation failed")
+            return
+        request['audio'], request['format'] = audio, audio_format
+    st.audio(request['audio'], format=request['format'])
+
+
+def wait_for_requested_audio():
+    """
+    Wait briefly for a clip whose placeholder was shown on this run
+
+    Returns:
+        bool: True if the app should rerun, to show the clip if it is ready
+        or to check on it again until AUDIO_WAIT_TIMEOUT has passed
+    """
+    request = st.session_state.get('audio_request')
+    # Only rerun for a card that is on the page, or switching pages would rerun forever
+    if request is None or not request['placeholder']:
+        return False
+    request['placeholder'] = False
+    try:
+        request['future'].result(timeout=AUDIO_POLL_INTERVAL)
+    except Exception:
+        pass
+    return request['future'].done() or time.monotonic() < request['deadline']
@@ -0,0 +1,328 @@
+"""
+Consistency checker for the word records of the vocabulary JSON files
+The level files, word_pools.json, word_pools_with_media.json, learned.json
+and image_generation_prompts.json repeat the same word records. This module
+builds an in-memory, content-addressed view of them: each unique record is
+stored once, keyed by a hash of its content, and every source file becomes
+a manifest of hashes plus the fields that belong to that file only (media
+paths, learned dates, image prompts). Files that hold the same records then
+have equal hash lists, so consistency checks compare hashes instead of
+whole entries.
+
+The JSON files stay the only source of truth and the apps do not read this
+store: the level files the apps load share no records with each other, so
+interning them at runtime would not save memory.
+
+    python entry_store.py                 # report duplicated files and drifted records
+    python entry_store.py --save          # also write the store to compiled/entry_store.json
+    python entry_store.py --materialize level1.json
+"""
+
+import hashlib
+import json
+import os
+
+from shared_file import atomic_write
+
+ENTRY_STORE_FILE = os.path.join("compiled", "entry_store.json")
+WORD_POOL_FILES = ["level1.json", "level2.json", "level3.json", "word_pools.json", "word_pools_with_media.json"]
+LEARNED_FILE = "learned.json"
+MEDIA_PROMPTS_FILE = "image_generation_prompts.json"
+
+# Fields that make up a word record; everything else stays in the manifest
+RECORD_FIELDS = ('word', 'meaning', 'phrase', 'category', 'expressions')
+
+
+def split_record(word_data, category=None):
+    """
+    Split word data into its shared record and its file-specific fields
+
+    Args:
+        word_data (dict): Word data from any of the source files
+        category (str): Category to use when word_data has none
+
+    Returns:
+        tuple: (record dict with RECORD_FIELDS, dict of the remaining fields)
+    """
+    record = {
+        'word': word_data.get('word', ''),
+        'meaning': word_data.get('meaning', ''),
+        'phrase': word_data.get('phrase') or "",
+        'category': (category or word_data.get('category') or "general").strip().lower()
+    }
+    if word_data.get('expressions'):
+        record['expressions'] = list(word_data['expressions'])
+    extra = {key: value for key, value in word_data.items() if key not in RECORD_FIELDS}
+    return record, extra
+
+
+def get_entry_hash(record):
+    """
+    Get the content hash of a word record
+
+    Args:
+        record (dict): Record from split_record
+
+    Returns:
+        str: 16 hex digits of the SHA-1 of the record's canonical JSON
+    """
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+class EntryStore:
+    """
+    Unique word records keyed by hash, with one manifest per source file
+
+    Word pool manifests map each category to a list of references; learned
+    and media manifests are lists of references. A reference is a dict with
+    the record's 'entry' hash and the file-specific fields of that entry.
+    """
+
+    def __init__(self, entries=None, manifests=None):
+        self.entries = entries or {}
+        self.manifests = manifests or {}
+
+    def put(self, word_data, category=None):
+        """
+        Store the record of an entry once and get a reference to it
+
+        Args:
+            word_data (dict): Word data from a source file
+            category (str): Category to use when word_data has none
+
+        Returns:
+            dict: Reference with the 'entry' hash and file-specific fields
+        """
+        record, extra = split_record(word_data, category)
+        entry_hash = get_entry_hash(record)
+        self.entries.setdefault(entry_hash, record)
+        return dict(extra, entry=entry_hash)
+
+    def get(self, reference):
+        """
+        Rebuild the word data of a reference
+
+        Args:
+            reference (dict): Reference from put()
+
+        Returns:
+            dict: Record fields merged with the reference's own fields
+        """
+        word_data = dict(self.entries[reference['entry']])
+        word_data.update((key, value) for key, value in reference.items() if key != 'entry')
+        return word_data
+
+    # Adding source files
+
+    def add_word_pools(self, source_path, word_pools):
+        """Add a category -> words file such as level1.json"""
+        self.manifests[source_path] = {
+            'type': 'word_pools',
+            'categories': {
+                category: [self.put(word_data, category) for word_data in words]
+                for category, words in word_pools.items()
+            }
+        }
+
+    def add_entry_list(self, source_path, entry_type, word_list):
+        """Add a list of entries such as learned.json ('learned') or the image prompts ('media')"""
+        self.manifests[source_path] = {
+            'type': entry_type,
+            'entries': [self.put(word_data) for word_data in word_list]
+        }
+
+    # Reading source files back
+
+    def get_hashes(self, source_path):
+        """
+        Get the record hashes of a source file in file order
+
+        Args:
+            source_path (str): Source file name
+
+        Returns:
+            list: Entry hashes (empty if the file is not in the store)
+        """
+        manifest = self.manifests.get(source_path)
+        if manifest is None:
+            return []
+        if manifest['type'] == 'word_pools':
+            return [ref['entry'] for refs in manifest['categories'].values() for ref in refs]
+        return [ref['entry'] for ref in manifest['entries']]
+
+    def materialize(self, source_path):
+        """
+        Rebuild the contents of a source file from the store
+
+        Word pool entries come back without their 'category' field, as in
+        the original files.
+
+        Args:
+            source_path (str): Source file name
+
+        Returns:
+            dict or list or None: File contents, or None if the file is not in the store
+        """
+        manifest = self.manifests.get(source_path)
+        if manifest is None:
+            return None
+        if manifest['type'] != 'word_pools':
+            return [self.get(ref) for ref in manifest['entries']]
+
+        word_pools = {}
+        for category, refs in manifest['categories'].items():
+            words = word_pools[category] = []
+            for ref in refs:
+                word_data = self.get(ref)
+                del word_data['category']
+                words.append(word_data)
+        return word_pools
+
+    # Persistence
+
+    def save(self, file_path=ENTRY_STORE_FILE):
+        """
+        Write the store to a JSON file
+
+        Args:
+            file_path (str): Path to the store file
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            directory = os.path.dirname(file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with atomic_write(file_path) as f:
+                json.dump({'entries': self.entries, 'manifests': self.manifests}, f, ensure_ascii=False)
+            return True
+        except OSError as e:
+            print(f"Error saving {file_path}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, file_path=ENTRY_STORE_FILE):
+        """
+        Read a store written by save()
+
+        Args:
+            file_path (str): Path to the store file
+
+        Returns:
+            EntryStore or None: The store, or None if the file is missing or invalid
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError) as e:
+            print(f"Error loading {file_path}: {e}")
+            return None
+        return cls(data.get('entries'), data.get('manifests'))
+
+
+def build_entry_store(word_pool_files=WORD_POOL_FILES, learned_file=LEARNED_FILE,
+                      media_prompts_file=MEDIA_PROMPTS_FILE):
+    """
+    Build an entry store from the vocabulary JSON files that exist
+
+    Args:
+        word_pool_files (list): Category -> words files
+        learned_file (str): Learned words file
+        media_prompts_file (str): Image generation prompts file
+
+    Returns:
+        EntryStore: Store with a manifest for every file that could be read
+    """
+    store = EntryStore()
+    sources = [(path, 'word_pools') for path in word_pool_files]
+    sources += [(learned_file, 'learned'), (media_prompts_file, 'media')]
+
+    for source_path, entry_type in sources:
+        try:
+            with open(source_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            continue
+        except json.JSONDecodeError as e:
+            print(f"Error: Skipping {source_path}: {e}")
+            continue
+        if entry_type == 'word_pools':
+            store.add_word_pools(source_path, data)
+        else:
+            store.add_entry_list(source_path, entry_type, data)
+    return store
+
+
+def check_consistency(store):
+    """
+    Compare the source files of a store by their record hashes
+
+    Args:
+        store (EntryStore): Store to check
+
+    Returns:
+        dict: 'duplicate_files' (groups of files with identical records),
+        'drifted' ((source, word) pairs whose learned or media record no
+        longer matches the word pool record of the same word) and
+        'reference_count' (hashes referenced) vs 'unique_entries'
+    """
+    # Files with the same hash list hold the same records
+    files_by_hashes = {}
+    for source_path in store.manifests:
+        files_by_hashes.setdefault(tuple(store.get_hashes(source_path)), []).append(source_path)
+    duplicate_files = [paths for hashes, paths in files_by_hashes.items() if hashes and len(paths) > 1]
+
+    # Hashes of every word pool record, grouped by lowercase word
+    pool_hashes = {}
+    for source_path, manifest in store.manifests.items():
+        if manifest['type'] == 'word_pools':
+            for entry_hash in store.get_hashes(source_path):
+                pool_hashes.setdefault(store.entries[entry_hash]['word'].lower(), set()).add(entry_hash)
+
+    drifted = []
+    for source_path, manifest in store.manifests.items():
+        if manifest['type'] == 'word_pools':
+            continue
+        for entry_hash in store.get_hashes(source_path):
+            word = store.entries[entry_hash]['word']
+            known = pool_hashes.get(word.lower())
+            if known and entry_hash not in known:
+                drifted.append((source_path, word))
+
+    return {
+        'duplicate_files': duplicate_files,
+        'drifted': drifted,
+        'reference_count': sum(len(store.get_hashes(path)) for path in store.manifests),
+        'unique_entries': len(store.entries)
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check the vocabulary JSON files for duplicated and drifted word records')
+    parser.add_argument('--save', action='store_true', help='Also write the deduplicated store to --output')
+    parser.add_argument('--output', default=ENTRY_STORE_FILE, help='Store file written by --save')
+    parser.add_argument('--materialize', metavar='SOURCE', help='Print a source file rebuilt from the store')
+
+    args = parser.parse_args()
+
+    store = build_entry_store()
+    if args.materialize:
+        contents = store.materialize(args.materialize)
+        if contents is None:
+            print(f"Error: {args.materialize} could not be read")
+        else:
+            print(json.dumps(contents, indent=2, ensure_ascii=False))
+    else:
+        if args.save and store.save(args.output):
+            print(f"Stored {len(store.entries)} unique records for {len(store.manifests)} files in {args.output}")
+
+        report = check_consistency(store)
+        print(f"{report['reference_count']} references, {report['unique_entries']} unique records")
+        for paths in report['duplicate_files']:
+            print(f"Identical records: {', '.join(paths)}")
+        for source_path, word in report['drifted']:
+            print(f"Drifted from the word pools: '{word}' in {source_path}")
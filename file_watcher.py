@@ -0,0 +1,263 @@
+"""
+Change notifications for the vocabulary files
+Every app process runs one watcher thread that subscribes to kernel file
+notifications (inotify on Linux) for the directories of the files it has
+cached, or polls their modification times where inotify is not available.
+Writers in this process also publish a change when they release a file's
+lock, so caches learn about local writes without waiting for the kernel.
+Subscribers such as the vocabulary store can then trust their cached data
+until a change is published instead of checking the file on every read.
+
+Set VOCABULARY_WATCHER to 'inotify', 'poll' or 'off' to override the
+default ('auto': inotify if available, else polling).
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import threading
+import time
+
+WATCHER_MODE = os.environ.get("VOCABULARY_WATCHER", "auto")
+# Seconds between checks when polling
+POLL_INTERVAL = 1.0
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# wd, mask, cookie, name length
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class _Inotify:
+    """Minimal ctypes binding of the Linux inotify API"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or "libc.so.6", use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+        return wd
+
+    def read_events(self):
+        """Block until events arrive and return them as (wd, mask, name) tuples"""
+        data = os.read(self.fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+
+class FileWatcher:
+    """
+    Publishes the absolute paths of watched files when they change
+
+    Callbacks run on the watcher thread (or on the writing thread for
+    changes published by this process) and must not block.
+    """
+
+    def __init__(self, mode=WATCHER_MODE, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        # absolute path -> last seen signature (used when polling)
+        self._paths = {}
+        # inotify watch descriptor -> watched directory
+        self._directories = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+        self._inotify = None
+        if mode in ("auto", "inotify"):
+            try:
+                self._inotify = _Inotify()
+            except OSError as e:
+                if mode == "inotify":
+                    print(f"Warning: {e}, polling for file changes instead")
+        self.mode = "inotify" if self._inotify is not None else "poll"
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def subscribe(self, callback):
+        """
+        Call callback(path) with the absolute path of every changed file
+
+        Args:
+            callback (callable): Function taking the changed file's path
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Stop calling a callback registered with subscribe()
+
+        Args:
+            callback (callable): Previously subscribed function
+        """
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def watch(self, path):
+        """
+        Start publishing changes of a file
+
+        Args:
+            path (str): File to watch (it does not need to exist yet)
+
+        Returns:
+            bool: True if changes of the file will be published
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._paths:
+                return True
+            if self._inotify is not None:
+                directory = os.path.dirname(path)
+                if directory not in self._directories.values():
+                    try:
+                        self._directories[self._inotify.add_watch(directory)] = directory
+                    except OSError as e:
+                        print(f"Warning: {e}")
+                        return False
+            self._paths[path] = _signature(path)
+            return True
+
+    def publish(self, path):
+        """
+        Tell every subscriber that a file changed
+
+        Args:
+            path (str): Changed file (ignored if it is not watched)
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self._paths:
+                return
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(path)
+            except Exception as e:
+                print(f"Error handling change of {path}: {e}")
+
+    def _run(self):
+        if self._inotify is not None:
+            self._run_inotify()
+        self._run_polling()
+
+    def _run_inotify(self):
+        """Publish inotify events until reading them fails, then return so polling takes over"""
+        while True:
+            try:
+                events = self._inotify.read_events()
+            except OSError as e:
+                print(f"Error reading file notifications: {e}, polling for file changes instead")
+                self._fall_back_to_polling()
+                return
+            changed = set()
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped, so anything may have changed
+                    with self._lock:
+                        changed.update(self._paths)
+                elif name:
+                    directory = self._directories.get(wd)
+                    if directory is not None:
+                        changed.add(os.path.join(directory, name))
+            for path in changed:
+                self.publish(path)
+
+    def _fall_back_to_polling(self):
+        """Switch to polling after inotify failed, treating every watched file as changed"""
+        with self._lock:
+            try:
+                os.close(self._inotify.fd)
+            except OSError:
+                pass
+            self._inotify = None
+            self._directories = {}
+            self.mode = "poll"
+            # Signatures were not kept up to date while inotify was in use
+            for path in self._paths:
+                self._paths[path] = _signature(path)
+            paths = list(self._paths)
+        # Changes may have been missed before the failure
+        for path in paths:
+            self.publish(path)
+
+    def _run_polling(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                paths = list(self._paths.items())
+            for path, last_signature in paths:
+                signature = _signature(path)
+                if signature != last_signature:
+                    with self._lock:
+                        self._paths[path] = signature
+                    self.publish(path)
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_file_watcher():
+    """
+    Get the process-wide file watcher, starting it on first use
+
+    Returns:
+        FileWatcher or None: The watcher, or None if VOCABULARY_WATCHER is 'off'
+    """
+    global _watcher
+    if WATCHER_MODE == "off":
+        return None
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = FileWatcher()
+        return _watcher
+
+
+def publish_change(path):
+    """
+    Publish a change made by this process to the watcher's subscribers
+
+    Does nothing until the watcher has been started.
+
+    Args:
+        path (str): Changed file
+    """
+    watcher = _watcher
+    if watcher is not None:
+        watcher.publish(path)
@@ -0,0 +1,280 @@
+"""
+Keyed in-memory store for learned.json
+Keeps the learned words in a dict keyed by the lowercase word, so adding,
+removing and checking a word are O(1), and writes learned.json in batches a
+moment after the last change instead of rewriting it on every click.
+learned.json is registered with the process's file watcher, so reads only
+check the file again after a change has been published.
+"""
+
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+
+from file_watcher import get_file_watcher
+from main import WordEntry
+from shared_file import atomic_write, file_lock
+from vocabulary_store import vocabulary_store
+
+# Seconds to wait after a change before writing learned.json
+FLUSH_DELAY = 1.0
+# Seconds before a failed write is retried
+FLUSH_RETRY_DELAY = 5.0
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class LearnedWords:
+    """
+    Learned words of one learned.json file
+
+    Changes apply to the in-memory map immediately and are recorded as
+    pending. A timer writes all pending changes at once after FLUSH_DELAY.
+    When another process changed learned.json in the meantime, the file is
+    re-read and the pending changes are applied on top before writing.
+    """
+
+    def __init__(self, learned_file, flush_delay=FLUSH_DELAY):
+        self.learned_file = learned_file
+        self.flush_delay = flush_delay
+        # lowercase word -> WordEntry, in the order the words were learned
+        self._words = {}
+        # lowercase word -> WordEntry to add, or None to remove
+        self._pending = {}
+        self._signature = None
+        self._loaded = False
+        self._revision = 0
+        self._timer = None
+        self._lock = threading.RLock()
+        self._path = os.path.abspath(learned_file)
+        # Whether the file watcher publishes changes of learned.json, and
+        # whether one was published since the file was last checked
+        self._watcher = None
+        self._stale = False
+
+    def _read_file(self):
+        words = {}
+        try:
+            with open(self.learned_file, 'r', encoding='utf-8') as f:
+                learned_words = json.load(f)
+        except FileNotFoundError:
+            return words
+        except json.JSONDecodeError as e:
+            print(f"Error loading {self.learned_file}: {e}")
+            return words
+        for word_entry in learned_words:
+            entry = WordEntry.from_dict(word_entry)
+            words.setdefault(entry.word.lower(), entry)
+        return words
+
+    def _file_changed(self, path):
+        # Runs on the watcher thread or right after a writer's lock, so it only marks the file
+        if path == self._path:
+            self._stale = True
+
+    def _watch(self):
+        watcher = get_file_watcher()
+        if watcher is None:
+            return
+        watcher.subscribe(self._file_changed)
+        if watcher.watch(self._path):
+            self._watcher = watcher
+        else:
+            watcher.unsubscribe(self._file_changed)
+
+    def unwatch(self):
+        """Stop listening for changes of learned.json"""
+        with self._lock:
+            if self._watcher is not None:
+                self._watcher.unsubscribe(self._file_changed)
+                self._watcher = None
+
+    def _refresh(self, force=False):
+        """
+        Re-read learned.json if it changed on disk and re-apply pending changes
+
+        While the file is watched it is only checked after a published
+        change, unless force is set.
+        """
+        if not self._loaded:
+            self._watch()
+        elif self._watcher is not None and not self._stale and not force:
+            return
+        # Clear the mark before checking, so a change published meanwhile marks it again
+        self._stale = False
+        signature = _signature(self.learned_file)
+        if self._loaded and signature == self._signature:
+            return
+        words = self._read_file()
+        for key, entry in self._pending.items():
+            if entry is None:
+                words.pop(key, None)
+            else:
+                words.setdefault(key, entry)
+        self._words = words
+        self._signature = signature
+        self._loaded = True
+        self._revision += 1
+
+    def _changed(self, key, entry):
+        self._pending[key] = entry
+        self._revision += 1
+        if self._timer is None:
+            self._schedule_flush(self.flush_delay)
+
+    def _schedule_flush(self, delay):
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def __contains__(self, word):
+        with self._lock:
+            self._refresh()
+            return word.strip().lower() in self._words
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._words)
+
+    def entries(self):
+        """
+        Get the learned words
+
+        Returns:
+            VocabularySnapshot: Immutable tuple of WordEntry objects, shared
+            until the learned words change
+        """
+        with self._lock:
+            self._refresh()
+            words = self._words
+            return vocabulary_store.get_records(
+                f"{self.learned_file}#learned_words",
+                (id(self), self._revision),
+                lambda key: list(words.values())
+            )
+
+    def add(self, word_entry, learned_date=None):
+        """
+        Add a word unless it was already learned
+
+        Args:
+            word_entry (dict or WordEntry): Word data
+            learned_date (str): ISO timestamp (defaults to now)
+
+        Returns:
+            bool: True if the word was added, False if it already existed
+        """
+        key = word_entry['word'].strip().lower()
+        with self._lock:
+            self._refresh()
+            if key in self._words:
+                return False
+            data = dict(word_entry.copy(), learned_date=learned_date or datetime.now().isoformat())
+            entry = WordEntry.from_dict(data)
+            self._words[key] = entry
+            self._changed(key, entry)
+            return True
+
+    def remove(self, word):
+        """
+        Remove a learned word
+
+        Args:
+            word (str): Word to remove (case-insensitive)
+
+        Returns:
+            bool: True if the word was found and removed, False otherwise
+        """
+        key = word.strip().lower()
+        with self._lock:
+            self._refresh()
+            if key not in self._words:
+                return False
+            del self._words[key]
+            self._changed(key, None)
+            return True
+
+    def flush(self):
+        """
+        Write pending changes to learned.json now
+
+        Returns:
+            bool: True if successful or nothing was pending, False otherwise
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return True
+            try:
+                with file_lock(self.learned_file):
+                    # Pick up words other processes saved since we last read the file
+                    self._refresh(force=True)
+                    with atomic_write(self.learned_file) as f:
+                        json.dump([entry.copy() for entry in self._words.values()], f, ensure_ascii=False, indent=2)
+                    self._signature = _signature(self.learned_file)
+            except OSError as e:
+                print(f"Error saving {self.learned_file}: {e}")
+                # Try again later instead of waiting for the next change
+                self._schedule_flush(FLUSH_RETRY_DELAY)
+                return False
+            self._pending.clear()
+            return True
+
+
+_learned_words = {}
+_learned_words_lock = threading.Lock()
+
+
+def get_learned_words(learned_file="learned.json"):
+    """
+    Get the process-wide LearnedWords for a learned words file
+
+    Pending changes are flushed when the process exits.
+
+    Args:
+        learned_file (str): Path to the learned words file
+
+    Returns:
+        LearnedWords: Shared instance for the file
+    """
+    with _learned_words_lock:
+        learned_words = _learned_words.get(learned_file)
+        if learned_words is None:
+            learned_words = LearnedWords(learned_file)
+            _learned_words[learned_file] = learned_words
+        return learned_words
+
+
+def release_learned_words(learned_file):
+    """
+    Flush and forget the shared LearnedWords of a file
+
+    Args:
+        learned_file (str): Path to the learned words file
+    """
+    with _learned_words_lock:
+        learned_words = _learned_words.pop(learned_file, None)
+    if learned_words is not None:
+        learned_words.unwatch()
+        learned_words.flush()
+
+
+def _flush_all():
+    with _learned_words_lock:
+        learned_words_list = list(_learned_words.values())
+    for learned_words in learned_words_list:
+        learned_words.flush()
+
+
+atexit.register(_flush_all)
@@ -0,0 +1,246 @@
+"""
+Per-learner profiles for shared deployments
+Each learner gets their own vocabulary, learned words and progress, stored
+under profiles/<shard>/<learner id>/ with the same file names the apps use
+for a single learner. The shard is derived from a hash of the learner ID, so
+no directory holds more than a fraction of the learners. Profiles are
+opened on first use and only the most recently used ones are kept in the
+cache, so nothing is loaded for learners who are not active. A profile that
+drops out of the cache is closed once no session uses it any more.
+
+The default learner keeps using vocabulary.txt, learned.json, progress.json
+and vocabulary.db in the project directory.
+"""
+
+import atexit
+import hashlib
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+from main import (
+    DEFAULT_DATABASE_FILE,
+    DEFAULT_LEARNED_FILE,
+    DEFAULT_PROGRESS_FILE,
+    DEFAULT_VOCABULARY_FILE
+)
+from progress_writer import ProgressWriter
+from vocabulary_storage import create_storage, get_storage
+
+PROFILES_DIR = "profiles"
+DEFAULT_LEARNER_ID = "default"
+# Number of learner profiles kept open in memory
+MAX_CACHED_PROFILES = 64
+
+_LEARNER_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+def is_valid_learner_id(learner_id):
+    """
+    Check that a learner ID is safe to use as a directory name
+
+    Args:
+        learner_id (str): Learner ID
+
+    Returns:
+        bool: True for 1-64 letters, digits, '.', '_' or '-' not starting with a symbol
+    """
+    return bool(learner_id) and _LEARNER_ID_PATTERN.match(learner_id) is not None
+
+
+def get_profile_dir(learner_id):
+    """
+    Get the directory of a learner's profile
+
+    Args:
+        learner_id (str): Learner ID
+
+    Returns:
+        str: profiles/<two hex digits of the ID's hash>/<learner id>
+    """
+    shard = hashlib.sha1(learner_id.encode('utf-8')).hexdigest()[:2]
+    return os.path.join(PROFILES_DIR, shard, learner_id)
+
+
+def iter_learner_ids():
+    """
+    List the learners that have a profile directory
+
+    Returns:
+        iterator: Learner IDs found under PROFILES_DIR, not including the default learner
+    """
+    try:
+        shards = sorted(os.listdir(PROFILES_DIR))
+    except FileNotFoundError:
+        return
+    for shard in shards:
+        shard_dir = os.path.join(PROFILES_DIR, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for learner_id in sorted(os.listdir(shard_dir)):
+            if is_valid_learner_id(learner_id) and os.path.isdir(os.path.join(shard_dir, learner_id)):
+                yield learner_id
+
+
+def get_learner_paths(learner_id):
+    """
+    Get the storage paths of a learner
+
+    Args:
+        learner_id (str): Learner ID
+
+    Returns:
+        dict: db_path, word_file, learned_file and progress_file, as accepted by create_storage
+    """
+    if learner_id == DEFAULT_LEARNER_ID:
+        directory = ""
+    else:
+        directory = get_profile_dir(learner_id)
+    return {
+        'db_path': os.path.join(directory, DEFAULT_DATABASE_FILE),
+        'word_file': os.path.join(directory, DEFAULT_VOCABULARY_FILE),
+        'learned_file': os.path.join(directory, DEFAULT_LEARNED_FILE),
+        'progress_file': os.path.join(directory, DEFAULT_PROGRESS_FILE)
+    }
+
+
+def _close_resources(resources, lock):
+    """Save pending progress and release a profile's storage; runs at most once per profile"""
+    with lock:
+        if resources['progress_writer'] is not None:
+            resources['progress_writer'].close()
+        if resources['storage'] is not None:
+            resources['storage'].close()
+
+
+class LearnerProfile:
+    """
+    Storage and progress writer of one learner
+
+    The profile is closed by close() or, at the latest, when it is garbage
+    collected, so sessions can keep using a profile that was dropped from
+    the cache.
+
+    Attributes:
+        learner_id (str): Learner ID
+        word_file (str): Path of the learner's vocabulary file
+        storage (FileStorage or SQLiteStorage): The learner's storage backend
+    """
+
+    def __init__(self, learner_id):
+        self.learner_id = learner_id
+        self._lock = threading.Lock()
+
+        if learner_id == DEFAULT_LEARNER_ID:
+            self.word_file = DEFAULT_VOCABULARY_FILE
+            self.storage = get_storage()
+            # The default storage is shared by the whole process and never closed
+            owned_storage = None
+        else:
+            os.makedirs(get_profile_dir(learner_id), exist_ok=True)
+            paths = get_learner_paths(learner_id)
+            self.word_file = paths['word_file']
+            self.storage = owned_storage = create_storage(**paths)
+
+        # Kept apart from the profile so the finalizer does not keep it alive
+        self._resources = {'storage': owned_storage, 'progress_writer': None}
+        self._finalizer = weakref.finalize(self, _close_resources, self._resources, self._lock)
+
+    @property
+    def progress_writer(self):
+        """ProgressWriter saving this learner's study progress, created on first use"""
+        with self._lock:
+            if self._resources['progress_writer'] is None:
+                self._resources['progress_writer'] = ProgressWriter(self.storage)
+            return self._resources['progress_writer']
+
+    def close(self):
+        """Save pending progress and release the learner's cached data"""
+        self._finalizer()
+
+
+class ProfileCache:
+    """
+    LRU cache of open learner profiles
+
+    The default learner's profile is always kept. Other profiles are dropped
+    from the cache when more than max_profiles of them are open, but sessions
+    that still hold a dropped profile keep using it, and get() hands it out
+    again instead of opening the same files twice. A dropped profile is
+    closed once the last session lets go of it.
+    """
+
+    def __init__(self, max_profiles=MAX_CACHED_PROFILES):
+        self.max_profiles = max_profiles
+        self._default = None
+        self._profiles = OrderedDict()
+        # Dropped profiles that some session still references
+        self._evicted = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, learner_id=DEFAULT_LEARNER_ID):
+        """
+        Get a learner's profile, opening it if needed
+
+        Args:
+            learner_id (str): Learner ID
+
+        Returns:
+            LearnerProfile or None: The profile, or None if the ID is not valid
+        """
+        if not is_valid_learner_id(learner_id):
+            print(f"Warning: Invalid learner ID '{learner_id}'")
+            return None
+
+        evicted = []
+        with self._lock:
+            if learner_id == DEFAULT_LEARNER_ID:
+                if self._default is None:
+                    self._default = LearnerProfile(learner_id)
+                return self._default
+
+            profile = self._profiles.get(learner_id)
+            if profile is not None:
+                self._profiles.move_to_end(learner_id)
+                return profile
+
+            profile = self._evicted.pop(learner_id, None) or LearnerProfile(learner_id)
+            self._profiles[learner_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                old_id, old_profile = self._profiles.popitem(last=False)
+                self._evicted[old_id] = old_profile
+                evicted.append(old_profile)
+
+        # Drop the last references outside the lock, so a profile no session
+        # uses is closed without blocking other learners while its writes are saved
+        del evicted
+        return profile
+
+    def close_all(self):
+        """Save pending progress of every open profile"""
+        with self._lock:
+            profiles = list(self._profiles.values()) + list(self._evicted.values())
+            if self._default is not None:
+                profiles.append(self._default)
+        for profile in profiles:
+            profile.close()
+
+
+# Shared by every session in this process
+learner_profiles = ProfileCache()
+atexit.register(learner_profiles.close_all)
+
+
+def get_profile(learner_id=DEFAULT_LEARNER_ID):
+    """
+    Get a learner's profile from the process-wide cache
+
+    Args:
+        learner_id (str): Learner ID
+
+    Returns:
+        LearnerProfile or None: The profile, or None if the ID is not valid
+    """
+    return learner_profiles.get(learner_id)
@@ -3,18 +3,127 @@ Main utility functions for vocabulary builder applications
 Contains reusable functions that can be used across different apps
 """
 
-import pyttsx3
 from gtts import gTTS
 import io
 import tempfile
 import os
-import json
+import sys
+import re
+
+from audio_cache import get_audio_cache, get_audio_key
+from shared_file import atomic_write, file_lock
+from tts_engine import get_tts_pool
+from vocabulary_snapshot import load_entries, word_pools_from_rows
+
+
+class WordEntry:
+    """
+    Compact, immutable record for one vocabulary word
+    
+    Uses __slots__ instead of a per-entry dict and interns the lowercase
+    category so thousands of entries share one string per category.
+    Supports read-only dict-style access (entry['word'], entry.get('phrase'))
+    so it can be passed anywhere a word dictionary was expected.
+    """
+    
+    __slots__ = ('word', 'meaning', 'phrase', 'category', 'expressions', 'learned_date', 'difficulty', 'phonetic')
+    
+    def __init__(self, word, meaning, phrase="", category="general", expressions=None, learned_date=None,
+                 difficulty=None, phonetic=None):
+        set_field = object.__setattr__
+        set_field(self, 'word', word)
+        set_field(self, 'meaning', meaning)
+        set_field(self, 'phrase', phrase or "")
+        set_field(self, 'category', sys.intern((category or "general").lower()))
+        set_field(self, 'expressions', tuple(expressions) if expressions else None)
+        set_field(self, 'learned_date', learned_date or None)
+        # Precomputed by the snapshot compiler for level words (see vocabulary_snapshot.py)
+        set_field(self, 'difficulty', difficulty or None)
+        set_field(self, 'phonetic', phonetic or None)
+    
+    @classmethod
+    def from_dict(cls, data, category=None):
+        """
+        Build an entry from a word dictionary
+        
+        Args:
+            data (dict): Word data with 'word', 'meaning' and optional fields
+            category (str): Category to use when data has none
+            
+        Returns:
+            WordEntry: The new entry (data itself if it already is one)
+        """
+        if isinstance(data, cls) and category is None:
+            return data
+        return cls(
+            data.get('word', ''),
+            data.get('meaning', ''),
+            data.get('phrase', ''),
+            category or data.get('category', 'general'),
+            data.get('expressions'),
+            data.get('learned_date'),
+            data.get('difficulty'),
+            data.get('phonetic')
+        )
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("WordEntry is immutable")
+    
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+    
+    def get(self, key, default=None):
+        """Return a field value like dict.get, or default if it is not set"""
+        if key not in self.__slots__:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+    
+    def keys(self):
+        """Return the names of the fields that are set"""
+        return [key for key in self.__slots__ if getattr(self, key) is not None]
+    
+    def copy(self):
+        """Return the entry as a new, mutable dict"""
+        data = {key: getattr(self, key) for key in self.keys()}
+        if 'expressions' in data:
+            data['expressions'] = list(data['expressions'])
+        return data
+    
+    def _fields(self):
+        return tuple(getattr(self, key) for key in self.__slots__)
+    
+    def __eq__(self, other):
+        if not isinstance(other, WordEntry):
+            return NotImplemented
+        return self._fields() == other._fields()
+    
+    def __hash__(self):
+        return hash(self._fields())
+    
+    def __reduce__(self):
+        return (WordEntry, self._fields())
+    
+    def __repr__(self):
+        return f"WordEntry({self.word!r}, category={self.category!r})"
 
 
 def load_word_pools(level=1):
     """
     Load word pools from a level-specific JSON file
     
+    Uses the compiled snapshot of the file when it is up to date
+    (see vocabulary_snapshot.py) and falls back to decoding the JSON.
+    Categories are normalized to lowercase either way.
+    
     Args:
         level (int): Difficulty level (1, 2, or 3)
         
@@ -22,146 +131,304 @@ def load_word_pools(level=1):
         dict: Dictionary containing word pools for each category
     """
     json_file = f"level{level}.json"
-    try:
-        with open(json_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"Error: {json_file} not found")
-        # Fallback to word_pools.json if level file doesn't exist
-        try:
-            with open("word_pools.json", 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
+    rows = load_entries(json_file)
+    if rows is None:
+        print(f"Error: {json_file} not found or invalid")
+        # Fallback to word_pools.json if level file can't be read
+        rows = load_entries("word_pools.json")
+        if rows is None:
             print("Error: No vocabulary files found")
             return {}
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON format in {json_file}")
-        return {}
+    return word_pools_from_rows(rows)
 
 
-def create_audio_file(text, filename, is_phrase=False, speed="normal"):
+def _use_slow_speech(is_phrase, speed):
+    """Whether gTTS speaks slowly (it only has slow/normal)"""
+    return speed in ["0.9", "0.8"] or is_phrase
+
+
+def _get_gtts_audio_key(text, is_phrase, speed):
+    """Get the cache key of a gTTS clip, which only depends on the slow flag"""
+    return get_audio_key(text, "slow" if _use_slow_speech(is_phrase, speed) else "normal", False, "gtts", "en")
+
+
+def get_audio_cache_key(text, is_phrase=False, speed="normal"):
     """
-    Create audio file for text-to-speech with American English voice (cloud-compatible)
+    Get the audio cache key of a clip for the TTS backend in use
+    
+    Different settings can share a key, e.g. every slow gTTS clip of a text.
     
     Args:
         text (str): Text to convert to speech
-        filename (str): Name for the temporary audio file
-        is_phrase (bool): Whether the text is a phrase (affects speech rate)
+        is_phrase (bool): Whether the text is a phrase
         speed (str): Speed setting - "normal", "0.9", or "0.8"
         
     Returns:
-        str or None: Path to the created audio file, or None if failed
+        tuple: (key, file extension)
     """
-    # Try pyttsx3 first (for local development)
     try:
-        engine = pyttsx3.init()
-        
-        # Get available voices
-        voices = engine.getProperty('voices')
-        
-        # Try to find an American English voice
-        american_voice = None
-        for voice in voices:
-            # Look for American English voices (common identifiers)
-            if voice.id and any(identifier in voice.id.lower() for identifier in ['david', 'mark', 'zira', 'hazel', 'us', 'american', 'en-us']):
-                american_voice = voice.id
-                break
-            # Fallback: look for any English voice
-            elif voice.id and 'en' in voice.id.lower():
-                american_voice = voice.id
-        
-        # Set the American English voice if found
-        if american_voice:
-            engine.setProperty('voice', american_voice)
-        
-        # Base speech rates
-        base_word_rate = 160
-        base_phrase_rate = 140
-        
-        # Apply speed multiplier
-        speed_multipliers = {
-            "normal": 1.0,
-            "0.9": 0.9,
-            "0.8": 0.8
-        }
-        
-        multiplier = speed_multipliers.get(speed, 1.0)
+        pool = get_tts_pool()
+        if pool.available:
+            return get_audio_key(text, speed, is_phrase, "pyttsx3", pool.voice_id), ".wav"
+    except Exception:
+        pass
+    return _get_gtts_audio_key(text, is_phrase, speed), ".mp3"
+
+
+def get_cached_audio_file(text, is_phrase=False, speed="normal"):
+    """
+    Get the cached audio create_audio_file would return, without synthesizing
+    
+    Also finds a gTTS clip cached when pyttsx3 is installed but failed for
+    this text, since synthesize_audio falls back to the same gTTS clip.
+    
+    Args:
+        text (str): Text to convert to speech
+        is_phrase (bool): Whether the text is a phrase
+        speed (str): Speed setting - "normal", "0.9", or "0.8"
         
-        # Adjust settings for phrases vs single words with speed options
-        if is_phrase:
-            final_rate = int(base_phrase_rate * multiplier)
-        else:
-            final_rate = int(base_word_rate * multiplier)
+    Returns:
+        str or None: Path to the cached audio file, or None if it is not cached yet
+    """
+    audio_cache = get_audio_cache()
+    cached_file = audio_cache.get(*get_audio_cache_key(text, is_phrase, speed))
+    if cached_file is None:
+        cached_file = audio_cache.get(_get_gtts_audio_key(text, is_phrase, speed), ".mp3")
+    return cached_file
+
+
+def _get_speech_rate(is_phrase, speed):
+    """Get the pyttsx3 speech rate in words per minute"""
+    # Base speech rates
+    base_word_rate = 160
+    base_phrase_rate = 140
+    
+    # Apply speed multiplier
+    speed_multipliers = {
+        "normal": 1.0,
+        "0.9": 0.9,
+        "0.8": 0.8
+    }
+    
+    multiplier = speed_multipliers.get(speed, 1.0)
+    
+    # Adjust settings for phrases vs single words with speed options
+    if is_phrase:
+        return int(base_phrase_rate * multiplier)
+    return int(base_word_rate * multiplier)
+
+
+def _create_scratch_file(filename, extension):
+    """Create an empty, uniquely named temporary file so concurrent sessions never share a path"""
+    prefix = re.sub(r'[^\w-]', '_', filename)[:40] + "_"
+    fd, scratch_file = tempfile.mkstemp(prefix=prefix, suffix=extension)
+    os.close(fd)
+    return scratch_file
+
+
+def synthesize_audio(text, is_phrase=False, speed="normal"):
+    """
+    Synthesize speech into memory with American English voice (cloud-compatible)
+    
+    Audio is kept in the shared on-disk cache (see audio_cache.py), so the
+    same text at the same speed is synthesized only once. gTTS renders
+    straight into a memory buffer; pyttsx3 can only write files, so it
+    renders into a uniquely named scratch file in the cache directory that
+    is then renamed into place.
+    
+    Args:
+        text (str): Text to convert to speech
+        is_phrase (bool): Whether the text is a phrase (affects speech rate)
+        speed (str): Speed setting - "normal", "0.9", or "0.8"
         
-        engine.setProperty('rate', final_rate)
-        engine.setProperty('volume', 0.9)
+    Returns:
+        tuple: (audio bytes, MIME type), or (None, None) if failed
+    """
+    audio, audio_format, _ = _synthesize_cached(text, is_phrase, speed)
+    return audio, audio_format
+
+
+def _synthesize_cached(text, is_phrase, speed):
+    """Synthesize or read a clip; returns (audio, MIME type, (cache key, extension) of the engine that produced it)"""
+    audio_cache = get_audio_cache()
+    
+    # Try pyttsx3 first (for local development)
+    try:
+        # Engines and the American English voice are set up once per process
+        pool = get_tts_pool()
+        if not pool.available:
+            raise RuntimeError("No pyttsx3 engine is available")
         
-        # Create temporary file path
-        temp_file = os.path.join(tempfile.gettempdir(), f"{filename}.wav")
-        engine.save_to_file(text, temp_file)
-        engine.runAndWait()
-        return temp_file
+        cache_key = get_audio_key(text, speed, is_phrase, "pyttsx3", pool.voice_id)
+        audio = audio_cache.read(cache_key, ".wav")
+        if audio is None:
+            scratch_file = audio_cache.create_scratch_file(".wav")
+            try:
+                pool.save_to_file(text, scratch_file, _get_speech_rate(is_phrase, speed))
+                with open(scratch_file, 'rb') as f:
+                    audio = f.read()
+                if not audio:
+                    raise RuntimeError("pyttsx3 wrote an empty file")
+                audio_cache.put(cache_key, ".wav", scratch_file)
+            finally:
+                # Left behind only if synthesis or caching failed
+                if os.path.exists(scratch_file):
+                    os.remove(scratch_file)
+        return audio, 'audio/wav', (cache_key, ".wav")
         
     except Exception as e:
         print(f"pyttsx3 failed ({e}), trying gTTS for cloud compatibility...")
         
         # Fall back to gTTS (for cloud deployment)
         try:
-            # Adjust speed for gTTS (it only has slow/normal)
-            use_slow_speech = speed in ["0.9", "0.8"] or is_phrase
-            
-            # Create TTS object
-            tts = gTTS(text=text, lang='en', slow=use_slow_speech)
-            
-            # Create temporary file path (MP3 format for gTTS)
-            temp_file = os.path.join(tempfile.gettempdir(), f"{filename}.mp3")
-            tts.save(temp_file)
-            
-            print(f"Created audio file using gTTS: {temp_file}")
-            return temp_file
+            cache_key = _get_gtts_audio_key(text, is_phrase, speed)
+            audio = audio_cache.read(cache_key, ".mp3")
+            if audio is None:
+                # Render the MP3 into memory
+                buffer = io.BytesIO()
+                gTTS(text=text, lang='en', slow=_use_slow_speech(is_phrase, speed)).write_to_fp(buffer)
+                audio = buffer.getvalue()
+                audio_cache.put_bytes(cache_key, ".mp3", audio)
+            return audio, 'audio/mp3', (cache_key, ".mp3")
             
         except Exception as e2:
             print(f"All TTS methods failed: pyttsx3({e}), gTTS({e2})")
-            return None
+            return None, None, None
 
 
-def load_vocabulary_from_file(file_path):
+def create_audio_file(text, filename, is_phrase=False, speed="normal"):
     """
-    Load vocabulary words from a text file
+    Create audio file for text-to-speech with American English voice (cloud-compatible)
+    
+    Prefer synthesize_audio when the audio is only played back. This returns
+    the cached file, or a uniquely named temporary file if the clip could
+    not be cached. Pass the result to cleanup_audio_file when done; cached
+    files are left in place.
     
     Args:
-        file_path (str): Path to the vocabulary file
+        text (str): Text to convert to speech
+        filename (str): Prefix for the temporary audio file
+        is_phrase (bool): Whether the text is a phrase (affects speech rate)
+        speed (str): Speed setting - "normal", "0.9", or "0.8"
         
     Returns:
-        list: List of dictionaries containing word data
+        str or None: Path to the created audio file, or None if failed
     """
-    word_list = []
+    audio, audio_format, cache_entry = _synthesize_cached(text, is_phrase, speed)
+    if audio is None:
+        return None
+    
+    # Look up the clip under the key of the engine that actually produced it
+    cached_file = get_audio_cache().get(*cache_entry)
+    if cached_file:
+        return cached_file
+    
+    try:
+        temp_file = _create_scratch_file(filename, ".mp3" if audio_format == 'audio/mp3' else ".wav")
+        with open(temp_file, 'wb') as f:
+            f.write(audio)
+        return temp_file
+    except OSError as e:
+        print(f"Error writing audio file: {e}")
+        return None
+
+
+def iter_vocabulary_from_file(file_path, category=None, limit=None):
+    """
+    Lazily yield vocabulary words from a text file
+    
+    Reads one line at a time, so memory use stays constant regardless of
+    the file size, and stops reading as soon as `limit` words were found.
+    
+    Args:
+        file_path (str): Path to the vocabulary file
+        category (str): Only yield words in this category (optional)
+        limit (int): Stop after yielding this many words (optional)
+        
+    Yields:
+        WordEntry: One entry per valid line
+    """
+    if limit is not None and limit <= 0:
+        return
+    if category is not None:
+        category = category.lower()
+    
+    count = 0
     try:
         with open(file_path, "r", encoding='utf-8') as f:
-            lines = f.readlines()
-            for line in lines:
+            for line in f:
                 if line.strip():  # Skip empty lines
                     parts = line.strip().split(" | ")
                     if len(parts) >= 4:
-                        word_details = {
-                            "word": parts[0],
-                            "meaning": parts[1],
-                            "phrase": parts[2],
-                            "category": parts[3]
-                        }
-                        word_list.append(word_details)
+                        if category is not None and parts[3].lower() != category:
+                            continue
+                        yield WordEntry(parts[0], parts[1], parts[2], parts[3])
+                        count += 1
+                        if count == limit:
+                            return
     except FileNotFoundError:
         print(f"Error: {file_path} not found")
     except Exception as e:
         print(f"Error loading vocabulary: {e}")
+
+
+def load_vocabulary_from_file(file_path):
+    """
+    Load vocabulary words from a text file
+    
+    Args:
+        file_path (str): Path to the vocabulary file
+        
+    Returns:
+        list: List of WordEntry objects
+    """
+    return list(iter_vocabulary_from_file(file_path))
+
+
+def get_vocabulary_log_path(file_path):
+    """
+    Get the path of the change log kept next to a vocabulary file
     
-    return word_list
+    Args:
+        file_path (str): Path to the vocabulary file
+        
+    Returns:
+        str: Path to the append-only log (see vocabulary_log.py)
+    """
+    return f"{file_path}.log"
+
+
+def write_vocabulary_file(word_list, file_path):
+    """
+    Atomically write words to a vocabulary file
+    
+    The words are written to a temporary file that replaces the target in
+    one step, so readers and crashes never see a half-written file. Callers
+    that also change other files should hold file_lock(file_path).
+    
+    Args:
+        word_list (list): WordEntry objects or word dictionaries
+        file_path (str): Path to the vocabulary file
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        with atomic_write(file_path) as f:
+            for word_data in word_list:
+                f.write(f"{word_data['word']} | {word_data['meaning']} | {word_data['phrase']} | {word_data['category']}\n")
+        return True
+    except Exception as e:
+        print(f"Error writing vocabulary file: {e}")
+        return False
 
 
 def save_word_pools_to_file(word_pools, file_path):
     """
     Save word pools to vocabulary file
     
+    Replaces the whole vocabulary, so any pending change log is discarded.
+    
     Args:
         word_pools (dict): Dictionary containing word pools
         file_path (str): Path to save the vocabulary file
@@ -169,12 +436,17 @@ def save_word_pools_to_file(word_pools, file_path):
     Returns:
         bool: True if successful, False otherwise
     """
+    word_list = []
+    for category, words in word_pools.items():
+        for word_data in words:
+            word_list.append(dict(word_data, category=category))
+    
     try:
-        with open(file_path, "w", encoding='utf-8') as f:
-            for category, words in word_pools.items():
-                for word_data in words:
-                    f.write(f"{word_data['word']} | {word_data['meaning']} | {word_data['phrase']} | {category}\n")
-        return True
+        with file_lock(file_path):
+            log_path = get_vocabulary_log_path(file_path)
+            if os.path.exists(log_path):
+                os.remove(log_path)
+            return write_vocabulary_file(word_list, file_path)
     except Exception as e:
         print(f"Error saving word pools: {e}")
         return False
@@ -185,13 +457,18 @@ def filter_words_by_category(word_list, category):
     Filter words by category
     
     Args:
-        word_list (list): List of word dictionaries
+        word_list (list): List of WordEntry objects or word dictionaries
         category (str): Category to filter by
         
     Returns:
         list: Filtered list of words matching the category
     """
-    return [word for word in word_list if word.get('category', '').lower() == category.lower()]
+    category = category.lower()
+    # WordEntry categories are already lowercase
+    return [
+        word for word in word_list
+        if (word.category if isinstance(word, WordEntry) else word.get('category', '').lower()) == category
+    ]
 
 
 def get_category_statistics(word_list):
@@ -199,7 +476,7 @@ def get_category_statistics(word_list):
     Get statistics about words in each category
     
     Args:
-        word_list (list): List of word dictionaries
+        word_list (list): List of WordEntry objects or word dictionaries
         
     Returns:
         dict: Dictionary with category names as keys and word counts as values
@@ -242,13 +519,40 @@ def validate_word_entry(word, meaning, phrase="", category="general"):
     return True, ""
 
 
+def validate_word_entries(word_entries):
+    """
+    Validate a batch of word entries with validate_word_entry
+    
+    Args:
+        word_entries (list): Word dictionaries or WordEntry objects
+        
+    Returns:
+        tuple: (valid_entries, errors) where errors is a list of
+        (position in word_entries, error_message)
+    """
+    valid_entries = []
+    errors = []
+    for position, word_data in enumerate(word_entries):
+        is_valid, error_msg = validate_word_entry(
+            word_data.get('word'), word_data.get('meaning'), word_data.get('phrase', ''), word_data.get('category', 'general')
+        )
+        if is_valid:
+            valid_entries.append(word_data)
+        else:
+            errors.append((position, error_msg))
+    return valid_entries, errors
+
+
 def cleanup_audio_file(file_path):
     """
-    Clean up temporary audio file
+    Clean up temporary audio file (files in the audio cache are kept)
     
     Args:
         file_path (str): Path to the audio file to delete
     """
+    # Cached audio is shared with other sessions and evicted by the cache
+    if get_audio_cache().contains(file_path):
+        return
     try:
         if file_path and os.path.exists(file_path):
             os.remove(file_path)
@@ -260,6 +564,11 @@ def cleanup_audio_file(file_path):
 DEFAULT_CATEGORIES = ["General", "Science", "Business", "Literature", "Travel", "History", "Geography", "Health"]
 DEFAULT_VOCABULARY_FILE = "vocabulary.txt"
 DEFAULT_WORD_POOLS_FILE = "word_pools.json"
+DEFAULT_LEARNED_FILE = "learned.json"
+DEFAULT_PROGRESS_FILE = "progress.json"
+DEFAULT_DATABASE_FILE = "vocabulary.db"
+# "sqlite" or "file", see vocabulary_storage.py
+STORAGE_BACKEND = os.environ.get("VOCABULARY_STORAGE", "sqlite")
 DIFFICULTY_LEVELS = [1, 2, 3]
 LEVEL_DESCRIPTIONS = {
     1: "Beginner - Basic vocabulary with common everyday words",
@@ -0,0 +1,204 @@
+"""
+Pre-render pronunciation audio into the shared audio cache
+Synthesizes every word, example phrase and expression of the level files,
+word_pools.json and the learned words of every learner at every speed in
+SPEED_OPTIONS, spread over a pool of worker processes. Clips that are already cached are skipped,
+so an interrupted run resumes where it stopped and later runs only render
+new words. A manifest of the rendered clips is kept next to the cache.
+
+    python prerender_audio.py
+    python prerender_audio.py --workers 4 --files level1.json --skip-learned
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from audio_cache import AUDIO_CACHE_DIR, get_audio_cache
+from learner_profiles import DEFAULT_LEARNER_ID, get_learner_paths, iter_learner_ids
+from main import cleanup_audio_file, create_audio_file, get_audio_cache_key, get_cached_audio_file, SPEED_OPTIONS
+from shared_file import atomic_write
+from vocabulary_snapshot import ENTRY_FIELDS, load_entries
+from vocabulary_storage import create_storage
+
+SOURCE_FILES = ["level1.json", "level2.json", "level3.json", "word_pools.json"]
+MANIFEST_FILE = os.path.join(AUDIO_CACHE_DIR, "manifest.json")
+# Save the manifest after this many new clips
+MANIFEST_SAVE_INTERVAL = 100
+
+
+def _iter_source_entries(source_path):
+    """Yield word dictionaries from a level or word pools file"""
+    rows = load_entries(source_path)
+    if rows is None:
+        print(f"Skipping {source_path} (not found)")
+        return
+    for row in rows:
+        yield dict(zip(ENTRY_FIELDS, row))
+
+
+def _iter_learned_entries():
+    """Yield the learned words of the default learner and of every learner profile"""
+    for learner_id in [DEFAULT_LEARNER_ID, *iter_learner_ids()]:
+        # Opened read-only and closed again, so nothing is created for the
+        # learner and only one learner's data is loaded at a time
+        try:
+            storage = create_storage(read_only=True, **get_learner_paths(learner_id))
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: Could not open the storage of learner {learner_id}: {e}")
+            continue
+        try:
+            yield from storage.get_learned()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: Could not read the learned words of learner {learner_id}: {e}")
+        finally:
+            storage.close()
+
+
+def collect_clips(source_files=SOURCE_FILES, speeds=SPEED_OPTIONS, include_learned=True):
+    """
+    List every clip the apps can play for the given files
+
+    Args:
+        source_files (list): Level and word pools files
+        speeds (list): Speed settings to render
+        include_learned (bool): Also list the learned words of every learner,
+            read through the storage backend
+
+    Returns:
+        list: Unique (text, is_phrase, speed) tuples
+    """
+    sources = [_iter_source_entries(source_path) for source_path in source_files]
+    if include_learned:
+        sources.append(_iter_learned_entries())
+
+    texts = {}
+    for entries in sources:
+        for word_data in entries:
+            if word_data.get('word'):
+                texts.setdefault((word_data['word'], False), None)
+            if word_data.get('phrase'):
+                texts.setdefault((word_data['phrase'], True), None)
+            for expression in word_data.get('expressions') or ():
+                texts.setdefault((expression, True), None)
+    return [(text, is_phrase, speed) for text, is_phrase in texts for speed in speeds]
+
+
+def load_manifest(manifest_path=MANIFEST_FILE):
+    """
+    Load the manifest of pre-rendered clips, dropping clips that were evicted
+
+    Args:
+        manifest_path (str): Path to the manifest
+
+    Returns:
+        dict: Cached file path -> {'text', 'is_phrase', 'speed'}
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            clips = json.load(f).get('clips', {})
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Warning: Ignoring invalid manifest {manifest_path}: {e}")
+        return {}
+    return {path: clip for path, clip in clips.items() if os.path.exists(path)}
+
+
+def save_manifest(clips, manifest_path=MANIFEST_FILE):
+    """Write the manifest of pre-rendered clips"""
+    try:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with atomic_write(manifest_path) as f:
+            json.dump({'clips': clips}, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"Error saving {manifest_path}: {e}")
+
+
+def _render_clip(clip):
+    text, is_phrase, speed = clip
+    return clip, create_audio_file(text, "prerender", is_phrase=is_phrase, speed=speed)
+
+
+def prerender(source_files=SOURCE_FILES, workers=None, manifest_path=MANIFEST_FILE, include_learned=True):
+    """
+    Render every missing clip into the audio cache
+
+    Args:
+        source_files (list): Level and word pools files
+        workers (int): Worker processes (defaults to the number of CPUs)
+        manifest_path (str): Path to the manifest
+        include_learned (bool): Also render the learned words of every learner
+
+    Returns:
+        dict: Counts of 'total', 'cached', 'duplicate' (sharing the audio of
+        another clip, such as every slow gTTS clip of a text), 'rendered'
+        and 'failed' clips
+    """
+    clips = collect_clips(source_files, include_learned=include_learned)
+    manifest = load_manifest(manifest_path)
+    stats = {'total': len(clips), 'cached': 0, 'duplicate': 0, 'rendered': 0, 'failed': 0}
+
+    missing = []
+    missing_keys = set()
+    for clip in clips:
+        cached_file = get_cached_audio_file(*clip)
+        if cached_file:
+            stats['cached'] += 1
+            manifest.setdefault(os.path.relpath(cached_file), {'text': clip[0], 'is_phrase': clip[1], 'speed': clip[2]})
+            continue
+        cache_key = get_audio_cache_key(*clip)
+        if cache_key in missing_keys:
+            stats['duplicate'] += 1
+            continue
+        missing_keys.add(cache_key)
+        missing.append(clip)
+    print(f"{stats['total']} clips, {stats['cached']} already cached, {stats['duplicate']} duplicates, "
+          f"{len(missing)} to render")
+
+    # Workers start their own TTS engines, so they must not inherit this process's threads
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            for (text, is_phrase, speed), audio_file in executor.map(_render_clip, missing, chunksize=16):
+                if audio_file is None or not get_audio_cache().contains(audio_file):
+                    # A temporary file means the clip could not be cached
+                    cleanup_audio_file(audio_file)
+                    stats['failed'] += 1
+                    continue
+                stats['rendered'] += 1
+                manifest[os.path.relpath(audio_file)] = {'text': text, 'is_phrase': is_phrase, 'speed': speed}
+                if stats['rendered'] % MANIFEST_SAVE_INTERVAL == 0:
+                    save_manifest(manifest, manifest_path)
+                    print(f"{stats['rendered']} of {len(missing)} clips rendered")
+    finally:
+        save_manifest(manifest, manifest_path)
+
+    total_bytes = sum(os.path.getsize(path) for path in manifest if os.path.exists(path))
+    if total_bytes > get_audio_cache().max_bytes:
+        print(f"Warning: Pre-rendered audio ({total_bytes // (1024 * 1024)} MB) exceeds the cache limit; "
+              f"raise AUDIO_CACHE_MAX_MB or older clips will be evicted")
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pre-render pronunciation audio into the audio cache')
+    parser.add_argument('--files', nargs='+', default=SOURCE_FILES, help='Level or word pools files')
+    parser.add_argument('--skip-learned', action='store_true', help="Do not render the learners' learned words")
+    parser.add_argument('--workers', type=int, help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--list', action='store_true', help='Only count the clips that are not cached yet')
+
+    args = parser.parse_args()
+
+    if args.list:
+        all_clips = collect_clips(args.files, include_learned=not args.skip_learned)
+        missing_keys = {get_audio_cache_key(*clip) for clip in all_clips if not get_cached_audio_file(*clip)}
+        print(f"{len(all_clips)} clips, {len(missing_keys)} audio files not cached")
+    else:
+        result = prerender(args.files, args.workers, include_learned=not args.skip_learned)
+        print(f"Done: {result['rendered']} rendered, {result['cached']} already cached, "
+              f"{result['duplicate']} duplicates, {result['failed']} failed")
@@ -0,0 +1,172 @@
+"""
+Write-behind persistence for study progress
+The Expert app changes ratings, favorites and streaks in
+st.session_state on every click. Instead of writing each change while the
+page renders, changes are queued as events and a background thread saves
+them to the storage backend in batches. Saved progress is loaded in the
+background too, so the first render never waits for storage.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+# Collect events for up to this many seconds before saving a batch
+FLUSH_INTERVAL = 2.0
+MAX_BATCH_SIZE = 500
+# Seconds before a batch that failed to save is retried, doubled after every failure
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+# Unsaved events kept for retrying; the oldest are dropped beyond this
+MAX_RETRY_EVENTS = 10000
+# Seconds a rendered page waits for load_async; a slower load is picked up on the next rerun
+LOAD_TIMEOUT = 2.0
+
+# Queued by close() to stop the background thread
+_STOP = object()
+
+
+class ProgressWriter:
+    """
+    Queue of progress events saved to storage by a background thread
+
+    Events are dicts with a 'type' of 'review', 'favorite', 'stats' or
+    'clear' (see apply_progress in vocabulary_storage.py). A batch that
+    fails to save is retried after RETRY_DELAY, backing off up to
+    MAX_RETRY_DELAY, or sooner together with the next batch.
+    """
+
+    def __init__(self, storage, flush_interval=FLUSH_INTERVAL):
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._retry = []
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _enqueue(self, event):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put(event)
+
+    def _next_batch(self, timeout=None):
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while batch[-1] is not None and batch[-1] is not _STOP and len(batch) < MAX_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        retry_delay = RETRY_DELAY
+        while True:
+            # Wake up to retry unsaved events even if nothing new is queued
+            batch = self._next_batch(retry_delay if self._retry else None)
+            events = self._retry + [event for event in batch if event is not None and event is not _STOP]
+            try:
+                saved = not events or self.storage.apply_progress(events)
+            except Exception as e:
+                print(f"Error saving progress: {e}")
+                saved = False
+            if saved:
+                self._retry = []
+                retry_delay = RETRY_DELAY
+            else:
+                if len(events) > MAX_RETRY_EVENTS:
+                    print(f"Warning: Dropping {len(events) - MAX_RETRY_EVENTS} unsaved progress events")
+                    events = events[-MAX_RETRY_EVENTS:]
+                self._retry = events
+                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+            for _ in batch:
+                self._queue.task_done()
+            if batch and batch[-1] is _STOP:
+                return
+
+    def _report_unsaved(self, outcome):
+        if self._retry:
+            print(f"Warning: {len(self._retry)} progress events {outcome}")
+            return False
+        return True
+
+    # Events
+
+    def record_review(self, word, rating):
+        """Queue a self-assessment ('again', 'hard', 'good' or 'easy') of a word"""
+        self._enqueue({'type': 'review', 'word': word, 'rating': rating, 'at': datetime.now().isoformat()})
+
+    def set_favorite(self, word, favorite=True):
+        """Queue adding a word to or removing it from the favorites"""
+        self._enqueue({'type': 'favorite', 'word': word, 'favorite': favorite, 'at': datetime.now().isoformat()})
+
+    def update_stats(self, **stats):
+        """Queue new values for study statistics such as daily_streak or study_time"""
+        self._enqueue({'type': 'stats', 'stats': stats})
+
+    def clear(self):
+        """Queue deleting all saved progress"""
+        self._enqueue({'type': 'clear'})
+
+    def flush(self):
+        """
+        Block until the background thread has tried to save every queued event
+
+        Returns:
+            bool: True if every event is saved, False if some failed and are
+            waiting to be retried
+        """
+        if self._thread is not None and self._thread.is_alive():
+            # None makes the thread save its batch without waiting for the flush interval
+            self._queue.put(None)
+            self._queue.join()
+        return self._report_unsaved("are not saved yet and will be retried")
+
+    def close(self):
+        """
+        Save every queued event and stop the background thread
+
+        Returns:
+            bool: True if every event is saved, False if some could not be
+            saved (they are reported and discarded)
+        """
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(_STOP)
+                self._queue.join()
+                self._thread.join()
+            self._thread = None
+            saved = self._report_unsaved("could not be saved and are discarded")
+            self._retry = []
+            return saved
+
+    # Loading
+
+    def load_async(self):
+        """
+        Start loading the saved progress in the background
+
+        Returns:
+            Future: Resolves to the dict returned by storage.get_progress()
+        """
+        future = Future()
+
+        def load():
+            try:
+                future.set_result(self.storage.get_progress())
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=load, daemon=True).start()
+        return future
+
@@ -0,0 +1,135 @@
+"""
+Safe file sharing between app processes
+app.py and launcher.py run each app as its own Streamlit process, and all of
+them use the same vocabulary and learned-words files. Writers serialize on an
+advisory lock kept in a <file>.lock sidecar and publish new contents with an
+atomic replace, so readers never need a lock: they always open either the old
+or the new complete file.
+"""
+
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+from file_watcher import publish_change
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Give up waiting for another process after this many seconds
+LOCK_TIMEOUT = 30.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_lock_path(file_path):
+    """
+    Get the path of the lock file guarding a data file
+
+    The lock lives in a separate file because the data file itself is
+    swapped out on every atomic write.
+
+    Args:
+        file_path (str): Path to the data file
+
+    Returns:
+        str: Path to the lock file
+    """
+    return f"{file_path}.lock"
+
+
+def _try_lock(handle):
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(file_path, timeout=LOCK_TIMEOUT):
+    """
+    Hold the exclusive writer lock of a data file
+
+    Only writers (and read-modify-write sequences) need the lock. Locks
+    taken through separate calls exclude each other even inside one process.
+    Releasing the lock publishes a change of file_path to this process's
+    file watcher subscribers.
+
+    Args:
+        file_path (str): Path to the data file
+        timeout (float): Seconds to wait before raising TimeoutError
+    """
+    handle = open(get_lock_path(file_path), 'a+b')
+    try:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(handle):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for the lock on {file_path}")
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            _unlock(handle)
+    finally:
+        handle.close()
+    publish_change(file_path)
+
+
+@contextmanager
+def atomic_write(file_path, mode='w', encoding='utf-8'):
+    """
+    Write a file by atomically replacing it
+
+    Yields a file object for a uniquely named temporary file in the same
+    directory, then flushes, fsyncs and renames it over file_path. The new
+    file keeps the permissions of the file it replaces (or gets the usual
+    permissions for a new file). If the block raises, the temporary file is
+    removed and file_path is untouched.
+
+    Args:
+        file_path (str): Path to the file to write
+        mode (str): 'w' for text or 'wb' for binary
+        encoding (str): Text encoding (ignored for binary mode)
+    """
+    directory, filename = os.path.split(os.path.abspath(file_path))
+    while True:
+        temp_path = os.path.join(directory, f".{filename}.{uuid.uuid4().hex[:12]}.tmp")
+        try:
+            # Created with the usual permissions of a new file (0o666 less the umask)
+            fd = os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            shutil.copymode(file_path, temp_path)
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
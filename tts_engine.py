@@ -0,0 +1,194 @@
+"""
+Pool of long-lived pyttsx3 engines
+pyttsx3.init() and the voice scan are slow, so each worker thread starts one
+engine when the pool is created and keeps it for the life of the process.
+The American English voice is looked up once and its ID reused by every
+engine. Speech requests are queued and picked up by the next idle worker.
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pyttsx3
+
+# Number of engines kept warm per process. The espeak driver on Linux shares
+# global state between engines, so more than one only helps on Windows and macOS.
+TTS_POOL_SIZE = int(os.environ.get("TTS_POOL_SIZE", "1"))
+# Give up waiting for an engine after this many seconds
+SYNTHESIS_TIMEOUT = 30.0
+DEFAULT_VOLUME = 0.9
+
+# Substrings of voice IDs that identify American English voices
+AMERICAN_VOICE_IDENTIFIERS = ['david', 'mark', 'zira', 'hazel', 'us', 'american', 'en-us']
+
+_voice_id = None
+_voice_lock = threading.Lock()
+
+
+def find_american_voice(engine):
+    """
+    Find the ID of an American English voice, falling back to any English voice
+
+    Args:
+        engine: pyttsx3 engine to list the voices of
+
+    Returns:
+        str or None: Voice ID, or None if no English voice is installed
+    """
+    american_voice = None
+    for voice in engine.getProperty('voices'):
+        # Look for American English voices (common identifiers)
+        if voice.id and any(identifier in voice.id.lower() for identifier in AMERICAN_VOICE_IDENTIFIERS):
+            return voice.id
+        # Fallback: look for any English voice
+        elif voice.id and 'en' in voice.id.lower():
+            american_voice = voice.id
+    return american_voice
+
+
+def get_voice_id(engine):
+    """
+    Get the voice ID used by every engine, scanning the installed voices once per process
+
+    Args:
+        engine: pyttsx3 engine to scan if the voice is not known yet
+
+    Returns:
+        str or None: Voice ID, or None to keep the engine's default voice
+    """
+    global _voice_id
+    with _voice_lock:
+        if _voice_id is None:
+            # An empty string remembers that no English voice was found
+            _voice_id = find_american_voice(engine) or ""
+        return _voice_id or None
+
+
+class TTSEnginePool:
+    """
+    Worker threads that each own one initialized pyttsx3 engine
+
+    pyttsx3 engines must be used on the thread that created them, so every
+    engine lives on its own worker. If the engines cannot be started, the
+    pool reports itself unavailable and callers fall back to gTTS without
+    trying pyttsx3 again.
+    """
+
+    def __init__(self, size=TTS_POOL_SIZE):
+        self._requests = queue.Queue()
+        self._ready = threading.Event()
+        self._started = 0
+        self._failed = 0
+        self._size = size
+        self._lock = threading.Lock()
+        for _ in range(size):
+            threading.Thread(target=self._run, daemon=True).start()
+
+    @property
+    def available(self):
+        """True once an engine started, False if every engine failed to start"""
+        self._ready.wait(SYNTHESIS_TIMEOUT)
+        return self._started > 0
+
+    @property
+    def voice_id(self):
+        """ID of the voice every engine speaks with, or None for the default voice"""
+        return _voice_id or None
+
+    def _engine_finished_starting(self, started):
+        with self._lock:
+            if started:
+                self._started += 1
+            else:
+                self._failed += 1
+            if self._started or self._failed == self._size:
+                self._ready.set()
+
+    def _run(self):
+        try:
+            # pyttsx3.init() would hand every worker the same cached engine
+            engine = pyttsx3.Engine()
+            voice_id = get_voice_id(engine)
+            if voice_id:
+                engine.setProperty('voice', voice_id)
+            engine.setProperty('volume', DEFAULT_VOLUME)
+        except Exception as e:
+            print(f"Warning: Could not start a pyttsx3 engine: {e}")
+            self._engine_finished_starting(False)
+            return
+        self._engine_finished_starting(True)
+
+        while True:
+            text, file_path, rate, future = self._requests.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                engine.setProperty('rate', rate)
+                engine.save_to_file(text, file_path)
+                engine.runAndWait()
+                future.set_result(file_path)
+            except Exception as e:
+                future.set_exception(e)
+
+    def submit(self, text, file_path, rate):
+        """
+        Queue text to be spoken into an audio file
+
+        Args:
+            text (str): Text to convert to speech
+            file_path (str): Path of the WAV file to write
+            rate (int): Speech rate in words per minute
+
+        Returns:
+            Future: Resolves to file_path once the file is written
+        """
+        future = Future()
+        self._requests.put((text, file_path, rate, future))
+        return future
+
+    def save_to_file(self, text, file_path, rate, timeout=SYNTHESIS_TIMEOUT):
+        """
+        Speak text into an audio file on the next idle engine
+
+        Args:
+            text (str): Text to convert to speech
+            file_path (str): Path of the WAV file to write
+            rate (int): Speech rate in words per minute
+            timeout (float): Seconds to wait for the engine
+
+        Returns:
+            str: file_path
+
+        Raises:
+            RuntimeError: If no engine could be started
+            TimeoutError: If the engine did not finish in time
+        """
+        if not self.available:
+            raise RuntimeError("No pyttsx3 engine is available")
+        future = self.submit(text, file_path, rate)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Speech synthesis took longer than {timeout} seconds") from None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_tts_pool():
+    """
+    Get the process-wide TTS engine pool, starting its engines on first use
+
+    Returns:
+        TTSEnginePool: Shared pool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TTSEnginePool()
+        return _pool
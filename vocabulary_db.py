@@ -0,0 +1,527 @@
+"""
+SQLite storage engine for vocabulary, learned words and study progress
+Keeps the working vocabulary, learned words, review history and favorites in
+one SQLite database in WAL mode, so sessions keep reading while another one
+writes and every change is a single-row statement instead of a file rewrite.
+"""
+
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from main import WordEntry, iter_vocabulary_from_file
+
+# Open connections kept for reuse; more are opened while all of them are in use
+MAX_IDLE_CONNECTIONS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    word TEXT NOT NULL,
+    word_key TEXT NOT NULL,
+    meaning TEXT NOT NULL,
+    phrase TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS words_by_key ON words (source, word_key, category);
+CREATE INDEX IF NOT EXISTS words_by_category ON words (source, category);
+
+CREATE TABLE IF NOT EXISTS learned_words (
+    word_key TEXT PRIMARY KEY,
+    word TEXT NOT NULL,
+    meaning TEXT NOT NULL,
+    phrase TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL,
+    expressions TEXT,
+    learned_date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS review_history (
+    id INTEGER PRIMARY KEY,
+    word_key TEXT NOT NULL,
+    word TEXT NOT NULL,
+    rating TEXT NOT NULL,
+    reviewed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_by_word ON review_history (word_key, id);
+
+CREATE TABLE IF NOT EXISTS favorites (
+    word_key TEXT PRIMARY KEY,
+    word TEXT NOT NULL,
+    added_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS study_stats (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS revisions (
+    name TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+"""
+
+
+def _word_key(word):
+    return word.strip().lower()
+
+
+class VocabularyDatabase:
+    """
+    Connection pool and queries for the vocabulary database
+
+    Streamlit runs every rerun of a script on a new thread, so connections
+    are not tied to threads. Each query or transaction borrows an open
+    connection from a small pool and returns it when done, so the PRAGMAs
+    run once per connection rather than once per rerun. Writes bump a
+    per-table revision in the same transaction, which readers compare to
+    decide whether their cached copy is stale. A read-only instance opens
+    an existing database without creating or migrating it.
+    """
+
+    def __init__(self, db_path, read_only=False):
+        self.db_path = db_path
+        self.read_only = read_only
+        self._idle = []
+        self._closed = False
+        self._pool_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _open(self):
+        if self.read_only:
+            # Never creates the file, and leaves the journal mode and schema alone
+            uri = f"{pathlib.Path(os.path.abspath(self.db_path)).as_uri()}?mode=ro"
+            connection = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            return connection
+        # Borrowed by one thread at a time, but not always the thread that opened it
+        connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                connection.executescript(SCHEMA)
+                self._initialized = True
+        return connection
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a connection for one query or transaction"""
+        with self._pool_lock:
+            connection = self._idle.pop() if self._idle else None
+        if connection is None:
+            connection = self._open()
+        try:
+            yield connection
+        finally:
+            with self._pool_lock:
+                keep = not self._closed and len(self._idle) < MAX_IDLE_CONNECTIONS and not connection.in_transaction
+                if keep:
+                    self._idle.append(connection)
+            if not keep:
+                connection.close()
+
+    def close(self):
+        """Close the idle connections; connections in use are closed when they are returned"""
+        with self._pool_lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _bump(self, connection, name):
+        connection.execute(
+            "INSERT INTO revisions (name, revision) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET revision = revision + 1",
+            (name,)
+        )
+
+    def get_revision(self, name):
+        """
+        Get the change counter of a table
+
+        Args:
+            name (str): Table name ('words', 'learned_words', ...)
+
+        Returns:
+            int: Number of committed writes to the table
+        """
+        with self._connection() as connection:
+            row = connection.execute("SELECT revision FROM revisions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    # Vocabulary
+
+    def get_words(self, source):
+        """
+        Get the words of a vocabulary list in insertion order
+
+        Args:
+            source (str): Vocabulary list name (the vocabulary file path)
+
+        Returns:
+            list: WordEntry objects
+        """
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT word, meaning, phrase, category FROM words WHERE source = ? ORDER BY id",
+                (source,)
+            )
+            return [WordEntry(row['word'], row['meaning'], row['phrase'], row['category']) for row in rows]
+
+    def add_word(self, source, word_entry):
+        """
+        Add a word, replacing an existing entry for the same word and category
+
+        Args:
+            source (str): Vocabulary list name
+            word_entry (dict or WordEntry): Word data to add
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        entry = WordEntry.from_dict(word_entry)
+        key = _word_key(entry.word)
+        try:
+            with self._connection() as connection, connection:
+                connection.execute(
+                    "DELETE FROM words WHERE source = ? AND word_key = ? AND category = ?",
+                    (source, key, entry.category)
+                )
+                connection.execute(
+                    "INSERT INTO words (source, word, word_key, meaning, phrase, category) VALUES (?, ?, ?, ?, ?, ?)",
+                    (source, entry.word, key, entry.meaning, entry.phrase, entry.category)
+                )
+                self._bump(connection, 'words')
+            return True
+        except sqlite3.Error as e:
+            print(f"Error adding word to {self.db_path}: {e}")
+            return False
+
+    def add_words(self, source, word_list):
+        """
+        Add several words in one transaction
+
+        Args:
+            source (str): Vocabulary list name
+            word_list (list): WordEntry objects or word dictionaries
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        # Later entries for the same word and category win, as if added one by one
+        rows_by_key = {}
+        for word_data in word_list:
+            entry = WordEntry.from_dict(word_data)
+            key = (_word_key(entry.word), entry.category)
+            rows_by_key.pop(key, None)
+            rows_by_key[key] = (source, entry.word, key[0], entry.meaning, entry.phrase, entry.category)
+        rows = list(rows_by_key.values())
+        try:
+            with self._connection() as connection, connection:
+                connection.executemany(
+                    "DELETE FROM words WHERE source = ? AND word_key = ? AND category = ?",
+                    [(row[0], row[2], row[5]) for row in rows]
+                )
+                connection.executemany(
+                    "INSERT INTO words (source, word, word_key, meaning, phrase, category) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._bump(connection, 'words')
+            return True
+        except sqlite3.Error as e:
+            print(f"Error adding words to {self.db_path}: {e}")
+            return False
+
+    def delete_word(self, source, word):
+        """
+        Delete every entry of a word
+
+        Args:
+            source (str): Vocabulary list name
+            word (str): Word to delete (case-insensitive)
+
+        Returns:
+            bool: True if the word was found and deleted, False otherwise
+        """
+        try:
+            with self._connection() as connection, connection:
+                cursor = connection.execute(
+                    "DELETE FROM words WHERE source = ? AND word_key = ?",
+                    (source, _word_key(word))
+                )
+                if cursor.rowcount:
+                    self._bump(connection, 'words')
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Error deleting word from {self.db_path}: {e}")
+            return False
+
+    def replace_words(self, source, word_list):
+        """
+        Replace a whole vocabulary list in one transaction
+
+        Args:
+            source (str): Vocabulary list name
+            word_list (list): WordEntry objects or word dictionaries
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        rows = []
+        for word_data in word_list:
+            entry = WordEntry.from_dict(word_data)
+            rows.append((source, entry.word, _word_key(entry.word), entry.meaning, entry.phrase, entry.category))
+        try:
+            with self._connection() as connection, connection:
+                connection.execute("DELETE FROM words WHERE source = ?", (source,))
+                connection.executemany(
+                    "INSERT INTO words (source, word, word_key, meaning, phrase, category) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._bump(connection, 'words')
+            return True
+        except sqlite3.Error as e:
+            print(f"Error replacing words in {self.db_path}: {e}")
+            return False
+
+    # Learned words
+
+    def get_learned(self):
+        """
+        Get the learned words in the order they were learned
+
+        Returns:
+            list: WordEntry objects including their learned dates
+        """
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT word, meaning, phrase, category, expressions, learned_date FROM learned_words ORDER BY rowid"
+            ).fetchall()
+        return [
+            WordEntry(
+                row['word'], row['meaning'], row['phrase'], row['category'],
+                json.loads(row['expressions']) if row['expressions'] else None,
+                row['learned_date']
+            )
+            for row in rows
+        ]
+
+    def add_learned(self, word_entry, learned_date=None):
+        """
+        Add a word to the learned words unless it is already there
+
+        Args:
+            word_entry (dict or WordEntry): Word data
+            learned_date (str): ISO timestamp (defaults to now)
+
+        Returns:
+            bool: True if the word was added, False if it already existed or failed
+        """
+        entry = WordEntry.from_dict(word_entry)
+        expressions = json.dumps(list(entry.expressions), ensure_ascii=False) if entry.expressions else None
+        try:
+            with self._connection() as connection, connection:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO learned_words "
+                    "(word_key, word, meaning, phrase, category, expressions, learned_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (_word_key(entry.word), entry.word, entry.meaning, entry.phrase, entry.category, expressions,
+                     learned_date or entry.learned_date or datetime.now().isoformat())
+                )
+                if cursor.rowcount:
+                    self._bump(connection, 'learned_words')
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Error saving learned word to {self.db_path}: {e}")
+            return False
+
+    def remove_learned(self, word):
+        """
+        Remove a word from the learned words
+
+        Args:
+            word (str): Word to remove (case-insensitive)
+
+        Returns:
+            bool: True if the word was found and removed, False otherwise
+        """
+        try:
+            with self._connection() as connection, connection:
+                cursor = connection.execute("DELETE FROM learned_words WHERE word_key = ?", (_word_key(word),))
+                if cursor.rowcount:
+                    self._bump(connection, 'learned_words')
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Error removing learned word from {self.db_path}: {e}")
+            return False
+
+    # Study progress
+
+    def apply_progress(self, events):
+        """
+        Apply a batch of progress events in one transaction
+
+        Args:
+            events (list): Event dicts with a 'type' of 'review' (word, rating,
+                at), 'favorite' (word, favorite, at), 'stats' (stats) or 'clear'
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self._connection() as connection, connection:
+                for event in events:
+                    event_type = event['type']
+                    if event_type == 'review':
+                        connection.execute(
+                            "INSERT INTO review_history (word_key, word, rating, reviewed_at) VALUES (?, ?, ?, ?)",
+                            (_word_key(event['word']), event['word'], event['rating'], event['at'])
+                        )
+                    elif event_type == 'favorite' and event['favorite']:
+                        connection.execute(
+                            "INSERT OR IGNORE INTO favorites (word_key, word, added_at) VALUES (?, ?, ?)",
+                            (_word_key(event['word']), event['word'], event['at'])
+                        )
+                    elif event_type == 'favorite':
+                        connection.execute("DELETE FROM favorites WHERE word_key = ?", (_word_key(event['word']),))
+                    elif event_type == 'stats':
+                        connection.executemany(
+                            "INSERT INTO study_stats (name, value) VALUES (?, ?) "
+                            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                            [(name, json.dumps(value)) for name, value in event['stats'].items()]
+                        )
+                    elif event_type == 'clear':
+                        connection.execute("DELETE FROM review_history")
+                        connection.execute("DELETE FROM favorites")
+                        connection.execute("DELETE FROM study_stats")
+                self._bump(connection, 'progress')
+            return True
+        except sqlite3.Error as e:
+            print(f"Error saving progress to {self.db_path}: {e}")
+            return False
+
+    def get_latest_ratings(self):
+        """
+        Get the most recent rating of every reviewed word
+
+        Returns:
+            dict: Word -> rating
+        """
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT word, rating FROM review_history "
+                "WHERE id IN (SELECT MAX(id) FROM review_history GROUP BY word_key)"
+            )
+            return {row['word']: row['rating'] for row in rows}
+
+    def iter_review_history(self):
+        """
+        Stream every saved review, oldest first
+
+        Rows are read from the cursor as they are consumed, so the history
+        is never loaded into memory at once.
+
+        Yields:
+            dict: 'word', 'rating' and 'reviewed_at' of one review
+        """
+        # The connection stays borrowed until the history is consumed or the generator is closed
+        with self._connection() as connection:
+            cursor = connection.execute("SELECT word, rating, reviewed_at FROM review_history ORDER BY id")
+            try:
+                for row in cursor:
+                    yield {'word': row['word'], 'rating': row['rating'], 'reviewed_at': row['reviewed_at']}
+            finally:
+                cursor.close()
+
+    def get_favorites(self):
+        """
+        Get the favorite words
+
+        Returns:
+            list: Favorite words in the order they were added
+        """
+        with self._connection() as connection:
+            rows = connection.execute("SELECT word FROM favorites ORDER BY rowid")
+            return [row['word'] for row in rows]
+
+    def get_stats(self):
+        """
+        Get the saved study statistics
+
+        Returns:
+            dict: Name -> value (daily_streak, last_study_date, study_time)
+        """
+        with self._connection() as connection:
+            rows = connection.execute("SELECT name, value FROM study_stats")
+            return {row['name']: json.loads(row['value']) for row in rows}
+
+    # Migration
+
+    def import_files(self, word_file, learned_file):
+        """
+        Seed an empty database from vocabulary.txt and learned.json
+
+        Only tables that have never been written are filled, so this is
+        safe to call on every start.
+
+        Args:
+            word_file (str): Path to the pipe-delimited vocabulary file
+            learned_file (str): Path to the learned words JSON file
+        """
+        if os.path.exists(word_file) and self.get_revision('words') == 0:
+            self.replace_words(word_file, iter_vocabulary_from_file(word_file))
+
+        if os.path.exists(learned_file) and self.get_revision('learned_words') == 0:
+            try:
+                with open(learned_file, 'r', encoding='utf-8') as f:
+                    learned_words = json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError) as e:
+                print(f"Error loading {learned_file}: {e}")
+                return
+            for word_entry in learned_words:
+                self.add_learned(word_entry)
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_vocabulary_database(db_path):
+    """
+    Get the process-wide VocabularyDatabase for a database file
+
+    Args:
+        db_path (str): Path to the SQLite database
+
+    Returns:
+        VocabularyDatabase: Shared instance for the file
+    """
+    with _databases_lock:
+        database = _databases.get(db_path)
+        if database is None:
+            database = VocabularyDatabase(db_path)
+            _databases[db_path] = database
+        return database
+
+
+def release_vocabulary_database(db_path):
+    """
+    Forget the shared VocabularyDatabase of a file
+
+    Connections still in use are closed when they are returned.
+
+    Args:
+        db_path (str): Path to the SQLite database
+    """
+    with _databases_lock:
+        database = _databases.pop(db_path, None)
+    if database is not None:
+        database.close()
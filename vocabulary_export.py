@@ -0,0 +1,378 @@
+"""
+Streaming export of vocabulary, favorites and review history
+Rows come from generators and are formatted, encoded and optionally gzip
+compressed chunk by chunk, so an export never holds more than one chunk of
+text in memory. The result is written straight to a file. The Analytics
+Dashboard writes it on a background thread (submit_export) so the page keeps
+rendering, then hands the file to st.download_button. Streamlit keeps the
+finished file in memory while it serves the download, so very large exports
+are better made with gzip or with this script.
+
+    python vocabulary_export.py vocabulary --format anki --learner alice
+    python vocabulary_export.py reviews --format csv --gzip -o reviews.csv.gz
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from shared_file import atomic_write
+
+# Characters of formatted text collected before a chunk is encoded and compressed
+EXPORT_CHUNK_SIZE = 64 * 1024
+# Seconds a run waits for an export being written before rerunning to check again
+EXPORT_POLL_INTERVAL = 0.5
+# Seconds the page keeps rerunning for an export being written before giving up
+EXPORT_WAIT_TIMEOUT = 60.0
+EXPORT_FORMATS = ["csv", "jsonl", "anki"]
+EXPORT_DATASETS = ["vocabulary", "favorites", "reviews"]
+
+# Columns of each dataset, in the order they are written
+EXPORT_COLUMNS = {
+    'vocabulary': ['word', 'meaning', 'phrase', 'category', 'rating', 'favorite'],
+    'favorites': ['word', 'meaning', 'phrase', 'category'],
+    'reviews': ['word', 'rating', 'reviewed_at']
+}
+FILE_EXTENSIONS = {'csv': '.csv', 'jsonl': '.jsonl', 'anki': '.txt'}
+MIME_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson', 'anki': 'text/plain'}
+
+
+# Rows
+
+def iter_vocabulary_rows(words, learning_progress=None, favorites=()):
+    """
+    Yield one export row per vocabulary word
+
+    Args:
+        words (iterable): Word dictionaries or WordEntry objects
+        learning_progress (dict): Word -> latest rating (optional)
+        favorites (set): Favorite words (optional)
+
+    Yields:
+        dict: Row with the 'vocabulary' columns
+    """
+    learning_progress = learning_progress or {}
+    for word_data in words:
+        word = word_data['word']
+        yield {
+            'word': word,
+            'meaning': word_data.get('meaning', ''),
+            'phrase': word_data.get('phrase', ''),
+            'category': word_data.get('category', 'general'),
+            'rating': learning_progress.get(word, ''),
+            'favorite': word in favorites
+        }
+
+
+def iter_favorite_rows(words, favorites):
+    """
+    Yield the vocabulary words that are favorites
+
+    Args:
+        words (iterable): Word dictionaries or WordEntry objects
+        favorites (set): Favorite words
+
+    Yields:
+        dict: Row with the 'favorites' columns
+    """
+    for word_data in words:
+        if word_data['word'] in favorites:
+            yield {
+                'word': word_data['word'],
+                'meaning': word_data.get('meaning', ''),
+                'phrase': word_data.get('phrase', ''),
+                'category': word_data.get('category', 'general')
+            }
+
+
+# Formats
+
+def _chunked(write_rows):
+    """Run write_rows(buffer) and yield the buffer's text every EXPORT_CHUNK_SIZE characters"""
+    buffer = io.StringIO()
+    for _ in write_rows(buffer):
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_csv(rows, columns):
+    """
+    Format rows as CSV with a header row
+
+    Args:
+        rows (iterable): Row dictionaries
+        columns (list): Column names to write
+
+    Yields:
+        str: Chunks of CSV text
+    """
+    def write_rows(buffer):
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield
+
+    return _chunked(write_rows)
+
+
+def iter_jsonl(rows, columns):
+    """
+    Format rows as JSON lines, one object per row
+
+    Args:
+        rows (iterable): Row dictionaries
+        columns (list): Keys to write
+
+    Yields:
+        str: Chunks of JSON lines
+    """
+    def write_rows(buffer):
+        for row in rows:
+            buffer.write(json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False))
+            buffer.write('\n')
+            yield
+
+    return _chunked(write_rows)
+
+
+def iter_anki(rows, columns=None):
+    """
+    Format word rows as an Anki "Notes in Plain Text" file
+
+    Notes have Front (word), Back (meaning) and Example (phrase) fields and
+    are filed into a Vocabulary::<category> deck. vocabulary_import.py reads
+    the same layout back.
+
+    Args:
+        rows (iterable): Row dictionaries with word, meaning, phrase and category
+        columns (list): Ignored, the note layout is fixed
+
+    Yields:
+        str: Chunks of tab-separated notes
+    """
+    def write_rows(buffer):
+        buffer.write("#separator:tab\n#html:false\n#deck column:4\n")
+        writer = csv.writer(buffer, delimiter='\t', lineterminator='\n')
+        for row in rows:
+            writer.writerow([
+                row['word'], row.get('meaning', ''), row.get('phrase', ''),
+                f"Vocabulary::{row.get('category') or 'general'}"
+            ])
+            yield
+
+    return _chunked(write_rows)
+
+
+FORMATTERS = {
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+    'anki': iter_anki
+}
+
+
+# Encoding
+
+def iter_encoded(chunks, compress=False, encoding='utf-8'):
+    """
+    Encode text chunks to bytes, optionally gzip compressing them on the fly
+
+    Args:
+        chunks (iterable): Text chunks
+        compress (bool): Produce a gzip stream instead of plain text
+        encoding (str): Text encoding
+
+    Yields:
+        bytes: Encoded (and compressed) chunks
+    """
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode(encoding)
+        return
+
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(encoding))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_export(rows, dataset, export_format, compress=False):
+    """
+    Stream an export as bytes
+
+    Args:
+        rows (iterable): Rows of the dataset (see the iter_*_rows functions)
+        dataset (str): One of EXPORT_DATASETS
+        export_format (str): One of EXPORT_FORMATS
+        compress (bool): Gzip the output
+
+    Yields:
+        bytes: Chunks of the export file
+    """
+    formatter = FORMATTERS[export_format]
+    return iter_encoded(formatter(rows, EXPORT_COLUMNS[dataset]), compress)
+
+
+def get_export_filename(dataset, export_format, compress=False):
+    """
+    Get the download file name of an export
+
+    Args:
+        dataset (str): One of EXPORT_DATASETS
+        export_format (str): One of EXPORT_FORMATS
+        compress (bool): Whether the export is gzip compressed
+
+    Returns:
+        str: File name such as 'favorites.csv' or 'reviews.jsonl.gz'
+    """
+    return f"{dataset}{FILE_EXTENSIONS[export_format]}{'.gz' if compress else ''}"
+
+
+def get_export_mime_type(export_format, compress=False):
+    """
+    Get the MIME type of an export
+
+    Args:
+        export_format (str): One of EXPORT_FORMATS
+        compress (bool): Whether the export is gzip compressed
+
+    Returns:
+        str: MIME type for st.download_button
+    """
+    return 'application/gzip' if compress else MIME_TYPES[export_format]
+
+
+def write_export(chunks, file_path=None):
+    """
+    Write export chunks to a file
+
+    Args:
+        chunks (iterable): Bytes chunks from iter_export
+        file_path (str): Destination (a new temporary file if None)
+
+    Returns:
+        str: Path of the written file, or None if writing failed
+    """
+    if file_path is not None:
+        try:
+            with atomic_write(file_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            return file_path
+        except OSError as e:
+            print(f"Error writing export to {file_path}: {e}")
+            return None
+
+    try:
+        fd, temp_path = tempfile.mkstemp(prefix="vocabulary_export_")
+    except OSError as e:
+        print(f"Error creating export file: {e}")
+        return None
+    completed = False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        completed = True
+        return temp_path
+    except OSError as e:
+        print(f"Error writing export to {temp_path}: {e}")
+        return None
+    finally:
+        # Also covers errors raised by the row generators
+        if not completed:
+            os.remove(temp_path)
+
+
+_export_executor = None
+_export_executor_lock = threading.Lock()
+
+
+def submit_export(rows, dataset, export_format, compress=False):
+    """
+    Write an export to a temporary file on a background thread
+
+    Args:
+        rows (iterable): Rows from get_export_rows (must not change while the export runs)
+        dataset (str): One of EXPORT_DATASETS
+        export_format (str): One of EXPORT_FORMATS
+        compress (bool): Whether to gzip compress the export
+
+    Returns:
+        Future: Resolves to the path of the file (remove it when done), or None if writing failed
+    """
+    global _export_executor
+    with _export_executor_lock:
+        if _export_executor is None:
+            _export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+    return _export_executor.submit(write_export, iter_export(rows, dataset, export_format, compress))
+
+
+def get_export_rows(storage, word_file, dataset, learning_progress=None, favorites=None):
+    """
+    Get the rows of a dataset from a storage backend
+
+    Args:
+        storage (FileStorage or SQLiteStorage): Storage backend
+        word_file (str): Vocabulary to export
+        dataset (str): One of EXPORT_DATASETS
+        learning_progress (dict): Latest ratings (read from storage if None)
+        favorites (set): Favorite words (read from storage if None)
+
+    Returns:
+        iterator: Rows of the dataset
+    """
+    if dataset == 'reviews':
+        return storage.iter_review_history()
+
+    if learning_progress is None or favorites is None:
+        saved = storage.get_progress()
+        learning_progress = saved['learning_progress'] if learning_progress is None else learning_progress
+        favorites = set(saved['favorites']) if favorites is None else favorites
+
+    words = storage.get_vocabulary(word_file)
+    if dataset == 'favorites':
+        return iter_favorite_rows(words, favorites)
+    return iter_vocabulary_rows(words, learning_progress, favorites)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from learner_profiles import DEFAULT_LEARNER_ID, get_profile
+
+    parser = argparse.ArgumentParser(description='Export vocabulary, favorites or review history')
+    parser.add_argument('dataset', choices=EXPORT_DATASETS, help='What to export')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help='Output format (default: csv)')
+    parser.add_argument('--gzip', action='store_true', help='Compress the output')
+    parser.add_argument('--learner', default=DEFAULT_LEARNER_ID, help='Learner profile to export')
+    parser.add_argument('-o', '--output', help='Output file (default: <dataset>.<format>)')
+
+    args = parser.parse_args()
+
+    if args.dataset == 'reviews' and args.format == 'anki':
+        print("Error: Review history cannot be exported as Anki notes")
+        sys.exit(1)
+
+    profile = get_profile(args.learner)
+    if profile is None:
+        sys.exit(1)
+
+    output = args.output or get_export_filename(args.dataset, args.format, args.gzip)
+    rows = get_export_rows(profile.storage, profile.word_file, args.dataset)
+    if write_export(iter_export(rows, args.dataset, args.format, args.gzip), output) is None:
+        sys.exit(1)
+    print(f"Exported {args.dataset} to {output}")
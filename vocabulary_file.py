@@ -0,0 +1,166 @@
+"""
+Random access into the base vocabulary file
+Keeps a persisted side index (<file>.idx) that maps each lowercased word to
+the byte offset and length of its lines, and reads those lines through mmap,
+so looking up one word does not parse the whole file.
+
+vocabulary.txt is only ever replaced atomically (edits go to its change log,
+see vocabulary_log.py), so the index is valid for as long as the file's
+(mtime, size) signature is unchanged and is rebuilt once per new file.
+"""
+
+import json
+import mmap
+import os
+import threading
+
+from main import WordEntry
+from shared_file import atomic_write
+
+INDEX_VERSION = 2
+
+
+def get_index_path(file_path):
+    """
+    Get the path of the byte-offset index kept next to a vocabulary file
+
+    Args:
+        file_path (str): Path to the vocabulary file
+
+    Returns:
+        str: Path to the index
+    """
+    return f"{file_path}.idx"
+
+
+def _parse_line(line):
+    """Return a WordEntry for a raw vocabulary line, or None if it is not valid"""
+    parts = line.decode('utf-8').strip().split(" | ")
+    if len(parts) >= 4:
+        return WordEntry(parts[0], parts[1], parts[2], parts[3])
+    return None
+
+
+class VocabularyFileIndex:
+    """
+    Byte-offset index of one vocabulary file
+
+    Attributes:
+        file_path (str): Path to the vocabulary file
+        index_path (str): Path to the persisted index
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.index_path = get_index_path(file_path)
+        # lowercase word -> [(offset, length), ...] in file order
+        self._offsets = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _load_index(self, signature):
+        """Load the persisted index if it was built for this version of the file"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if data.get('version') != INDEX_VERSION or tuple(data.get('signature', ())) != signature:
+            return False
+        self._offsets = {word: [tuple(span) for span in spans] for word, spans in data['offsets'].items()}
+        return True
+
+    def _build(self, data, signature):
+        """Index every valid line of the mapped file and persist the index"""
+        offsets = {}
+        start = 0
+        size = len(data)
+        while start < size:
+            end = data.find(b"\n", start)
+            if end < 0:
+                end = size
+            line = data[start:end]
+            if line.count(b" | ") >= 3:
+                word = line.split(b" | ", 1)[0].decode('utf-8').strip().lower()
+                if word:
+                    offsets.setdefault(word, []).append((start, len(line.rstrip(b"\r"))))
+            start = end + 1
+        self._offsets = offsets
+
+        try:
+            with atomic_write(self.index_path) as f:
+                json.dump({'version': INDEX_VERSION, 'signature': signature, 'offsets': offsets},
+                          f, ensure_ascii=False, separators=(',', ':'))
+        except OSError as e:
+            print(f"Warning: Could not save vocabulary index {self.index_path}: {e}")
+
+    def lookup(self, word):
+        """
+        Get the entries of one word
+
+        Args:
+            word (str): Word to look up (case-insensitive)
+
+        Returns:
+            list: WordEntry objects for the word's lines, in file order
+        """
+        key = word.strip().lower()
+        with self._lock:
+            try:
+                f = open(self.file_path, 'rb')
+            except FileNotFoundError:
+                self._offsets = {}
+                self._signature = None
+                return []
+            with f:
+                # Stat the open file so the signature matches the mapped contents
+                stat = os.fstat(f.fileno())
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if stat.st_size == 0:
+                    self._offsets = {}
+                    self._signature = signature
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    if signature != self._signature:
+                        if not self._load_index(signature):
+                            self._build(data, signature)
+                        self._signature = signature
+                    entries = []
+                    for offset, length in self._offsets.get(key, ()):
+                        entry = _parse_line(data[offset:offset + length])
+                        if entry is not None:
+                            entries.append(entry)
+                    return entries
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vocabulary_file_index(file_path):
+    """
+    Get the process-wide VocabularyFileIndex for a vocabulary file
+
+    Args:
+        file_path (str): Path to the vocabulary file
+
+    Returns:
+        VocabularyFileIndex: Shared instance for the file
+    """
+    with _indexes_lock:
+        index = _indexes.get(file_path)
+        if index is None:
+            index = VocabularyFileIndex(file_path)
+            _indexes[file_path] = index
+        return index
+
+
+def release_vocabulary_file_index(file_path):
+    """
+    Forget the shared VocabularyFileIndex of a file
+
+    Args:
+        file_path (str): Path to the vocabulary file
+    """
+    with _indexes_lock:
+        _indexes.pop(file_path, None)
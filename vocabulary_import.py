@@ -0,0 +1,285 @@
+"""
+Bulk import of vocabulary from CSV, TSV and Anki exports
+Streams the source file row by row, validates rows in chunks with
+main.validate_word_entry, skips words that are already in the learner's
+vocabulary and saves each chunk with a single storage write, so memory stays
+bounded by the chunk size however large the file is.
+
+    python vocabulary_import.py words.csv
+    python vocabulary_import.py deck.apkg --learner alice --category travel
+"""
+
+import csv
+import html
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+
+from main import WordEntry, validate_word_entries
+
+IMPORT_CHUNK_SIZE = 5000
+# Keep at most this many row errors in the import summary
+MAX_REPORTED_ERRORS = 20
+SOURCE_FORMATS = ["csv", "tsv", "anki", "apkg"]
+
+# Column names accepted in a header row, including the Anki field names
+HEADER_ALIASES = {
+    'word': 'word', 'front': 'word', 'term': 'word',
+    'meaning': 'meaning', 'back': 'meaning', 'definition': 'meaning',
+    'phrase': 'phrase', 'example': 'phrase',
+    'category': 'category', 'deck': 'category'
+}
+ANKI_SEPARATORS = {
+    'tab': '\t', 'comma': ',', 'semicolon': ';', 'space': ' ', 'pipe': '|', 'colon': ':'
+}
+
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+_SPACE_PATTERN = re.compile(r"\s+")
+
+
+def _clean(text, is_html=False):
+    """Turn a raw field into single-line text that is safe in vocabulary.txt"""
+    if not text:
+        return ""
+    if is_html:
+        text = html.unescape(_TAG_PATTERN.sub(" ", text))
+    # " | " separates the fields of a vocabulary.txt line
+    return _SPACE_PATTERN.sub(" ", text).replace(" | ", " / ").strip()
+
+
+def _row_to_entry(fields, category, is_html=False):
+    """Build a word dictionary from word, meaning, phrase and category fields"""
+    return {
+        'word': _clean(fields.get('word'), is_html),
+        'meaning': _clean(fields.get('meaning'), is_html),
+        'phrase': _clean(fields.get('phrase'), is_html),
+        'category': (_clean(fields.get('category')) or category).lower()
+    }
+
+
+def _read_delimited(f, delimiter, category):
+    """Yield word dictionaries from CSV or TSV rows, with or without a header row"""
+    columns = ['word', 'meaning', 'phrase', 'category']
+    reader = csv.reader(f, delimiter=delimiter)
+    for row_number, row in enumerate(reader):
+        if row_number == 0:
+            header = [HEADER_ALIASES.get(cell.strip().lower()) for cell in row]
+            if 'word' in header and 'meaning' in header:
+                columns = header
+                continue
+        yield _row_to_entry(dict(zip(columns, row)), category)
+
+
+def _read_anki_text(f, category):
+    """
+    Yield word dictionaries from an Anki "Notes in Plain Text" export
+
+    Honours the #separator, #html and #... column headers Anki writes at the
+    top of the file. The first three note fields are used as word, meaning
+    and phrase; a deck column becomes the category.
+    """
+    delimiter = '\t'
+    is_html = False
+    skip_columns = set()
+    deck_column = None
+
+    line = f.readline()
+    while line.startswith('#'):
+        key, _, value = line[1:].strip().partition(':')
+        if key == 'separator':
+            delimiter = ANKI_SEPARATORS.get(value.lower(), value[:1] or '\t')
+        elif key == 'html':
+            is_html = value.lower() == 'true'
+        elif key.endswith(' column') and value.isdigit():
+            skip_columns.add(int(value) - 1)
+            if key == 'deck column':
+                deck_column = int(value) - 1
+        line = f.readline()
+
+    def rows():
+        if line:
+            yield line
+        yield from f
+
+    for row in csv.reader(rows(), delimiter=delimiter):
+        fields = [value for position, value in enumerate(row) if position not in skip_columns]
+        entry = dict(zip(['word', 'meaning', 'phrase'], fields))
+        if deck_column is not None and deck_column < len(row):
+            entry['category'] = row[deck_column].split('::')[-1]
+        yield _row_to_entry(entry, category, is_html)
+
+
+def _read_anki_package(source_path, category):
+    """Yield word dictionaries from the notes of an Anki .apkg package"""
+    with zipfile.ZipFile(source_path) as package:
+        names = set(package.namelist())
+        collection = next((name for name in ("collection.anki21", "collection.anki2") if name in names), None)
+        if collection is None:
+            raise ValueError(f"{source_path} has no readable Anki collection (newer compressed packages are not supported)")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            collection_path = os.path.join(temp_dir, "collection.db")
+            with package.open(collection) as source, open(collection_path, 'wb') as target:
+                shutil.copyfileobj(source, target)
+
+            connection = sqlite3.connect(collection_path)
+            try:
+                for (fields,) in connection.execute("SELECT flds FROM notes ORDER BY id"):
+                    entry = dict(zip(['word', 'meaning', 'phrase'], fields.split('\x1f')))
+                    yield _row_to_entry(entry, category, is_html=True)
+            finally:
+                connection.close()
+
+
+def detect_format(source_path):
+    """
+    Guess the import format from a file name
+
+    Args:
+        source_path (str): Path to the file to import
+
+    Returns:
+        str: 'csv', 'tsv', 'anki' (plain-text notes) or 'apkg'
+    """
+    extension = os.path.splitext(source_path)[1].lower()
+    if extension in ('.tsv', '.tab'):
+        return 'tsv'
+    if extension == '.txt':
+        return 'anki'
+    if extension in ('.apkg', '.colpkg'):
+        return 'apkg'
+    return 'csv'
+
+
+def read_import_rows(source_path, source_format=None, category="general"):
+    """
+    Stream word dictionaries from a file to import
+
+    Args:
+        source_path (str): Path to the CSV, TSV or Anki file
+        source_format (str): One of SOURCE_FORMATS (detected from the name if None)
+        category (str): Category for rows that do not name one
+
+    Yields:
+        dict: Word data with 'word', 'meaning', 'phrase' and 'category'
+    """
+    source_format = source_format or detect_format(source_path)
+    if source_format == 'apkg':
+        yield from _read_anki_package(source_path, category)
+        return
+
+    with open(source_path, 'r', encoding='utf-8-sig', newline='') as f:
+        if source_format == 'anki':
+            yield from _read_anki_text(f, category)
+        else:
+            yield from _read_delimited(f, '\t' if source_format == 'tsv' else ',', category)
+
+
+def import_vocabulary(source_path, storage, word_file, source_format=None, category="general",
+                      chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Import words from a CSV, TSV or Anki file into a vocabulary
+
+    Rows are validated in chunks, words that are already in the vocabulary
+    (or earlier in the file) are skipped, and each chunk is saved with one
+    storage write.
+
+    Args:
+        source_path (str): Path to the file to import
+        storage (FileStorage or SQLiteStorage): Storage backend to write to
+        word_file (str): Vocabulary to import into
+        source_format (str): One of SOURCE_FORMATS (detected from the name if None)
+        category (str): Category for rows that do not name one
+        chunk_size (int): Rows validated and saved together
+        progress (callable): Called with the stats dict after every chunk (optional)
+
+    Returns:
+        dict: Counts of 'read', 'imported', 'duplicates' and 'invalid' rows,
+        'errors' with up to MAX_REPORTED_ERRORS (row number, message) pairs
+        and 'completed' which is False if a chunk could not be saved
+    """
+    stats = {'read': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0, 'errors': [], 'completed': True}
+    existing_index = storage.get_vocabulary(word_file).get_index()
+    # Lowercase words added by this import
+    imported_words = set()
+
+    def commit(chunk):
+        first_row = stats['read'] - len(chunk) + 1
+        valid_entries, errors = validate_word_entries(chunk)
+        stats['invalid'] += len(errors)
+        for position, error_msg in errors:
+            if len(stats['errors']) < MAX_REPORTED_ERRORS:
+                stats['errors'].append((first_row + position, error_msg))
+
+        new_entries = []
+        for word_data in valid_entries:
+            key = word_data['word'].lower()
+            if key in imported_words or existing_index.get(key) is not None:
+                stats['duplicates'] += 1
+                continue
+            imported_words.add(key)
+            new_entries.append(WordEntry.from_dict(word_data))
+
+        if new_entries and not storage.add_words(word_file, new_entries):
+            return False
+        stats['imported'] += len(new_entries)
+        if progress is not None:
+            progress(stats)
+        return True
+
+    chunk = []
+    for word_data in read_import_rows(source_path, source_format, category):
+        chunk.append(word_data)
+        stats['read'] += 1
+        if len(chunk) >= chunk_size:
+            if not commit(chunk):
+                stats['completed'] = False
+                return stats
+            chunk = []
+    if chunk and not commit(chunk):
+        stats['completed'] = False
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from learner_profiles import DEFAULT_LEARNER_ID, get_profile
+
+    parser = argparse.ArgumentParser(description='Import vocabulary from CSV, TSV or Anki exports')
+    parser.add_argument('source', help='File to import (.csv, .tsv, Anki .txt or .apkg)')
+    parser.add_argument('--format', choices=SOURCE_FORMATS, help='Input format (default: detect from the file name)')
+    parser.add_argument('--learner', default=DEFAULT_LEARNER_ID, help='Learner profile to import into')
+    parser.add_argument('--category', default='general', help='Category for rows without one')
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows validated and saved together')
+
+    args = parser.parse_args()
+
+    profile = get_profile(args.learner)
+    if profile is None:
+        sys.exit(1)
+
+    def print_progress(stats):
+        print(f"{stats['read']} rows read: {stats['imported']} imported, "
+              f"{stats['duplicates']} duplicates, {stats['invalid']} invalid")
+
+    try:
+        result = import_vocabulary(
+            args.source, profile.storage, profile.word_file,
+            source_format=args.format, category=args.category,
+            chunk_size=args.chunk_size, progress=print_progress
+        )
+    except (OSError, ValueError, csv.Error, sqlite3.Error, zipfile.BadZipFile) as e:
+        print(f"Error: Could not import {args.source}: {e}")
+        sys.exit(1)
+
+    for row_number, error_msg in result['errors']:
+        print(f"  Row {row_number}: {error_msg}")
+    if not result['completed']:
+        print("Import stopped because a chunk could not be saved")
+        sys.exit(1)
+    print(f"Done: {result['imported']} words imported into {profile.word_file}")
@@ -0,0 +1,528 @@
+"""
+In-memory indexes over a vocabulary snapshot
+Built once per snapshot so filtering by category, difficulty or part of
+speech costs O(result) instead of scanning the whole vocabulary on every
+Streamlit rerun
+"""
+
+import bisect
+import heapq
+import re
+from collections import Counter, namedtuple
+
+
+class VocabularyIndex:
+    """
+    Multi-key lookup tables for a sequence of word entries
+
+    Maps lowercase word -> entry, and category, difficulty and part of
+    speech -> entries. Entry lists keep the order of the source vocabulary.
+    """
+
+    def __init__(self, words, difficulty_of=None, part_of_speech_of=None):
+        """
+        Args:
+            words (iterable): WordEntry objects or word dictionaries
+            difficulty_of (callable): Returns the difficulty for a word (optional)
+            part_of_speech_of (callable): Returns the part of speech for a word (optional)
+        """
+        self.words = tuple(words)
+        by_word = {}
+        by_category = {}
+        by_difficulty = {}
+        by_part_of_speech = {}
+
+        # id(entry) -> (category, difficulty, part of speech, position)
+        keys = {}
+
+        for position, entry in enumerate(self.words):
+            word = entry['word']
+            category = entry.get('category', '').lower()
+            difficulty = difficulty_of(word) if difficulty_of is not None else None
+            part_of_speech = part_of_speech_of(word) if part_of_speech_of is not None else None
+
+            by_word.setdefault(word.lower(), entry)
+            by_category.setdefault(category, []).append(entry)
+            if difficulty_of is not None:
+                by_difficulty.setdefault(difficulty, []).append(entry)
+            if part_of_speech_of is not None:
+                by_part_of_speech.setdefault(part_of_speech, []).append(entry)
+            keys[id(entry)] = (category, difficulty, part_of_speech, position)
+
+        self.by_word = by_word
+        self._keys = keys
+        self.by_category = {key: tuple(entries) for key, entries in by_category.items()}
+        self.by_difficulty = {key: tuple(entries) for key, entries in by_difficulty.items()}
+        self.by_part_of_speech = {key: tuple(entries) for key, entries in by_part_of_speech.items()}
+
+    def __len__(self):
+        return len(self.words)
+
+    def get(self, word):
+        """Return the entry for a word (case-insensitive), or None"""
+        return self.by_word.get(word.strip().lower())
+
+    def category(self, category):
+        """Return the entries in a category (case-insensitive)"""
+        return self.by_category.get(category.lower(), ())
+
+    def difficulty(self, difficulty):
+        """Return the entries with a difficulty level"""
+        return self.by_difficulty.get(difficulty, ())
+
+    def part_of_speech(self, part_of_speech):
+        """Return the entries with a part of speech"""
+        return self.by_part_of_speech.get(part_of_speech, ())
+
+    def category_counts(self):
+        """Return a dict of category -> number of words"""
+        return {category: len(entries) for category, entries in self.by_category.items()}
+
+    def select(self, category=None, difficulties=None, parts_of_speech=None):
+        """
+        Return the entries matching every given filter
+
+        Only the smallest matching bucket is walked and the other filters
+        are checked per entry, so the cost depends on the result size rather
+        than the vocabulary size.
+
+        Args:
+            category (str): Category to match (optional)
+            difficulties (list): Difficulty levels to accept (optional)
+            parts_of_speech (list): Parts of speech to accept (optional)
+
+        Returns:
+            list: Matching entries in vocabulary order
+        """
+        wanted = [None, None, None]
+        candidates = []
+        if category is not None:
+            wanted[0] = {category.lower()}
+            candidates.append([self.category(category)])
+        if difficulties is not None:
+            wanted[1] = set(difficulties)
+            candidates.append([self.by_difficulty.get(key, ()) for key in wanted[1]])
+        if parts_of_speech is not None:
+            wanted[2] = set(parts_of_speech)
+            candidates.append([self.by_part_of_speech.get(key, ()) for key in wanted[2]])
+
+        if not candidates:
+            return list(self.words)
+
+        buckets = min(candidates, key=lambda group: sum(len(bucket) for bucket in group))
+        matches = []
+        for bucket in buckets:
+            for entry in bucket:
+                keys = self._keys[id(entry)]
+                if all(accepted is None or key in accepted for key, accepted in zip(keys, wanted)):
+                    matches.append(entry)
+
+        if len(buckets) > 1:
+            matches.sort(key=lambda entry: self._keys[id(entry)][3])
+        return matches
+
+
+_TOKEN_PATTERN = re.compile(r"[\w']+")
+
+# Searchable fields and their weights; the weights are unique so the best
+# matching field of an entry can be recovered from its score, and each is at
+# least double the next so a better field always outranks a closer match
+SEARCH_FIELDS = (('word', 8), ('meaning', 4), ('phrase', 2), ('expressions', 1))
+_FIELD_BY_WEIGHT = {weight: field for field, weight in SEARCH_FIELDS}
+EXACT_MATCH_BONUS = 1000
+# Results fetched per search by the Word Explorer
+SEARCH_PAGE_SIZE = 50
+
+SearchResult = namedtuple('SearchResult', ['entry', 'field', 'score'])
+
+
+def _tokenize(text):
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _grams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _rank_key(item):
+    position, score = item
+    return (-score, position)
+
+
+class TextSearchIndex:
+    """
+    Inverted index over the word, meaning, phrase and expressions of entries
+
+    Each distinct token maps to the entries containing it. Substring queries
+    are resolved through a trigram index over the distinct tokens (queries
+    shorter than three characters match by prefix), so a search only touches
+    tokens that can match instead of every entry.
+    """
+
+    def __init__(self, words):
+        """
+        Args:
+            words (iterable): WordEntry objects or word dictionaries
+        """
+        self.words = tuple(words)
+        exact = {}
+        # token -> {position: best field weight} while building
+        postings = {}
+
+        for position, entry in enumerate(self.words):
+            exact.setdefault(entry['word'].strip().lower(), []).append(position)
+            for field, weight in SEARCH_FIELDS:
+                value = entry.get(field)
+                if not value:
+                    continue
+                if not isinstance(value, str):
+                    value = " ".join(value)
+                for token in _tokenize(value):
+                    positions = postings.setdefault(token, {})
+                    if positions.get(position, 0) < weight:
+                        positions[position] = weight
+
+        self._exact = exact
+        # token -> {field weight: ascending positions whose best field for it has that weight}
+        self._postings = {}
+        for token, positions in postings.items():
+            by_weight = {}
+            for position, weight in positions.items():
+                by_weight.setdefault(weight, []).append(position)
+            self._postings[token] = by_weight
+        self._terms = sorted(postings)
+
+        # trigram -> ids of the terms containing it
+        grams = {}
+        for term_id, term in enumerate(self._terms):
+            for gram in _grams(term, 3):
+                grams.setdefault(gram, []).append(term_id)
+        self._grams = grams
+
+    def _matching_terms(self, token):
+        """Yield (term, closeness) for every indexed term matching token"""
+        if len(token) < 3:
+            # Too short for the trigram index; only whole words and prefixes
+            terms = self._terms
+            # Walk the sorted terms in place; slicing would copy the rest of the list
+            for position in range(bisect.bisect_left(terms, token), len(terms)):
+                term = terms[position]
+                if not term.startswith(token):
+                    break
+                yield term, 3 if term == token else 2
+            return
+
+        postings = sorted((self._grams.get(gram, ()) for gram in _grams(token, 3)), key=len)
+        if not postings[0]:
+            return
+        candidates = set(postings[0])
+        for term_ids in postings[1:]:
+            candidates.intersection_update(term_ids)
+        for term_id in candidates:
+            term = self._terms[term_id]
+            if term == token:
+                yield term, 3
+            elif term.startswith(token):
+                yield term, 2
+            elif token in term:
+                yield term, 1
+
+    def search(self, query, limit=None):
+        """
+        Find entries containing every token of the query
+
+        Tokens match whole words, prefixes or substrings, ranked in that
+        order, and matches in the word itself rank above matches in the
+        meaning, phrase and expressions.
+
+        Args:
+            query (str): Search text
+            limit (int): Maximum number of results (optional)
+
+        Returns:
+            list: SearchResult(entry, field, score) tuples, best first. field
+            is 'exact' for an exact word match, otherwise the best matching
+            field name.
+        """
+        query = query.strip().lower()
+        tokens = _tokenize(query)
+        if not tokens:
+            return []
+        if limit is not None and len(tokens) == 1 and len(tokens[0]) < 3:
+            return self._search_short(query, tokens[0], limit)
+
+        scores = None
+        best_weights = {}
+        for token in tokens:
+            token_scores = {}
+            for term, closeness in self._matching_terms(token):
+                for weight, positions in self._postings[term].items():
+                    score = weight * closeness
+                    for position in positions:
+                        if score > token_scores.get(position, 0):
+                            token_scores[position] = score
+                        if weight > best_weights.get(position, 0):
+                            best_weights[position] = weight
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {position: score + token_scores[position]
+                          for position, score in scores.items() if position in token_scores}
+            if not scores:
+                return []
+
+        exact_positions = set(self._exact.get(query, ()))
+        for position in exact_positions:
+            scores[position] = scores.get(position, 0) + EXACT_MATCH_BONUS
+
+        # Best score first, then vocabulary order
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, scores.items(), key=_rank_key)
+        else:
+            ranked = sorted(scores.items(), key=_rank_key)
+
+        results = []
+        for position, score in ranked:
+            if position in exact_positions:
+                field = 'exact'
+            else:
+                field = _FIELD_BY_WEIGHT[best_weights[position]]
+            results.append(SearchResult(self.words[position], field, score))
+        return results
+
+    def _search_short(self, query, token, limit):
+        """
+        Rank the first limit matches of a one- or two-letter query
+
+        Such a token can prefix a large part of the vocabulary, so instead
+        of scoring every posting the matches are taken tier by tier in
+        descending score (closeness * field weight) and ascending position,
+        stopping once limit entries are collected. Weights at least double
+        from field to field, so the first tier an entry appears in holds
+        both its score and its best field, and the order is the same as
+        the full ranking.
+        """
+        terms = [term for term, _ in self._matching_terms(token)]
+        if not terms:
+            return []
+
+        results = []
+        seen = set()
+        exact_positions = self._exact.get(query, ())
+        for position in exact_positions:
+            if len(results) == limit:
+                return results
+            if position not in seen:
+                seen.add(position)
+                # An exact word always matches its own token as a whole word
+                results.append(SearchResult(self.words[position], 'exact', EXACT_MATCH_BONUS + 3 * SEARCH_FIELDS[0][1]))
+
+        tiers = sorted(
+            ((closeness, weight) for closeness in (3, 2) for _, weight in SEARCH_FIELDS),
+            key=lambda tier: -tier[0] * tier[1]
+        )
+        for closeness, weight in tiers:
+            lists = [
+                self._postings[term][weight] for term in terms
+                if (term == token) == (closeness == 3) and weight in self._postings[term]
+            ]
+            for position in heapq.merge(*lists):
+                if position in seen:
+                    continue
+                if len(results) == limit:
+                    return results
+                seen.add(position)
+                results.append(SearchResult(self.words[position], _FIELD_BY_WEIGHT[weight], closeness * weight))
+        return results
+
+
+def edit_distance(a, b, max_distance=None):
+    """
+    Levenshtein distance between two strings
+
+    Args:
+        a (str): First string
+        b (str): Second string
+        max_distance (int): Stop early once the distance exceeds this (optional)
+
+    Returns:
+        int: Minimum number of insertions, deletions and substitutions, or
+        max_distance + 1 if it is larger than max_distance
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def default_max_distance(query):
+    """Return how many typos to tolerate for a query of this length"""
+    if len(query) <= 4:
+        return 1
+    if len(query) <= 8:
+        return 2
+    return 3
+
+
+def _padded_grams(word, size):
+    return _grams(f"${word}$", size)
+
+
+class FuzzyWordIndex:
+    """
+    Padded bigram and trigram indexes for typo-tolerant word lookups
+
+    A word within edit distance k of the query shares at least
+    (q-grams in query - q * k) of its padded q-grams, so only words passing
+    that count are compared with the edit distance instead of every word.
+    Trigrams prune best but their bound drops to zero for short queries
+    with several typos; bigrams keep the bound positive for those.
+    """
+
+    def __init__(self, words):
+        """
+        Args:
+            words (iterable): WordEntry objects or word dictionaries
+        """
+        self._entries = {}
+        self._keys = []
+        # gram size -> padded q-gram -> ids of the words containing it
+        grams = {2: {}, 3: {}}
+        # word length -> ids of the words with that length
+        by_length = {}
+        for entry in words:
+            key = entry['word'].strip().lower()
+            if key in self._entries:
+                self._entries[key].append(entry)
+                continue
+            self._entries[key] = [entry]
+            key_id = len(self._keys)
+            self._keys.append(key)
+            by_length.setdefault(len(key), []).append(key_id)
+            for size, index in grams.items():
+                for gram in _padded_grams(key, size):
+                    index.setdefault(gram, []).append(key_id)
+        self._grams = grams
+        self._by_length = by_length
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _candidate_ids(self, query, max_distance):
+        """Yield the ids of the words that may be within max_distance of query"""
+        for size in (3, 2):
+            query_grams = _padded_grams(query, size)
+            min_shared = len(query_grams) - size * max_distance
+            if min_shared > 0:
+                break
+        else:
+            # Too short for either filter (a single character); the length
+            # buckets within max_distance only hold very short words
+            for length in range(max(1, len(query) - max_distance), len(query) + max_distance + 1):
+                yield from self._by_length.get(length, ())
+            return
+
+        index = self._grams[size]
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(index.get(gram, ()))
+        for key_id, count in shared.items():
+            if count >= min_shared:
+                yield key_id
+
+    def search(self, query, max_distance=None, limit=None):
+        """
+        Find the words within an edit distance of the query
+
+        Args:
+            query (str): Possibly misspelled word
+            max_distance (int): Largest edit distance to accept (defaults to
+                1-3 depending on the query length)
+            limit (int): Maximum number of words to return (optional)
+
+        Returns:
+            list: (distance, entry) tuples, closest first
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        if max_distance is None:
+            max_distance = default_max_distance(query)
+
+        matches = []
+        for key in (self._keys[key_id] for key_id in self._candidate_ids(query, max_distance)):
+            if abs(len(key) - len(query)) > max_distance:
+                continue
+            distance = edit_distance(query, key, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, key))
+
+        matches.sort()
+        if limit is not None:
+            matches = matches[:limit]
+        return [(distance, entry) for distance, key in matches for entry in self._entries[key]]
+
+
+class PrefixCompleter:
+    """
+    Sorted array of distinct words for prefix completion
+
+    Completing a prefix is a binary search plus a short forward scan, so
+    it stays fast on large vocabularies and uses one list slot per word.
+    """
+
+    def __init__(self, words):
+        """
+        Args:
+            words (iterable): WordEntry objects or word dictionaries
+        """
+        display = {}
+        for entry in words:
+            word = entry['word'].strip()
+            display.setdefault(word.lower(), word)
+        self._keys = sorted(display)
+        self._words = [display[key] for key in self._keys]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, word):
+        key = word.strip().lower()
+        position = bisect.bisect_left(self._keys, key)
+        return position < len(self._keys) and self._keys[position] == key
+
+    def complete(self, prefix, limit=10):
+        """
+        Return the words starting with a prefix
+
+        Args:
+            prefix (str): Typed text (case-insensitive)
+            limit (int): Maximum number of completions
+
+        Returns:
+            list: Matching words in alphabetical order
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._keys, prefix)
+        completions = []
+        for position in range(start, min(start + limit, len(self._keys))):
+            if not self._keys[position].startswith(prefix):
+                break
+            completions.append(self._words[position])
+        return completions
@@ -0,0 +1,426 @@
+"""
+Append-only change log for vocabulary files
+Single-word edits are appended as one JSON record to <file>.log instead of
+rewriting vocabulary.txt. The current vocabulary (the materialized view) is
+vocabulary.txt with the log replayed on top, and a background compaction
+folds the log back into vocabulary.txt with an atomic replace.
+
+Until a process first reads the whole vocabulary, single-word lookups and
+writes use the byte-offset index of vocabulary.txt (vocabulary_file.py) plus
+the log instead of building the view.
+"""
+
+import json
+import os
+import threading
+
+from shared_file import atomic_write, file_lock
+from main import (
+    WordEntry,
+    iter_vocabulary_from_file,
+    get_vocabulary_log_path,
+    write_vocabulary_file
+)
+from vocabulary_file import get_vocabulary_file_index
+
+# Compact once this many records have been appended since the last compaction
+COMPACT_AFTER_RECORDS = 500
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class VocabularyLog:
+    """
+    Vocabulary file plus its append-only log of add/update/delete records
+
+    Every record is written with a single append and fsync, so a crash can
+    at most leave a torn last record, which replay ignores and the next
+    append discards. vocabulary.txt itself is only ever replaced atomically.
+    Writers in every process serialize on file_lock(vocabulary.txt), so each
+    one replays the others' records before appending its own.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.log_path = get_vocabulary_log_path(file_path)
+        # Sequence number -> WordEntry, in vocabulary order. Duplicate entries
+        # in vocabulary.txt are kept, as in the SQLite backend.
+        self._view = {}
+        # lowercase word -> sequence numbers of its entries
+        self._keys_by_word = {}
+        self._next_key = 0
+        self._base_signature = None
+        self._log_offset = 0
+        self._log_signature = None
+        self._records_since_compaction = 0
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._compaction_thread = None
+
+    # Materialized view
+
+    def _put(self, entry):
+        key = self._next_key
+        self._next_key += 1
+        self._view[key] = entry
+        self._keys_by_word.setdefault(entry.word.strip().lower(), set()).add(key)
+
+    def _remove_word(self, word, category=None):
+        """Remove the entries of a word, or only those in one category"""
+        word = word.strip().lower()
+        keys = self._keys_by_word.get(word, set())
+        for key in list(keys):
+            if category is None or self._view[key].category == category:
+                del self._view[key]
+                keys.discard(key)
+        if not keys:
+            self._keys_by_word.pop(word, None)
+
+    def _apply(self, record):
+        op = record.get('op')
+        if op == 'delete':
+            self._remove_word(record['word'])
+            return
+        entry = WordEntry.from_dict(record)
+        # Like the SQLite backend: an add replaces the word in the same category
+        # and moves it to the end, an update replaces it in every category
+        self._remove_word(entry.word, None if op == 'update' else entry.category)
+        self._put(entry)
+
+    def _replay(self, start):
+        """Apply the complete records from byte offset `start` of the log"""
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(start)
+                data = f.read()
+        except FileNotFoundError:
+            self._log_offset = 0
+            return
+
+        offset = start
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # torn record from an interrupted append
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError) as e:
+                print(f"Warning: Skipping bad record in {self.log_path}: {e}")
+            self._records_since_compaction += 1
+        self._log_offset = offset
+
+    def _refresh(self):
+        """Bring the view up to date with vocabulary.txt and the log on disk"""
+        base_signature = _signature(self.file_path)
+        log_signature = _signature(self.log_path)
+        if self._loaded and base_signature == self._base_signature and log_signature == self._log_signature:
+            return
+
+        log_size = log_signature[1] if log_signature else 0
+        if not self._loaded or base_signature != self._base_signature or log_size < self._log_offset:
+            # vocabulary.txt was rewritten or the log was reset: rebuild the view
+            self._view = {}
+            self._keys_by_word = {}
+            self._next_key = 0
+            self._records_since_compaction = 0
+            if base_signature is not None:
+                for entry in iter_vocabulary_from_file(self.file_path):
+                    self._put(entry)
+            self._replay(0)
+        else:
+            self._replay(self._log_offset)
+
+        self._base_signature = base_signature
+        self._log_signature = log_signature
+        self._loaded = True
+
+    def entries(self):
+        """
+        Get the current vocabulary
+
+        Returns:
+            list: WordEntry objects from vocabulary.txt with the log applied
+        """
+        with self._lock:
+            self._refresh()
+            return list(self._view.values())
+
+    def _read_log(self):
+        """Return the complete records of the log and the byte offset where they end"""
+        try:
+            with open(self.log_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+
+        records = []
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # torn record from an interrupted append
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records, offset
+
+    def _lookup_unloaded(self, word, records):
+        """Get a word's entries from the vocabulary.txt index with the log records applied"""
+        key = word.strip().lower()
+        entries = get_vocabulary_file_index(self.file_path).lookup(key)
+        for record in records:
+            if record.get('word', '').strip().lower() != key:
+                continue
+            op = record.get('op')
+            if op == 'delete':
+                entries = []
+                continue
+            try:
+                entry = WordEntry.from_dict(record)
+            except KeyError:
+                continue
+            # Same rules as _apply
+            entries = [existing for existing in entries if op != 'update' and existing.category != entry.category]
+            entries.append(entry)
+        return entries
+
+    def get(self, word):
+        """
+        Get the entries of one word
+
+        Args:
+            word (str): Word to look up (case-insensitive)
+
+        Returns:
+            list: WordEntry objects for the word
+        """
+        with self._lock:
+            if not self._loaded:
+                return self._lookup_unloaded(word, self._read_log()[0])
+            self._refresh()
+            keys = self._keys_by_word.get(word.strip().lower(), ())
+            return [self._view[key] for key in sorted(keys)]
+
+    def __contains__(self, word):
+        return bool(self.get(word))
+
+    # Writes
+
+    def _append(self, *records, require_word=None):
+        """Append records, or return False without writing if require_word is not in the vocabulary"""
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode('utf-8')
+        with self._lock:
+            try:
+                with file_lock(self.file_path):
+                    if self._loaded:
+                        self._refresh()
+                        log_offset = self._log_offset
+                        if require_word is not None and require_word.lower() not in self._keys_by_word:
+                            return False
+                    else:
+                        # Nothing has read the whole vocabulary yet, so check the
+                        # word through the byte-offset index instead of building the view
+                        log_records, log_offset = self._read_log()
+                        if require_word is not None and not self._lookup_unloaded(require_word, log_records):
+                            return False
+                        self._records_since_compaction = len(log_records)
+                    with open(self.log_path, 'ab') as f:
+                        if f.tell() > log_offset:
+                            # Drop a torn record left by an interrupted append
+                            f.truncate(log_offset)
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    if self._loaded:
+                        for record in records:
+                            self._apply(record)
+                        self._log_offset += len(data)
+                        self._log_signature = _signature(self.log_path)
+                    self._records_since_compaction += len(records)
+            except OSError as e:
+                print(f"Error writing to {self.log_path}: {e}")
+                return False
+
+            if self._records_since_compaction >= COMPACT_AFTER_RECORDS:
+                self.compact_in_background()
+            return True
+
+    def add(self, word_entry):
+        """
+        Add a word, replacing an existing entry for the same word and category
+
+        Args:
+            word_entry (dict or WordEntry): Word data to add
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        entry = WordEntry.from_dict(word_entry)
+        return self._append(dict(entry.copy(), op='add'))
+
+    def add_many(self, word_list):
+        """
+        Add several words with a single append and fsync
+
+        Args:
+            word_list (list): WordEntry objects or word dictionaries
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        records = [dict(WordEntry.from_dict(word_entry).copy(), op='add') for word_entry in word_list]
+        if not records:
+            return True
+        return self._append(*records)
+
+    def update(self, word_entry):
+        """
+        Replace every entry of a word with new data
+
+        Args:
+            word_entry (dict or WordEntry): New word data
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        entry = WordEntry.from_dict(word_entry)
+        return self._append(dict(entry.copy(), op='update'))
+
+    def delete(self, word):
+        """
+        Delete every entry of a word
+
+        Args:
+            word (str): Word to delete (case-insensitive)
+
+        Returns:
+            bool: True if the word was found and deleted, False otherwise
+        """
+        word = word.strip()
+        return self._append({'op': 'delete', 'word': word}, require_word=word)
+
+    def replace(self, word_list):
+        """
+        Replace the whole vocabulary and discard the log
+
+        Args:
+            word_list (list): WordEntry objects or word dictionaries
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        with self._lock:
+            try:
+                with file_lock(self.file_path):
+                    if os.path.exists(self.log_path):
+                        os.remove(self.log_path)
+                    success = write_vocabulary_file(word_list, self.file_path)
+            except OSError as e:
+                print(f"Error resetting {self.log_path}: {e}")
+                return False
+            self._loaded = False
+            return success
+
+    # Compaction
+
+    def compact(self):
+        """
+        Fold the log into vocabulary.txt
+
+        The new vocabulary.txt is written to a temporary file and atomically
+        swapped in; records appended meanwhile are kept in a fresh log. If
+        the process dies halfway, replaying the old log on top of the new
+        file gives the same view.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        with self._lock:
+            self._refresh()
+            if self._log_offset == 0:
+                return True
+            base_signature = self._base_signature
+            compacted_offset = self._log_offset
+            word_list = list(self._view.values())
+
+        # Unique per process and thread so concurrent compactions never share it
+        temp_path = f"{self.file_path}.{os.getpid()}.{threading.get_ident()}.compact"
+        if not write_vocabulary_file(word_list, temp_path):
+            return False
+
+        with self._lock:
+            try:
+                with file_lock(self.file_path):
+                    self._refresh()
+                    if self._base_signature != base_signature or self._log_offset < compacted_offset:
+                        # The vocabulary was replaced or compacted while we were writing
+                        os.remove(temp_path)
+                        return False
+                    with open(self.log_path, 'rb') as f:
+                        f.seek(compacted_offset)
+                        pending = f.read(self._log_offset - compacted_offset)
+
+                    os.replace(temp_path, self.file_path)
+                    with atomic_write(self.log_path, 'wb') as f:
+                        f.write(pending)
+            except OSError as e:
+                print(f"Error compacting {self.file_path}: {e}")
+                return False
+
+            self._base_signature = _signature(self.file_path)
+            self._log_signature = _signature(self.log_path)
+            self._log_offset = len(pending)
+            self._records_since_compaction = 0
+            return True
+
+    def compact_in_background(self):
+        """Start a compaction thread unless one is already running"""
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+            self._compaction_thread.start()
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_vocabulary_log(file_path):
+    """
+    Get the process-wide VocabularyLog for a vocabulary file
+
+    Args:
+        file_path (str): Path to the vocabulary file
+
+    Returns:
+        VocabularyLog: Shared instance for the file
+    """
+    with _logs_lock:
+        log = _logs.get(file_path)
+        if log is None:
+            log = VocabularyLog(file_path)
+            _logs[file_path] = log
+        return log
+
+
+def release_vocabulary_log(file_path):
+    """
+    Forget the shared VocabularyLog of a file
+
+    Args:
+        file_path (str): Path to the vocabulary file
+    """
+    with _logs_lock:
+        _logs.pop(file_path, None)
@@ -0,0 +1,265 @@
+"""
+Precompiled binary snapshots of the vocabulary JSON files
+Compiles level1.json, level2.json, level3.json and word_pools.json into
+marshal-encoded snapshots of normalized entry rows, so they do not have to
+be decoded from JSON, flattened or annotated on every load. Run this module
+after editing any of the JSON files or word_metadata.py:
+
+    python vocabulary_snapshot.py
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import struct
+import time
+
+import word_metadata
+from shared_file import atomic_write
+from word_metadata import get_difficulty, get_phonetic
+
+SNAPSHOT_DIR = "compiled"
+SNAPSHOT_MAGIC = b"VOCABSNP"
+SNAPSHOT_VERSION = 2
+SOURCE_FILES = ["level1.json", "level2.json", "level3.json", "word_pools.json"]
+# Fields of a normalized entry row, in WordEntry argument order
+ENTRY_FIELDS = ('word', 'meaning', 'phrase', 'category', 'expressions', 'learned_date', 'difficulty', 'phonetic')
+
+# magic, snapshot format version, marshal format version
+_HEADER = struct.Struct("<8sHH")
+
+
+def get_snapshot_path(source_path):
+    """
+    Get the snapshot file path for a JSON source file
+
+    Args:
+        source_path (str): Path to the JSON file
+
+    Returns:
+        str: Path to the compiled snapshot
+    """
+    directory, filename = os.path.split(source_path)
+    return os.path.join(directory, SNAPSHOT_DIR, os.path.splitext(filename)[0] + ".snap")
+
+
+def _get_metadata_hash():
+    """Hash of word_metadata.py, whose difficulty and phonetic data is baked into snapshots"""
+    try:
+        with open(word_metadata.__file__, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+# Hashed once, since edits to word_metadata.py only take effect after a restart anyway
+_METADATA_HASH = _get_metadata_hash()
+
+
+def _source_signature(source_path):
+    """Everything a snapshot depends on: the format, word_metadata.py and the JSON file"""
+    stat = os.stat(source_path)
+    return (SNAPSHOT_VERSION, _METADATA_HASH, stat.st_mtime_ns, stat.st_size)
+
+
+def normalize_word_pools(word_pools):
+    """
+    Flatten category -> words pools into normalized entry rows
+
+    Categories become canonical lowercase names attached to every row, and
+    the difficulty and phonetic transcription from word_metadata.py are
+    looked up once here instead of on every render.
+
+    Args:
+        word_pools (dict): Category -> list of word dictionaries, as in levelN.json
+
+    Returns:
+        list: Tuples of ENTRY_FIELDS values that can be passed to WordEntry(*row)
+    """
+    rows = []
+    for category, words in word_pools.items():
+        category = (category or "general").strip().lower()
+        for word_entry in words:
+            word = word_entry.get('word', '')
+            expressions = word_entry.get('expressions')
+            rows.append((
+                word,
+                word_entry.get('meaning', ''),
+                word_entry.get('phrase') or "",
+                category,
+                tuple(expressions) if expressions else None,
+                None,
+                get_difficulty(word),
+                get_phonetic(word) or None
+            ))
+    return rows
+
+
+def word_pools_from_rows(rows):
+    """
+    Group normalized entry rows back into category -> words pools
+
+    Args:
+        rows (list): Rows from normalize_word_pools or load_compiled_entries
+
+    Returns:
+        dict: Lowercase category -> list of word dictionaries with their
+        category, difficulty and phonetic fields
+    """
+    word_pools = {}
+    for row in rows:
+        word_data = {field: value for field, value in zip(ENTRY_FIELDS, row) if value is not None}
+        if 'expressions' in word_data:
+            word_data['expressions'] = list(word_data['expressions'])
+        word_pools.setdefault(row[3], []).append(word_data)
+    return word_pools
+
+
+def compile_word_pools(source_path):
+    """
+    Compile a word pools JSON file into a binary snapshot of normalized rows
+
+    Args:
+        source_path (str): Path to the JSON file
+
+    Returns:
+        str or None: Path to the written snapshot, or None if failed
+    """
+    try:
+        signature = _source_signature(source_path)
+        with open(source_path, 'r', encoding='utf-8') as f:
+            word_pools = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: Could not compile {source_path}: {e}")
+        return None
+
+    payload = marshal.dumps({"source": signature, "entries": normalize_word_pools(word_pools)})
+    snapshot_path = get_snapshot_path(source_path)
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+
+    # Replace atomically so readers never see a partial snapshot
+    with atomic_write(snapshot_path, 'wb') as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, marshal.version))
+        f.write(payload)
+    return snapshot_path
+
+
+def load_compiled_entries(source_path):
+    """
+    Load normalized entry rows from the compiled snapshot of a JSON file
+
+    The snapshot is only used when it was compiled from the current version
+    of the source file and of word_metadata.py, by a compatible format
+    version.
+
+    Args:
+        source_path (str): Path to the JSON file
+
+    Returns:
+        list or None: Rows as produced by normalize_word_pools, or None if
+        the snapshot is missing or stale and the JSON should be read instead
+    """
+    snapshot_path = get_snapshot_path(source_path)
+    try:
+        signature = _source_signature(source_path)
+        with open(snapshot_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, marshal_version = _HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or marshal_version != marshal.version:
+        return None
+
+    try:
+        snapshot = marshal.loads(data[_HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        print(f"Warning: Ignoring corrupt snapshot {snapshot_path}")
+        return None
+
+    if tuple(snapshot.get("source", ())) != signature:
+        return None
+    return snapshot["entries"]
+
+
+def load_entries(source_path):
+    """
+    Load normalized entry rows of a JSON file, compiled or not
+
+    Args:
+        source_path (str): Path to the JSON file
+
+    Returns:
+        list or None: Rows as produced by normalize_word_pools, or None if
+        the file is missing or not valid JSON
+    """
+    rows = load_compiled_entries(source_path)
+    if rows is not None:
+        return rows
+    try:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            return normalize_word_pools(json.load(f))
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON format in {source_path}: {e}")
+        return None
+
+
+def compile_all(source_files=SOURCE_FILES):
+    """
+    Compile every vocabulary JSON file that exists
+
+    Args:
+        source_files (list): JSON files to compile
+
+    Returns:
+        list: Paths of the written snapshots
+    """
+    compiled = []
+    for source_path in source_files:
+        if not os.path.exists(source_path):
+            print(f"Skipping {source_path} (not found)")
+            continue
+        snapshot_path = compile_word_pools(source_path)
+        if snapshot_path:
+            compiled.append(snapshot_path)
+            print(f"Compiled {source_path} -> {snapshot_path}")
+    return compiled
+
+
+def benchmark(source_files=SOURCE_FILES, rounds=200):
+    """Print the average load time of the JSON files and their snapshots"""
+    for source_path in source_files:
+        if not os.path.exists(source_path):
+            continue
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            with open(source_path, 'r', encoding='utf-8') as f:
+                normalize_word_pools(json.load(f))
+        json_ms = (time.perf_counter() - start) * 1000 / rounds
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            load_compiled_entries(source_path)
+        snapshot_ms = (time.perf_counter() - start) * 1000 / rounds
+
+        print(f"{source_path}: json {json_ms:.3f} ms, snapshot {snapshot_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compile vocabulary JSON files into binary snapshots')
+    parser.add_argument('files', nargs='*', default=SOURCE_FILES, help='JSON files to compile')
+    parser.add_argument('--benchmark', action='store_true', help='Compare JSON and snapshot load times')
+
+    args = parser.parse_args()
+
+    compile_all(args.files)
+    if args.benchmark:
+        benchmark(args.files)
@@ -0,0 +1,310 @@
+"""
+Storage backends for the vocabulary apps
+Every app reads and writes vocabulary, learned words and study progress
+through get_storage(), which returns the backend selected by the
+VOCABULARY_STORAGE environment variable:
+
+    sqlite  SQLite database in WAL mode (default, see vocabulary_db.py)
+    file    vocabulary.txt with its change log, learned.json and progress.json
+"""
+
+import json
+import os
+import threading
+
+from main import (
+    save_word_pools_to_file,
+    DEFAULT_DATABASE_FILE,
+    DEFAULT_LEARNED_FILE,
+    DEFAULT_PROGRESS_FILE,
+    DEFAULT_VOCABULARY_FILE,
+    STORAGE_BACKEND
+)
+from learned_words import get_learned_words, release_learned_words
+from shared_file import atomic_write, file_lock
+from vocabulary_db import VocabularyDatabase, get_vocabulary_database, release_vocabulary_database
+from vocabulary_file import release_vocabulary_file_index
+from vocabulary_log import get_vocabulary_log, release_vocabulary_log
+from vocabulary_store import vocabulary_store
+
+
+class StorageBackend:
+    """
+    Behaviour shared by the storage backends
+
+    Subclasses provide get_vocabulary and get_learned.
+    """
+
+    def get_completer(self, word_file, vocabulary_only=False):
+        """
+        Get a prefix completer for the search boxes
+
+        Args:
+            word_file (str): Vocabulary file name
+            vocabulary_only (bool): Complete from the vocabulary only instead
+                of the level files, vocabulary and learned words
+
+        Returns:
+            PrefixCompleter: Completer shared until one of its sources changes
+        """
+        if vocabulary_only:
+            return vocabulary_store.get_completer_for([self.get_vocabulary(word_file)])
+        snapshots = [vocabulary_store.get_level(level) for level in (1, 2, 3)]
+        snapshots.append(self.get_vocabulary(word_file))
+        snapshots.append(self.get_learned())
+        return vocabulary_store.get_completer_for(snapshots)
+
+
+class FileStorage(StorageBackend):
+    """
+    Plain-file backend
+
+    Vocabulary edits go through the append-only change log; learned words
+    are kept in a keyed LearnedWords map that is flushed to learned.json in
+    batches. Ratings, favorites and study statistics go to progress.json.
+    """
+
+    name = "file"
+
+    def __init__(self, word_file=DEFAULT_VOCABULARY_FILE, learned_file=DEFAULT_LEARNED_FILE,
+                 progress_file=DEFAULT_PROGRESS_FILE, read_only=False, **unused_paths):
+        # Reads never create files, so read_only needs no special handling here
+        self.word_file = word_file
+        self.learned_file = learned_file
+        self.progress_file = progress_file
+
+    # Vocabulary
+
+    def get_vocabulary(self, word_file):
+        return vocabulary_store.get_vocabulary(word_file)
+
+    def add_word(self, word_file, word_entry):
+        return get_vocabulary_log(word_file).add(word_entry)
+
+    def add_words(self, word_file, word_list):
+        return get_vocabulary_log(word_file).add_many(word_list)
+
+    def delete_word(self, word_file, word):
+        return get_vocabulary_log(word_file).delete(word)
+
+    def replace_vocabulary(self, word_file, word_list):
+        return get_vocabulary_log(word_file).replace(word_list)
+
+    def save_word_pools(self, word_pools, word_file):
+        return save_word_pools_to_file(word_pools, word_file)
+
+    # Learned words
+
+    def get_learned(self):
+        return get_learned_words(self.learned_file).entries()
+
+    def add_learned(self, word_entry):
+        return get_learned_words(self.learned_file).add(word_entry)
+
+    def remove_learned(self, word):
+        return get_learned_words(self.learned_file).remove(word)
+
+    # Study progress
+
+    def _read_progress(self):
+        try:
+            with open(self.progress_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            print(f"Error loading {self.progress_file}: {e}")
+            return {}
+
+    def apply_progress(self, events):
+        try:
+            with file_lock(self.progress_file):
+                progress = self._read_progress()
+                learning_progress = progress.setdefault('learning_progress', {})
+                favorites = progress.setdefault('favorites', [])
+                for event in events:
+                    event_type = event['type']
+                    if event_type == 'review':
+                        learning_progress[event['word']] = event['rating']
+                    elif event_type == 'favorite' and event['favorite']:
+                        if event['word'] not in favorites:
+                            favorites.append(event['word'])
+                    elif event_type == 'favorite':
+                        if event['word'] in favorites:
+                            favorites.remove(event['word'])
+                    elif event_type == 'stats':
+                        progress.setdefault('stats', {}).update(event['stats'])
+                    elif event_type == 'clear':
+                        progress = {'learning_progress': {}, 'favorites': []}
+                        learning_progress = progress['learning_progress']
+                        favorites = progress['favorites']
+                with atomic_write(self.progress_file) as f:
+                    json.dump(progress, f, ensure_ascii=False, indent=2)
+            return True
+        except OSError as e:
+            print(f"Error saving {self.progress_file}: {e}")
+            return False
+
+    def get_progress(self):
+        progress = self._read_progress()
+        return {
+            'learning_progress': progress.get('learning_progress', {}),
+            'favorites': progress.get('favorites', []),
+            'stats': progress.get('stats', {})
+        }
+
+    def iter_review_history(self):
+        # progress.json keeps only the latest rating of each word
+        for word, rating in self._read_progress().get('learning_progress', {}).items():
+            yield {'word': word, 'rating': rating, 'reviewed_at': None}
+
+    def close(self):
+        """Flush pending writes and drop this backend's files from the shared caches"""
+        release_learned_words(self.learned_file)
+        release_vocabulary_log(self.word_file)
+        release_vocabulary_file_index(self.word_file)
+        vocabulary_store.invalidate(self.word_file)
+        vocabulary_store.invalidate(f"{self.learned_file}#learned_words")
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite backend
+
+    Vocabulary lists are keyed by their file name, so existing callers keep
+    passing word_file. Reads are cached in the shared vocabulary store and
+    reloaded only when the table's revision changes. On first use the
+    database is seeded from vocabulary.txt and learned.json. A read-only
+    backend neither creates nor seeds the database; until it exists, its
+    learned words are the seed in learned.json.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path=DEFAULT_DATABASE_FILE, word_file=DEFAULT_VOCABULARY_FILE,
+                 learned_file=DEFAULT_LEARNED_FILE, read_only=False, **unused_paths):
+        self.word_file = word_file
+        self.learned_file = learned_file
+        self.read_only = read_only
+        if read_only:
+            # Private instance, so the shared pool never hands out read-only connections
+            self.database = VocabularyDatabase(db_path, read_only=True)
+            return
+        self.database = get_vocabulary_database(db_path)
+        self.database.import_files(word_file, learned_file)
+
+    # Vocabulary
+
+    def get_vocabulary(self, word_file):
+        database = self.database
+        return vocabulary_store.get_records(
+            f"{database.db_path}#words:{word_file}",
+            ('words', database.get_revision('words')),
+            lambda key: database.get_words(word_file)
+        )
+
+    def add_word(self, word_file, word_entry):
+        return self.database.add_word(word_file, word_entry)
+
+    def add_words(self, word_file, word_list):
+        return self.database.add_words(word_file, word_list)
+
+    def delete_word(self, word_file, word):
+        return self.database.delete_word(word_file, word)
+
+    def replace_vocabulary(self, word_file, word_list):
+        return self.database.replace_words(word_file, word_list)
+
+    def save_word_pools(self, word_pools, word_file):
+        word_list = []
+        for category, words in word_pools.items():
+            for word_data in words:
+                word_list.append(dict(word_data, category=category))
+        return self.database.replace_words(word_file, word_list)
+
+    # Learned words
+
+    def get_learned(self):
+        database = self.database
+        if self.read_only and not os.path.exists(database.db_path):
+            # Not created yet: the learned words are still the seed import_files would load
+            return get_learned_words(self.learned_file).entries()
+        return vocabulary_store.get_records(
+            f"{database.db_path}#learned_words",
+            ('learned_words', database.get_revision('learned_words')),
+            lambda key: database.get_learned()
+        )
+
+    def add_learned(self, word_entry):
+        return self.database.add_learned(word_entry)
+
+    def remove_learned(self, word):
+        return self.database.remove_learned(word)
+
+    # Study progress
+
+    def apply_progress(self, events):
+        return self.database.apply_progress(events)
+
+    def get_progress(self):
+        return {
+            'learning_progress': self.database.get_latest_ratings(),
+            'favorites': self.database.get_favorites(),
+            'stats': self.database.get_stats()
+        }
+
+    def iter_review_history(self):
+        return self.database.iter_review_history()
+
+    def close(self):
+        """Drop this backend's database and cached reads from the shared caches"""
+        db_path = self.database.db_path
+        if self.read_only:
+            self.database.close()
+            release_learned_words(self.learned_file)
+        else:
+            release_vocabulary_database(db_path)
+        vocabulary_store.invalidate(f"{db_path}#words:{self.word_file}")
+        vocabulary_store.invalidate(f"{db_path}#learned_words")
+
+
+STORAGE_BACKENDS = {
+    FileStorage.name: FileStorage,
+    SQLiteStorage.name: SQLiteStorage
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def create_storage(read_only=False, **paths):
+    """
+    Create a backend of the configured type (STORAGE_BACKEND)
+
+    Args:
+        read_only (bool): Only read existing data, without creating or seeding files
+        **paths: db_path, word_file, learned_file and progress_file to use
+            instead of the defaults; each backend ignores the ones it does not need
+
+    Returns:
+        FileStorage or SQLiteStorage: New backend
+    """
+    backend = STORAGE_BACKENDS.get(STORAGE_BACKEND)
+    if backend is None:
+        print(f"Warning: Unknown storage backend '{STORAGE_BACKEND}', using sqlite")
+        backend = SQLiteStorage
+    return backend(read_only=read_only, **paths)
+
+
+def get_storage():
+    """
+    Get the process-wide storage backend of the default learner
+
+    Returns:
+        FileStorage or SQLiteStorage: Backend named by STORAGE_BACKEND
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage()
+        return _storage
@@ -0,0 +1,268 @@
+"""
+Process-wide vocabulary store shared by every Streamlit session
+Parses vocabulary.txt and the level files once and only reloads them when
+their modification time or size changes on disk. Files are registered with
+the process's file watcher, so cached files are not even checked again
+until the watcher publishes a change. Only file-backed data (the file
+storage backend's vocabulary and the level files) is watched; records
+from other sources (get_records), such as the SQLite backend or learned
+words, are checked against their own revision signature on every read
+instead.
+"""
+
+import os
+import threading
+
+from file_watcher import get_file_watcher
+from main import WordEntry, get_vocabulary_log_path
+from vocabulary_index import FuzzyWordIndex, PrefixCompleter, TextSearchIndex, VocabularyIndex
+from vocabulary_log import get_vocabulary_log
+from vocabulary_snapshot import load_entries
+
+
+class VocabularySnapshot(tuple):
+    """
+    Immutable sequence of word entries loaded from one file
+
+    Snapshots are shared between sessions, so every entry is an immutable
+    WordEntry. Use entry.copy() to get a mutable dict.
+    """
+
+    def __new__(cls, words, path, signature):
+        snapshot = super().__new__(cls, words)
+        snapshot.path = path
+        snapshot.signature = signature
+        snapshot._indexes = {}
+        return snapshot
+
+    def get_index(self, difficulty_of=None, part_of_speech_of=None):
+        """
+        Get the VocabularyIndex for this snapshot, building it on first use
+
+        Args:
+            difficulty_of (callable): Returns the difficulty for a word (optional)
+            part_of_speech_of (callable): Returns the part of speech for a word (optional)
+
+        Returns:
+            VocabularyIndex: Index shared by every caller using the same functions
+        """
+        key = (difficulty_of, part_of_speech_of)
+        index = self._indexes.get(key)
+        if index is None:
+            index = VocabularyIndex(self, difficulty_of, part_of_speech_of)
+            self._indexes[key] = index
+        return index
+
+    def get_search_index(self):
+        """
+        Get the full-text TextSearchIndex for this snapshot, building it on first use
+
+        Returns:
+            TextSearchIndex: Index shared by every caller
+        """
+        index = self._indexes.get('search')
+        if index is None:
+            index = TextSearchIndex(self)
+            self._indexes['search'] = index
+        return index
+
+    def get_fuzzy_index(self):
+        """
+        Get the FuzzyWordIndex of this snapshot for typo-tolerant lookups
+
+        Returns:
+            FuzzyWordIndex: Index shared by every caller
+        """
+        index = self._indexes.get('fuzzy')
+        if index is None:
+            index = FuzzyWordIndex(self)
+            self._indexes['fuzzy'] = index
+        return index
+
+
+def _file_signature(path):
+    """Return (mtime_ns, size) for a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_level_file(path):
+    """
+    Load the normalized entries of a level JSON file
+
+    Reads the compiled snapshot when it is up to date.
+
+    Args:
+        path (str): Path to a levelN.json file
+
+    Returns:
+        list: WordEntry objects with their category, difficulty and phonetic attached
+    """
+    rows = load_entries(path)
+    if rows is None:
+        print(f"Error loading {path}")
+        return []
+    return [WordEntry(*row) for row in rows]
+
+
+def _load_vocabulary_file(path):
+    """Load a vocabulary file with the pending records of its change log applied"""
+    return get_vocabulary_log(path).entries()
+
+
+class VocabularyStore:
+    """
+    Cache of parsed vocabulary files keyed by path
+
+    Each path is parsed at most once per (mtime, size) signature. Every caller
+    receives the same immutable VocabularySnapshot until the file changes.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self._completers = {}
+        self._lock = threading.Lock()
+        # Cache keys whose files are watched, and keys changed since their last check
+        self._watched = set()
+        self._stale = set()
+        # absolute file path -> cache keys to mark stale when it changes
+        self._keys_by_path = {}
+        # Guards _keys_by_path without making the watcher thread wait for file loads
+        self._keys_lock = threading.Lock()
+        self._subscribed = False
+
+    def _file_changed(self, path):
+        # Runs on the watcher thread or right after a writer's lock, so it only marks keys
+        with self._keys_lock:
+            keys = list(self._keys_by_path.get(path, ()))
+        self._stale.update(keys)
+
+    def _watch(self, key, paths):
+        watcher = get_file_watcher()
+        if watcher is None:
+            return
+        with self._lock:
+            if not self._subscribed:
+                watcher.subscribe(self._file_changed)
+                self._subscribed = True
+            with self._keys_lock:
+                for path in paths:
+                    self._keys_by_path.setdefault(os.path.abspath(path), set()).add(key)
+        if all(watcher.watch(path) for path in paths):
+            self._watched.add(key)
+
+    def _get_file(self, path, loader, watch_paths=None):
+        """Get a file-backed snapshot, skipping the signature check while its files are unchanged"""
+        if path in self._watched and path not in self._stale:
+            snapshot = self._snapshots.get(path)
+            if snapshot is not None:
+                return snapshot
+        if path not in self._watched:
+            self._watch(path, watch_paths or [path])
+        # Clear the mark before checking, so a change published during the load marks it again
+        self._stale.discard(path)
+        if watch_paths:
+            signature = tuple(_file_signature(watch_path) for watch_path in watch_paths)
+        else:
+            signature = _file_signature(path)
+        return self._get(path, loader, signature)
+
+    def _get(self, path, loader, signature=None):
+        if signature is None:
+            signature = _file_signature(path)
+        snapshot = self._snapshots.get(path)
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+
+        with self._lock:
+            # Another session may have reloaded the file while we waited
+            snapshot = self._snapshots.get(path)
+            if snapshot is not None and snapshot.signature == signature:
+                return snapshot
+
+            words = loader(path) if signature is not None and any(signature) else []
+            snapshot = VocabularySnapshot(words, path, signature)
+            self._snapshots[path] = snapshot
+            return snapshot
+
+    def get_vocabulary(self, file_path):
+        """
+        Get the words in a pipe-delimited vocabulary file
+
+        Includes the edits still pending in the file's change log.
+
+        Args:
+            file_path (str): Path to the vocabulary file
+
+        Returns:
+            VocabularySnapshot: Immutable tuple of word entries
+        """
+        return self._get_file(file_path, _load_vocabulary_file, [file_path, get_vocabulary_log_path(file_path)])
+
+    def get_level(self, level):
+        """
+        Get all words of a level file with categories attached
+
+        Args:
+            level (int): Difficulty level (1, 2, or 3)
+
+        Returns:
+            VocabularySnapshot: Immutable tuple of word entries
+        """
+        return self._get_file(f"level{level}.json", _load_level_file)
+
+    def get_records(self, key, signature, loader):
+        """
+        Get words produced by a loader that is not backed by a single file
+
+        Args:
+            key (str): Cache key for the records
+            signature (tuple): Changes whenever the underlying data changes
+            loader (callable): Called with the key to produce the word entries
+
+        Returns:
+            VocabularySnapshot: Immutable tuple of word entries
+        """
+        return self._get(key, loader, signature)
+
+    def get_completer_for(self, snapshots):
+        """
+        Get a prefix completer over the given snapshots
+
+        Args:
+            snapshots (list): VocabularySnapshot objects to complete from
+
+        Returns:
+            PrefixCompleter: Completer shared until one of the snapshots changes
+        """
+        key = tuple(snapshot.path for snapshot in snapshots)
+        signatures = tuple(snapshot.signature for snapshot in snapshots)
+        cached = self._completers.get(key)
+        if cached is not None and cached[0] == signatures:
+            return cached[1]
+
+        completer = PrefixCompleter(entry for snapshot in snapshots for entry in snapshot)
+        self._completers[key] = (signatures, completer)
+        return completer
+
+    def invalidate(self, path=None):
+        """
+        Drop cached snapshots so the next read reparses the file
+
+        Args:
+            path (str): File to invalidate, or None to clear everything
+        """
+        with self._lock:
+            if path is None:
+                self._snapshots.clear()
+                self._completers.clear()
+            else:
+                self._snapshots.pop(path, None)
+                self._completers = {key: value for key, value in self._completers.items() if path not in key}
+
+
+# Shared by every session in this process
+vocabulary_store = VocabularyStore()
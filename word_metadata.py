@@ -0,0 +1,198 @@
+"""
+Word metadata shared by the vocabulary builder apps
+Phonetic transcriptions, difficulty ratings and advanced linguistic data
+for individual words, kept in an importable module so indexes built from
+them can be cached across Streamlit reruns
+"""
+
+# Phonetic transcriptions for vocabulary words
+PHONETICS = {
+    # General
+    "serendipity": "/ˌsɛrənˈdɪpɪti/",
+    "eloquent": "/ˈɛləkwənt/",
+    "resilient": "/rɪˈzɪliənt/",
+    "pragmatic": "/prægˈmætɪk/",
+    "ubiquitous": "/juˈbɪkwɪtəs/",
+    "meticulous": "/məˈtɪkjələs/",
+    "ephemeral": "/ɪˈfɛmərəl/",
+    "versatile": "/ˈvɜrsətaɪl/",
+    "ambiguous": "/æmˈbɪgjuəs/",
+    "innovative": "/ˈɪnəˌveɪtɪv/",
+    "tenacious": "/təˈneɪʃəs/",
+    "profound": "/prəˈfaʊnd/",
+    "subtle": "/ˈsʌtəl/",
+    "coherent": "/koʊˈhɪrənt/",
+    "diligent": "/ˈdɪlɪdʒənt/",
+    "intricate": "/ˈɪntrɪkət/",
+    "benevolent": "/bəˈnɛvələnt/",
+    "authentic": "/ɔˈθɛntɪk/",
+    "efficient": "/ɪˈfɪʃənt/",
+    "contemplative": "/kənˈtɛmplətɪv/",
+    
+    # Science
+    "hypothesis": "/haɪˈpɑθəsɪs/",
+    "catalyst": "/ˈkætəlɪst/",
+    "molecule": "/ˈmɑləˌkjul/",
+    "ecosystem": "/ˈikoʊˌsɪstəm/",
+    "photosynthesis": "/ˌfoʊtoʊˈsɪnθəsɪs/",
+    "chromosome": "/ˈkroʊməˌsoʊm/",
+    "quantum": "/ˈkwɑntəm/",
+    "biodiversity": "/ˌbaɪoʊdaɪˈvɜrsəti/",
+    "metabolism": "/məˈtæbəˌlɪzəm/",
+    "neuron": "/ˈnʊrɑn/",
+    "osmosis": "/ɑzˈmoʊsɪs/",
+    "mitosis": "/maɪˈtoʊsɪs/",
+    "genome": "/ˈdʒinoʊm/",
+    "thermodynamics": "/ˌθɜrmoʊdaɪˈnæmɪks/",
+    "evolution": "/ˌɛvəˈluʃən/",
+    "isotope": "/ˈaɪsəˌtoʊp/",
+    "enzyme": "/ˈɛnzaɪm/",
+    "gravity": "/ˈgrævəti/",
+    "radiation": "/ˌreɪdiˈeɪʃən/",
+    "symbiosis": "/ˌsɪmbaɪˈoʊsɪs/",
+    
+    # Business
+    "entrepreneur": "/ˌɑntrəprəˈnɜr/",
+    "revenue": "/ˈrɛvəˌnu/",
+    "stakeholder": "/ˈsteɪkˌhoʊldər/",
+    "portfolio": "/pɔrtˈfoʊlioʊ/",
+    "synergy": "/ˈsɪnərdʒi/",
+    "leverage": "/ˈlɛvərɪdʒ/",
+    "equity": "/ˈɛkwəti/",
+    "margin": "/ˈmɑrdʒən/",
+    "franchise": "/ˈfrænˌtʃaɪz/",
+    "diversification": "/daɪˌvɜrsəfəˈkeɪʃən/",
+    "acquisition": "/ˌækwəˈzɪʃən/",
+    "liability": "/ˌlaɪəˈbɪləti/",
+    "liquidate": "/ˈlɪkwəˌdeɪt/",
+    "compliance": "/kəmˈplaɪəns/",
+    "benchmark": "/ˈbɛnʧˌmɑrk/",
+    "scalable": "/ˈskeɪləbəl/",
+    "subsidiary": "/səbˈsɪdiˌɛri/",
+    "turnover": "/ˈtɜrnˌoʊvər/",
+    "valuation": "/ˌvæljuˈeɪʃən/",
+    
+    # Add more categories as needed...
+}
+
+# Difficulty levels for words
+WORD_DIFFICULTY = {
+    # General - Easy to Hard
+    "efficient": "⭐",
+    "authentic": "⭐",
+    "versatile": "⭐⭐",
+    "pragmatic": "⭐⭐",
+    "resilient": "⭐⭐",
+    "innovative": "⭐⭐",
+    "profound": "⭐⭐",
+    "coherent": "⭐⭐",
+    "diligent": "⭐⭐",
+    "benevolent": "⭐⭐⭐",
+    "eloquent": "⭐⭐⭐",
+    "meticulous": "⭐⭐⭐",
+    "ubiquitous": "⭐⭐⭐",
+    "ephemeral": "⭐⭐⭐",
+    "ambiguous": "⭐⭐⭐",
+    "tenacious": "⭐⭐⭐",
+    "subtle": "⭐⭐⭐",
+    "intricate": "⭐⭐⭐",
+    "contemplative": "⭐⭐⭐",
+    "serendipity": "⭐⭐⭐",
+    
+    # Science
+    "gravity": "⭐",
+    "molecule": "⭐",
+    "ecosystem": "⭐⭐",
+    "evolution": "⭐⭐",
+    "catalyst": "⭐⭐",
+    "enzyme": "⭐⭐",
+    "neuron": "⭐⭐",
+    "genome": "⭐⭐⭐",
+    "hypothesis": "⭐⭐⭐",
+    "photosynthesis": "⭐⭐⭐",
+    "chromosome": "⭐⭐⭐",
+    "quantum": "⭐⭐⭐",
+    "biodiversity": "⭐⭐⭐",
+    "metabolism": "⭐⭐⭐",
+    "osmosis": "⭐⭐⭐",
+    "mitosis": "⭐⭐⭐",
+    "thermodynamics": "⭐⭐⭐",
+    "isotope": "⭐⭐⭐",
+    "radiation": "⭐⭐⭐",
+    "symbiosis": "⭐⭐⭐",
+}
+
+def get_phonetic(word):
+    """Get phonetic transcription for a word"""
+    return PHONETICS.get(word.lower(), "")
+
+def get_difficulty(word):
+    """Get difficulty level for a word"""
+    return WORD_DIFFICULTY.get(word.lower(), "⭐⭐")
+
+# Advanced word data with comprehensive information
+ADVANCED_WORD_DATA = {
+    "serendipity": {
+        "phonetic": "/ˌsɛrənˈdɪpɪti/",
+        "difficulty": "⭐⭐⭐",
+        "part_of_speech": "noun",
+        "etymology": "From Persian fairy tale 'The Three Princes of Serendip'",
+        "synonyms": ["chance", "fortune", "luck", "accident"],
+        "antonyms": ["misfortune", "bad luck", "intention"],
+        "collocations": ["pure serendipity", "by serendipity", "serendipity strikes"],
+        "word_forms": {"noun": "serendipity", "adjective": "serendipitous", "adverb": "serendipitously"},
+        "frequency": "rare",
+        "register": "formal",
+        "common_mistakes": "Often misspelled as 'serendipety'"
+    },
+    "entrepreneur": {
+        "phonetic": "/ˌɑntrəprəˈnɜr/",
+        "difficulty": "⭐⭐",
+        "part_of_speech": "noun",
+        "etymology": "French 'entreprendre' meaning 'to undertake'",
+        "synonyms": ["business owner", "innovator", "founder", "startup founder"],
+        "antonyms": ["employee", "worker", "follower"],
+        "collocations": ["successful entrepreneur", "young entrepreneur", "serial entrepreneur"],
+        "word_forms": {"noun": "entrepreneur", "adjective": "entrepreneurial", "noun": "entrepreneurship"},
+        "frequency": "common",
+        "register": "business/formal",
+        "common_mistakes": "Pronunciation often confused with 'entrepren-your'"
+    },
+    "metabolism": {
+        "phonetic": "/məˈtæbəˌlɪzəm/",
+        "difficulty": "⭐⭐",
+        "part_of_speech": "noun",
+        "etymology": "Greek 'metabole' meaning 'change'",
+        "synonyms": ["metabolic process", "biochemical process"],
+        "antonyms": [],
+        "collocations": ["fast metabolism", "slow metabolism", "boost metabolism"],
+        "word_forms": {"noun": "metabolism", "verb": "metabolize", "adjective": "metabolic"},
+        "frequency": "common",
+        "register": "scientific/medical",
+        "common_mistakes": "Often confused with 'metablism' (missing 'o')"
+    }
+}
+
+def get_advanced_word_data(word):
+    """Get advanced data for a word"""
+    return ADVANCED_WORD_DATA.get(word.lower(), {
+        "phonetic": "",
+        "difficulty": "⭐⭐",
+        "part_of_speech": "unknown",
+        "etymology": "Etymology not available",
+        "synonyms": [],
+        "antonyms": [],
+        "collocations": [],
+        "word_forms": {},
+        "frequency": "common",
+        "register": "general",
+        "common_mistakes": "None noted"
+    })
+
+def get_advanced_difficulty(word):
+    """Get the difficulty level for a word from its advanced data"""
+    return get_advanced_word_data(word)['difficulty']
+
+def get_part_of_speech(word):
+    """Get the part of speech for a word from its advanced data"""
+    return get_advanced_word_data(word)['part_of_speech']